@@ -0,0 +1,77 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# Convert the pickled benchmark file into the flat columnar layout, which can be opened by `API(save_dir)` in milliseconds.
+# python exps/NAS-Bench-201/convert.py --api_path $TORCH_HOME/NAS-Bench-201-v1_0-e61699.pth --save_dir $TORCH_HOME/NAS-Bench-201-v1_0-e61699
+# The trained weights (if any) are saved into save_dir/weights with --save_weights 1, and --lite_path saves the `.pth` file without weights.
+# --arrow_dir saves the partitioned Parquet (or Arrow IPC by --arrow_format ipc) tables, which can also be opened by `API(arrow_dir)`.
+##################################################
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / '..' / '..' / 'lib').resolve()
+if str(lib_dir) not in sys.path: sys.path.insert(0, str(lib_dir))
+from log_utils import time_string
+from nas_201_api import NASBench201API as API
+from nas_201_api import export_lite, save_arrow, save_columnar, save_weights
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        'Convert NAS-Bench-201 into the columnar layout',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--api_path',
+                        type=str,
+                        help='The path to the NAS-Bench-201 benchmark file.')
+    parser.add_argument('--save_dir',
+                        type=str,
+                        help='The directory to save the columnar layout.')
+    parser.add_argument('--save_weights',
+                        type=int,
+                        default=0,
+                        choices=[0, 1],
+                        help='Save the trained weights into save_dir/weights.')
+    parser.add_argument(
+        '--lite_path',
+        type=str,
+        default=None,
+        help='The path to save the benchmark file without trained weights.')
+    parser.add_argument(
+        '--arrow_dir',
+        type=str,
+        default=None,
+        help='The directory to save the Parquet/Arrow tables (needs pyarrow).')
+    parser.add_argument('--arrow_format',
+                        type=str,
+                        default='parquet',
+                        choices=['parquet', 'ipc'],
+                        help='The file format of the tables in arrow_dir.')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    api = API(args.api_path)
+    print('{:} create the API from {:} with {:.1f} s : {:}'.format(
+        time_string(), args.api_path,
+        time.time() - start_time, api))
+    save_columnar(api, args.save_dir)
+    if args.save_weights:
+        num, nbytes = save_weights(api.arch2infos_less, api.arch2infos_full,
+                                   os.path.join(args.save_dir, 'weights'))
+        print('{:} save {:} trained weights with {:.1f} MB'.format(
+            time_string(), num, nbytes / 1e6))
+    if args.lite_path is not None:
+        export_lite(api.meta_archs, api.arch2infos_less, api.arch2infos_full,
+                    api.evaluated_indexes, args.lite_path)
+        print('{:} save the benchmark without weights into {:}'.format(
+            time_string(), args.lite_path))
+    if args.arrow_dir is not None:
+        save_arrow(api, args.arrow_dir, args.arrow_format)
+        print('{:} save the {:} tables into {:}'.format(
+            time_string(), args.arrow_format, args.arrow_dir))
+    start_time = time.time()
+    xapi = API(args.save_dir)
+    print('{:} re-open the columnar API from {:} with {:.3f} s : {:}'.format(
+        time_string(), args.save_dir,
+        time.time() - start_time, xapi))
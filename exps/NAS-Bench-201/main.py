@@ -0,0 +1,658 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# Generate NAS-Bench-201, see scripts-search/NAS-Bench-201/*.sh for the usage.
+#   --mode meta             : generate the meta file of all architectures and the training scripts
+#   --mode new/cover        : train the architectures in --srange with every seed, the result of each (arch, seed) is saved
+#                             as one checkpoint, so that an interrupted run resumes by the same command (new skips the
+#                             existing checkpoints, and cover re-trains them), and --procs trains them in parallel
+#   --mode specific-{model} : train one architecture (e.g., resnet or an arch string)
+#   --mode merge            : merge the checkpoints of all sub-directories into the file loaded by NASBench201API
+# For a quick test on CPU without any data, use `--datasets synthetic synthetic --splits 1 0 --xpaths none none`.
+##################################################
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from pathlib import Path
+
+import torch
+
+lib_dir = (Path(__file__).parent / '..' / '..' / 'lib').resolve()
+if str(lib_dir) not in sys.path: sys.path.insert(0, str(lib_dir))
+from config_utils import dict2config, load_config
+from datasets import get_datasets
+from log_utils import Logger, convert_secs2time, time_string
+from models import CellArchitectures, CellStructure, get_search_spaces
+from nas_201_api import ArchResults
+from nas_201_api import NASBench201API as API
+from nas_201_api import ResultsCount
+from procedures import evaluate_for_seed, get_machine_info
+
+config_root = (Path(__file__).parent / '..' / '..' / 'configs' /
+               'nas-benchmark').resolve()
+# the state of each worker process, i.e., its logger, device, and data loaders
+WORKER = dict()
+
+
+def get_device(device):
+    if device == 'auto':
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return torch.device(device)
+
+
+def get_sub_dir(save_dir, srange, channel, num_cells, use_less):
+    sub_name = '{:06d}-{:06d}-C{:}-N{:}'.format(srange[0], srange[1], channel,
+                                                num_cells)
+    if use_less: sub_name += '-LESS'
+    return Path(save_dir) / sub_name
+
+
+def get_checkpoint_path(sub_dir, arch_index, seed):
+    return Path(sub_dir) / 'arch-{:06d}-seed-{:04d}.pth'.format(
+        arch_index, seed)
+
+
+# split `indexes` into two interleaved halves for the datasets without the pre-defined split files (i.e., synthetic)
+def split_half(indexes, keys):
+    indexes = list(indexes)
+    return dict2config({keys[0]: indexes[0::2], keys[1]: indexes[1::2]}, None)
+
+
+def get_split_info(dataset, split, num_train, num_valid):
+    if bool(split):
+        if dataset == 'cifar10':
+            return load_config(config_root / 'cifar-split.txt', None, None)
+        elif dataset == 'synthetic':
+            return split_half(range(num_train), ('train', 'valid'))
+        else:
+            raise ValueError('invalid dataset : {:}'.format(dataset))
+    elif dataset == 'cifar100':
+        return load_config(config_root / 'cifar100-test-split.txt', None, None)
+    elif dataset == 'ImageNet16-120':
+        return load_config(config_root / 'imagenet-16-120-test-split.txt',
+                           None, None)
+    elif dataset == 'synthetic':
+        return split_half(range(num_valid), ('xvalid', 'xtest'))
+    else:
+        return None
+
+
+def get_config_path(dataset, use_less):
+    if dataset == 'synthetic':
+        return config_root / 'SYNTHETIC.config'
+    elif bool(use_less):
+        return config_root / 'LESS.config'
+    elif dataset.startswith('cifar'):
+        return config_root / 'CIFAR.config'
+    elif dataset.startswith('ImageNet16'):
+        return config_root / 'ImageNet-16.config'
+    else:
+        raise ValueError('invalid dataset : {:}'.format(dataset))
+
+
+# return a list of (dataset-key, config, train-loader, valid-loaders), where the data is loaded only once for each worker
+def get_dataset_loaders(datasets, xpaths, splits, use_less, workers, logger):
+    all_loaders = []
+    for dataset, xpath, split in zip(datasets, xpaths, splits):
+        # train valid data
+        train_data, valid_data, xshape, class_num = get_datasets(
+            dataset, xpath, -1)
+        # load the configurature
+        config_path = get_config_path(dataset, use_less)
+        config = load_config(config_path, {
+            'class_num': class_num,
+            'xshape': xshape
+        }, logger)
+        split_info = get_split_info(dataset, split, len(train_data),
+                                    len(valid_data))
+        loader_kwargs = {
+            'batch_size': config.batch_size,
+            'num_workers': workers,
+            'pin_memory': True
+        }
+        ValLoaders = {
+            'ori-test':
+            torch.utils.data.DataLoader(valid_data,
+                                        shuffle=False,
+                                        **loader_kwargs)
+        }
+        if bool(split):
+            assert len(train_data) == len(split_info.train) + len(
+                split_info.valid), 'invalid length : {:} vs {:} + {:}'.format(
+                    len(train_data), len(split_info.train),
+                    len(split_info.valid))
+            train_data_v2 = deepcopy(train_data)
+            train_data_v2.transform = valid_data.transform
+            train_loader = torch.utils.data.DataLoader(
+                train_data,
+                sampler=torch.utils.data.sampler.SubsetRandomSampler(
+                    split_info.train),
+                **loader_kwargs)
+            ValLoaders['x-valid'] = torch.utils.data.DataLoader(
+                train_data_v2,
+                sampler=torch.utils.data.sampler.SubsetRandomSampler(
+                    split_info.valid),
+                **loader_kwargs)
+        else:
+            train_loader = torch.utils.data.DataLoader(train_data,
+                                                       shuffle=True,
+                                                       **loader_kwargs)
+            if split_info is not None:
+                for key, indexes in (('x-valid', split_info.xvalid),
+                                     ('x-test', split_info.xtest)):
+                    ValLoaders[key] = torch.utils.data.DataLoader(
+                        valid_data,
+                        sampler=torch.utils.data.sampler.SubsetRandomSampler(
+                            indexes),
+                        **loader_kwargs)
+        dataset_key = '{:}'.format(dataset)
+        if bool(split): dataset_key = dataset_key + '-valid'
+        logger.log(
+            'Evaluate ||||||| {:10s} ||||||| Train-Num={:}, Valid-Num={:}, Train-Loader-Num={:}, Valid-Loader-Num={:}, batch size={:}'
+            .format(dataset_key, len(train_data), len(valid_data),
+                    len(train_loader), len(ValLoaders['ori-test']),
+                    config.batch_size))
+        logger.log('Evaluate ||||||| {:10s} ||||||| Config={:}'.format(
+            dataset_key, config))
+        for key, value in ValLoaders.items():
+            logger.log('Evaluate ---->>>> {:10s} with {:} batchs'.format(
+                key, len(value)))
+        all_loaders.append((dataset_key, config, train_loader, ValLoaders))
+    return all_loaders
+
+
+def evaluate_all_datasets(arch, all_loaders, seed, arch_config, logger,
+                          device):
+    machine_info, arch_config = get_machine_info(), deepcopy(arch_config)
+    all_infos = {'info': machine_info}
+    all_dataset_keys = []
+    for dataset_key, config, train_loader, ValLoaders in all_loaders:
+        results = evaluate_for_seed(arch_config, config, arch, train_loader,
+                                    ValLoaders, seed, logger, device)
+        all_infos[dataset_key] = results
+        all_dataset_keys.append(dataset_key)
+    all_infos['all_dataset_keys'] = all_dataset_keys
+    all_infos['seed'] = seed
+    return all_infos
+
+
+# the checkpoint is written into a temporary file at first, so that an interrupted run never leaves a broken checkpoint
+def save_atomically(results, save_path):
+    tmp_path = save_path.with_name(save_path.name + '.tmp')
+    torch.save(results, tmp_path)
+    os.replace(tmp_path, save_path)
+
+
+def init_worker(xargs, ranks=None):
+    rank = 0 if ranks is None else ranks.get()
+    torch.set_num_threads(xargs['num_threads'])
+    device = get_device(xargs['device'])
+    if device.type == 'cuda' and torch.cuda.device_count() > 1:
+        device = torch.device('cuda', rank % torch.cuda.device_count())
+    # the log of the rank-th worker is saved into sub_dir/workers/seed-{rank}.log
+    logger = Logger(str(xargs['sub_dir'] / 'workers'), rank, False)
+    logger.log('The {:}-th worker (pid={:}) uses {:}'.format(
+        rank, os.getpid(), device))
+    all_loaders = get_dataset_loaders(xargs['datasets'], xargs['xpaths'],
+                                      xargs['splits'], xargs['use_less'],
+                                      xargs['workers'], logger)
+    WORKER.update(xargs=xargs,
+                  rank=rank,
+                  device=device,
+                  logger=logger,
+                  all_loaders=all_loaders)
+
+
+def evaluate_task(task):
+    arch_index, arch_str, seed, to_save_name = task
+    xargs, logger = WORKER['xargs'], WORKER['logger']
+    start_time = time.time()
+    logger.log('{:} Start arch-index={:06d}, seed={:}, arch={:}'.format(
+        time_string(), arch_index, seed, arch_str))
+    results = evaluate_all_datasets(CellStructure.str2structure(arch_str),
+                                    WORKER['all_loaders'], seed,
+                                    xargs['arch_config'], logger,
+                                    WORKER['device'])
+    save_atomically(results, to_save_name)
+    return arch_index, seed, time.time() - start_time, WORKER['rank']
+
+
+def main(save_dir, workers, procs, device, datasets, xpaths, splits, use_less,
+         srange, arch_index, seeds, cover_mode, meta_info, arch_config):
+    assert torch.cuda.is_available() or get_device(
+        device).type == 'cpu', 'CUDA is not available.'
+    torch.backends.cudnn.enabled = True
+    #torch.backends.cudnn.benchmark = True
+    torch.backends.cudnn.deterministic = True
+
+    assert len(srange) == 2 and 0 <= srange[0] <= srange[
+        1], 'invalid srange : {:}'.format(srange)
+    sub_dir = get_sub_dir(save_dir, srange, arch_config['channel'],
+                          arch_config['num_cells'], use_less)
+    sub_dir.mkdir(parents=True, exist_ok=True)
+    logger = Logger(str(sub_dir), 0, False)
+
+    all_archs = meta_info['archs']
+    assert srange[1] < meta_info[
+        'total'], 'invalid range : {:}-{:} vs. {:}'.format(
+            srange[0], srange[1], meta_info['total'])
+    assert len(seeds) > 0, 'invalid seeds : {:}'.format(seeds)
+    if arch_index == -1:
+        to_evaluate_indexes = list(range(srange[0], srange[1] + 1))
+    else:
+        assert srange[0] <= arch_index <= srange[
+            1], 'invalid arch-index : {:} vs. {:}'.format(arch_index, srange)
+        to_evaluate_indexes = [arch_index]
+    logger.log('xargs : seeds      = {:}'.format(seeds))
+    logger.log('xargs : arch_index = {:}'.format(arch_index))
+    logger.log('xargs : cover_mode = {:}'.format(cover_mode))
+    logger.log('xargs : procs      = {:}, device = {:}'.format(procs, device))
+    logger.log('-' * 100)
+    logger.log(
+        'Start evaluating range =: {:06d} vs. {:06d} vs. {:06d} / {:06d} with cover-mode={:}'
+        .format(srange[0], arch_index, srange[1], meta_info['total'],
+                cover_mode))
+    for i, (dataset, xpath, split) in enumerate(zip(datasets, xpaths, splits)):
+        logger.log(
+            '--->>> Evaluate {:}/{:} : dataset={:9s}, path={:}, split={:}'.
+            format(i, len(datasets), dataset, xpath, split))
+    logger.log('--->>> architecture config : {:}'.format(arch_config))
+
+    # each (arch, seed) is one task, the trained ones are skipped unless cover_mode
+    tasks, num_skips = [], 0
+    for index in to_evaluate_indexes:
+        for seed in seeds:
+            to_save_name = get_checkpoint_path(sub_dir, index, seed)
+            if to_save_name.exists() and not cover_mode:
+                num_skips += 1
+                continue
+            tasks.append((index, all_archs[index], seed, to_save_name))
+    logger.log(
+        'There are {:} tasks to evaluate, and {:} tasks are skipped.'.format(
+            len(tasks), num_skips))
+
+    xargs = {
+        'sub_dir': sub_dir,
+        'device': device,
+        'datasets': datasets,
+        'xpaths': xpaths,
+        'splits': splits,
+        'use_less': use_less,
+        'arch_config': arch_config,
+        # the workers of a process pool are daemonic, which can not create the workers of data loaders,
+        # and the CPU threads are shared by all processes
+        'workers': workers if procs <= 1 else 0,
+        'num_threads': max(torch.get_num_threads() // max(procs, 1), 1)
+    }
+    start_time = time.time()
+    if procs <= 1:
+        init_worker(xargs)
+        results = map(evaluate_task, tasks)
+        pool = None
+    else:
+        # spawn does not inherit the CUDA context and the threads of the parent process
+        ctx = mp.get_context('spawn')
+        ranks = ctx.Queue()
+        for rank in range(procs):
+            ranks.put(rank)
+        pool = ctx.Pool(procs,
+                        initializer=init_worker,
+                        initargs=(xargs, ranks))
+        results = pool.imap_unordered(evaluate_task, tasks)
+    try:
+        for i, (index, seed, seconds, rank) in enumerate(results):
+            need_time = 'Time Left: {:}'.format(
+                convert_secs2time((time.time() - start_time) / (i + 1) *
+                                  (len(tasks) - i - 1), True))
+            logger.log(
+                '{:} {:4d}/{:4d} : arch-index={:06d}, seed={:}, cost {:.1f} s on the {:}-th worker, {:}'
+                .format(time_string(), i + 1, len(tasks), index, seed, seconds,
+                        rank, need_time))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    logger.log('{:} finish {:} tasks with {:}.'.format(
+        time_string(), len(tasks),
+        convert_secs2time(time.time() - start_time, True)))
+    logger.close()
+
+
+def train_single_model(save_dir, workers, device, datasets, xpaths, splits,
+                       use_less, seeds, model_str, arch_config):
+    assert torch.cuda.is_available() or get_device(
+        device).type == 'cpu', 'CUDA is not available.'
+    torch.backends.cudnn.enabled = True
+    torch.backends.cudnn.deterministic = True
+
+    save_dir = Path(save_dir) / 'specifics' / '{:}-{:}-{:}-{:}'.format(
+        'LESS' if use_less else 'FULL', model_str, arch_config['channel'],
+        arch_config['num_cells'])
+    logger = Logger(str(save_dir), 0, False)
+    if model_str in CellArchitectures:
+        arch = CellArchitectures[model_str]
+        logger.log(
+            'The model string is found in pre-defined architecture dict : {:}'.
+            format(model_str))
+    else:
+        try:
+            arch = CellStructure.str2structure(model_str)
+        except (AssertionError, ValueError):
+            raise ValueError(
+                'Invalid model string : {:}. It can not be found or parsed.'.
+                format(model_str))
+    assert arch.check_valid_op(get_search_spaces(
+        'cell', 'nas-bench-201')), '{:} has the invalid op.'.format(arch)
+    logger.log('Start train-evaluate {:}'.format(arch.tostr()))
+    logger.log('arch_config : {:}'.format(arch_config))
+
+    device = get_device(device)
+    all_loaders = get_dataset_loaders(datasets, xpaths, splits, use_less,
+                                      workers, logger)
+    start_time, seed_time = time.time(), time.time()
+    for _is, seed in enumerate(seeds):
+        logger.log(
+            '\nThe {:02d}/{:02d}-th seed is {:} ----------------------<.>----------------------'
+            .format(_is, len(seeds), seed))
+        to_save_name = save_dir / 'seed-{:04d}.pth'.format(seed)
+        if to_save_name.exists():
+            logger.log('Find the existing file {:}, directly load!'.format(
+                to_save_name))
+            checkpoint = torch.load(to_save_name)
+        else:
+            logger.log(
+                'Does not find the existing file {:}, train and evaluate!'.
+                format(to_save_name))
+            checkpoint = evaluate_all_datasets(arch, all_loaders, seed,
+                                               arch_config, logger, device)
+            save_atomically(checkpoint, to_save_name)
+        # log information
+        logger.log('{:}'.format(checkpoint['info']))
+        all_dataset_keys = checkpoint['all_dataset_keys']
+        for dataset_key in all_dataset_keys:
+            logger.log('\n{:} dataset : {:} {:}'.format(
+                '-' * 15, dataset_key, '-' * 15))
+            dataset_info = checkpoint[dataset_key]
+            logger.log('Flops = {:} MB, Params = {:} MB'.format(
+                dataset_info['flop'], dataset_info['param']))
+            logger.log('config : {:}'.format(dataset_info['config']))
+            logger.log('Training State (finish) = {:}'.format(
+                dataset_info['finish-train']))
+            last_epoch = dataset_info['total_epoch'] - 1
+            train_acc1es, train_acc5es = dataset_info[
+                'train_acc1es'], dataset_info['train_acc5es']
+            valid_acc1es, valid_acc5es = dataset_info[
+                'valid_acc1es'], dataset_info['valid_acc5es']
+            logger.log(
+                'Last Info : Train = Acc@1 {:.2f}% Acc@5 {:.2f}% Error@1 {:.2f}%, Test = Acc@1 {:.2f}% Acc@5 {:.2f}% Error@1 {:.2f}%'
+                .format(train_acc1es[last_epoch], train_acc5es[last_epoch],
+                        100 - train_acc1es[last_epoch],
+                        valid_acc1es['ori-test@{:}'.format(last_epoch)],
+                        valid_acc5es['ori-test@{:}'.format(last_epoch)],
+                        100 - valid_acc1es['ori-test@{:}'.format(last_epoch)]))
+        # measure elapsed time
+        seed_time = time.time() - start_time
+        start_time = time.time()
+        need_time = 'Time Left: {:}'.format(
+            convert_secs2time(seed_time * (len(seeds) - _is - 1), True))
+        logger.log(
+            '\n<<<***>>> The {:02d}/{:02d}-th seed is {:} <finish> other procedures need {:}'
+            .format(_is, len(seeds), seed, need_time))
+    logger.close()
+
+
+def generate_meta_info(save_dir, max_node, divide=40):
+    aa_nas_bench_ss = get_search_spaces('cell', 'nas-bench-201')
+    archs = CellStructure.gen_all(aa_nas_bench_ss, max_node, False)
+    print('There are {:} archs vs {:}.'.format(
+        len(archs),
+        len(aa_nas_bench_ss)**((max_node - 1) * max_node / 2)))
+
+    random.seed(88)  # please do not change this line for reproducibility
+    random.shuffle(archs)
+    if max_node == 4:  # check the fixed-random shuffle of NAS-Bench-201
+        assert archs[0].tostr(
+        ) == '|avg_pool_3x3~0|+|nor_conv_1x1~0|skip_connect~1|+|nor_conv_1x1~0|skip_connect~1|skip_connect~2|', 'please check the 0-th architecture : {:}'.format(
+            archs[0])
+        assert archs[9].tostr(
+        ) == '|avg_pool_3x3~0|+|none~0|none~1|+|skip_connect~0|none~1|nor_conv_3x3~2|', 'please check the 9-th architecture : {:}'.format(
+            archs[9])
+        assert archs[123].tostr(
+        ) == '|avg_pool_3x3~0|+|avg_pool_3x3~0|nor_conv_1x1~1|+|none~0|avg_pool_3x3~1|nor_conv_3x3~2|', 'please check the 123-th architecture : {:}'.format(
+            archs[123])
+    total_arch = len(archs)
+
+    info = {
+        'archs': [x.tostr() for x in archs],
+        'total': total_arch,
+        'max_node': max_node
+    }
+
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    save_name = save_dir / 'meta-node-{:}.pth'.format(max_node)
+    assert not save_name.exists(), '{:} already exist'.format(save_name)
+    torch.save(info, save_name)
+    print('save the meta file into {:}'.format(save_name))
+
+    script_name_full = save_dir / 'BENCH-201-N{:}.opt-full.script'.format(
+        max_node)
+    script_name_less = save_dir / 'BENCH-201-N{:}.opt-less.script'.format(
+        max_node)
+    full_file = open(str(script_name_full), 'w')
+    less_file = open(str(script_name_less), 'w')
+    gaps = max(total_arch // divide, 1)
+    for start in range(0, total_arch, gaps):
+        xend = min(start + gaps, total_arch)
+        full_file.write(
+            'bash ./scripts-search/NAS-Bench-201/train-models.sh 0 {:5d} {:5d} -1 \'777 888 999\'\n'
+            .format(start, xend - 1))
+        less_file.write(
+            'bash ./scripts-search/NAS-Bench-201/train-models.sh 1 {:5d} {:5d} -1 \'777\'\n'
+            .format(start, xend - 1))
+    print('save the training script into {:} and {:}'.format(
+        script_name_full, script_name_less))
+    full_file.close()
+    less_file.close()
+
+
+# merge the checkpoints of (arch, seed) into an ArchResults
+def account_one_arch(arch_index, arch_str, checkpoints):
+    information = ArchResults(arch_index, arch_str)
+    for checkpoint_path in checkpoints:
+        checkpoint = torch.load(checkpoint_path, map_location='cpu')
+        seed = int(checkpoint['seed'])
+        for dataset_key in checkpoint['all_dataset_keys']:
+            xinfo = checkpoint[dataset_key]
+            arch_config = {
+                'channel': xinfo['channel'],
+                'num_cells': xinfo['num_cells'],
+                'arch_str': arch_str,
+                'class_num': xinfo['config']['class_num']
+            }
+            result = ResultsCount(dataset_key, xinfo['net_state_dict'],
+                                  xinfo['train_acc1es'], xinfo['train_losses'],
+                                  xinfo['param'], xinfo['flop'], arch_config,
+                                  seed, xinfo['total_epoch'], xinfo['latency'])
+            result.update_train_info(xinfo['train_acc1es'],
+                                     xinfo['train_acc5es'],
+                                     xinfo['train_losses'],
+                                     xinfo['train_times'])
+            result.update_eval(xinfo['valid_acc1es'], xinfo['valid_losses'],
+                               xinfo['valid_times'])
+            information.update(dataset_key, seed, result)
+    return information
+
+
+# collect the checkpoints of all sub-directories with the same channel and num_cells into
+#   save_dir/NAS-Bench-201-C{channel}-N{num_cells}.pth, which can be loaded by `API(path)`
+def merge_all(save_dir, max_node, channel, num_cells, clear_weights):
+    save_dir = Path(save_dir)
+    meta_info = torch.load(save_dir / 'meta-node-{:}.pth'.format(max_node))
+    all_archs = meta_info['archs']
+    all_checkpoints = {'less': OrderedDict(), 'full': OrderedDict()}
+    suffix = '-C{:}-N{:}'.format(channel, num_cells)
+    for sub_dir in sorted(save_dir.iterdir()):
+        if not sub_dir.is_dir(): continue
+        if sub_dir.name.endswith(suffix): hp = 'full'
+        elif sub_dir.name.endswith(suffix + '-LESS'): hp = 'less'
+        else: continue
+        for checkpoint_path in sorted(sub_dir.glob('arch-*-seed-*.pth')):
+            _, arch_index, _, seed = checkpoint_path.stem.split('-')
+            xkey = (int(arch_index), int(seed))
+            if xkey in all_checkpoints[hp]:
+                print(
+                    '{:} find the duplicate checkpoint of {:} : {:}, use the later one.'
+                    .format(time_string(), xkey, checkpoint_path))
+            all_checkpoints[hp][xkey] = checkpoint_path
+    arch2infos, evaluated_indexes = dict(), set()
+    for hp, checkpoints in all_checkpoints.items():
+        print('{:} find {:} checkpoints of {:}.'.format(
+            time_string(), len(checkpoints), hp))
+        arch2checkpoints = dict()
+        for (arch_index, seed), checkpoint_path in sorted(checkpoints.items()):
+            arch2checkpoints.setdefault(arch_index, []).append(checkpoint_path)
+        for arch_index, xcheckpoints in arch2checkpoints.items():
+            information = account_one_arch(arch_index, all_archs[arch_index],
+                                           xcheckpoints)
+            if clear_weights: information.clear_params()
+            arch2infos.setdefault(arch_index, dict())[hp] = information
+            if hp == 'full': evaluated_indexes.add(arch_index)
+    for arch_index, infos in arch2infos.items():
+        for hp in ('less', 'full'):
+            if hp not in infos:
+                infos[hp] = ArchResults(arch_index, all_archs[arch_index])
+            infos[hp] = infos[hp].state_dict()
+    final_infos = {
+        'meta_archs': all_archs,
+        'arch2infos': arch2infos,
+        'evaluated_indexes': sorted(list(evaluated_indexes))
+    }
+    save_path = save_dir / 'NAS-Bench-201-C{:}-N{:}.pth'.format(
+        channel, num_cells)
+    save_atomically(final_infos, save_path)
+    print('{:} save {:} architectures ({:} fully evaluated) into {:}'.format(
+        time_string(), len(arch2infos), len(evaluated_indexes), save_path))
+    api = API(str(save_path), verbose=False)
+    print('{:} check the merged file : {:}'.format(time_string(), api))
+    return save_path
+
+
+if __name__ == '__main__':
+    #mode_choices = ['meta', 'new', 'cover', 'merge'] + ['specific-{:}'.format(_) for _ in CellArchitectures.keys()]
+    parser = argparse.ArgumentParser(
+        description='NAS-Bench-201',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('--mode',
+                        type=str,
+                        required=True,
+                        help='The script mode.')
+    parser.add_argument('--save_dir',
+                        type=str,
+                        help='Folder to save checkpoints and log.')
+    parser.add_argument('--max_node',
+                        type=int,
+                        help='The maximum node in a cell.')
+    # use for train the model
+    parser.add_argument('--workers',
+                        type=int,
+                        default=8,
+                        help='number of data loading workers (default: 2)')
+    parser.add_argument(
+        '--procs',
+        type=int,
+        default=1,
+        help='The number of processes to train the architectures in parallel.')
+    parser.add_argument('--device',
+                        type=str,
+                        default='auto',
+                        help='The device (auto, cpu, or cuda) to train.')
+    parser.add_argument('--srange',
+                        type=int,
+                        nargs='+',
+                        help='The range of models to be evaluated')
+    parser.add_argument(
+        '--arch_index',
+        type=int,
+        default=-1,
+        help='The architecture index to be evaluated (cover mode).')
+    parser.add_argument('--datasets',
+                        type=str,
+                        nargs='+',
+                        help='The applied datasets.')
+    parser.add_argument('--xpaths',
+                        type=str,
+                        nargs='+',
+                        help='The root path for this dataset.')
+    parser.add_argument('--splits',
+                        type=int,
+                        nargs='+',
+                        help='The root path for this dataset.')
+    parser.add_argument('--use_less',
+                        type=int,
+                        default=0,
+                        choices=[0, 1],
+                        help='Using the less-training-epoch config.')
+    parser.add_argument('--seeds',
+                        type=int,
+                        nargs='+',
+                        help='The range of models to be evaluated')
+    parser.add_argument('--channel', type=int, help='The number of channels.')
+    parser.add_argument('--num_cells',
+                        type=int,
+                        help='The number of cells in one stage.')
+    parser.add_argument('--clear_weights',
+                        type=int,
+                        default=0,
+                        choices=[0, 1],
+                        help='Remove the trained weights in the merged file.')
+    args = parser.parse_args()
+
+    assert args.mode in [
+        'meta', 'new', 'cover', 'merge'
+    ] or args.mode.startswith('specific-'), 'invalid mode : {:}'.format(
+        args.mode)
+
+    if args.mode == 'meta':
+        generate_meta_info(args.save_dir, args.max_node)
+    elif args.mode == 'merge':
+        merge_all(args.save_dir, args.max_node, args.channel, args.num_cells,
+                  args.clear_weights)
+    elif args.mode.startswith('specific'):
+        assert len(args.mode.split('-')) == 2, 'invalid mode : {:}'.format(
+            args.mode)
+        model_str = args.mode.split('-')[1]
+        train_single_model(args.save_dir, args.workers, args.device,
+                           args.datasets, args.xpaths, args.splits,
+                           args.use_less > 0, tuple(args.seeds), model_str, {
+                               'channel': args.channel,
+                               'num_cells': args.num_cells
+                           })
+    else:
+        meta_path = Path(args.save_dir) / 'meta-node-{:}.pth'.format(
+            args.max_node)
+        assert meta_path.exists(), '{:} does not exist.'.format(meta_path)
+        meta_info = torch.load(meta_path)
+        # check whether args is ok
+        assert len(args.srange) == 2 and args.srange[0] <= args.srange[
+            1], 'invalid length of srange args: {:}'.format(args.srange)
+        assert len(args.seeds) > 0, 'invalid length of seeds args: {:}'.format(
+            args.seeds)
+        assert len(args.datasets) == len(args.xpaths) == len(
+            args.splits), 'invalid infos : {:} vs {:} vs {:}'.format(
+                len(args.datasets), len(args.xpaths), len(args.splits))
+        assert args.workers >= 0, 'invalid number of workers : {:}'.format(
+            args.workers)
+
+        main(args.save_dir, args.workers, args.procs, args.device,
+             args.datasets, args.xpaths, args.splits, args.use_less > 0,
+             tuple(args.srange), args.arch_index, tuple(args.seeds),
+             args.mode == 'cover', meta_info, {
+                 'channel': args.channel,
+                 'num_cells': args.num_cells
+             })
@@ -0,0 +1,69 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# Load NAS-Bench-201 once and serve the queries of many search processes, which use `BenchmarkClient(address)` as the API.
+# The random authkey of the server is saved in --authkey_file (only readable by the user), which is then read by the clients.
+# python exps/NAS-Bench-201/server.py --api_path $TORCH_HOME/NAS-Bench-201-v1_0-e61699.pth --address localhost:6201 --authkey_file ~/.nas-bench-201.key
+# python exps/NAS-Bench-201/server.py --api_path $TORCH_HOME/NAS-Bench-201-v1_0-e61699 --address /tmp/nas-bench-201.sock --authkey_file ~/.nas-bench-201.key
+##################################################
+import argparse
+import sys
+import time
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / '..' / '..' / 'lib').resolve()
+if str(lib_dir) not in sys.path: sys.path.insert(0, str(lib_dir))
+from log_utils import time_string
+from nas_201_api import BenchmarkServer, write_authkey
+from nas_201_api import NASBench201API as API
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        'The local query server of NAS-Bench-201',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        '--api_path',
+        type=str,
+        help='The path to the benchmark file or columnar directory.')
+    parser.add_argument(
+        '--address',
+        type=str,
+        default='localhost:6201',
+        help='The host:port of a TCP socket or the path of a Unix socket.')
+    parser.add_argument(
+        '--authkey_file',
+        type=str,
+        default=None,
+        help='The file to save the authkey of the clients (print it if None).')
+    parser.add_argument('--allow_remote',
+                        type=int,
+                        default=0,
+                        help='Serve a non-loopback host:port or not.')
+    parser.add_argument(
+        '--query_cache_size',
+        type=int,
+        default=100000,
+        help='The max number of memoized query results (0 to disable).')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    api = API(args.api_path)
+    if args.query_cache_size > 0: api.enable_query_cache(args.query_cache_size)
+    server = BenchmarkServer(api,
+                             args.address,
+                             allow_remote=args.allow_remote > 0)
+    print('{:} create the API from {:} with {:.1f} s, serve at {:}'.format(
+        time_string(), args.api_path,
+        time.time() - start_time, server.address))
+    if args.authkey_file is not None:
+        write_authkey(args.authkey_file, server.authkey)
+        print('{:} save the authkey into {:}'.format(time_string(),
+                                                     args.authkey_file))
+    else:
+        print('{:} the authkey is {:}'.format(time_string(),
+                                              server.authkey.hex()))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('{:} stop {:}, {:}'.format(time_string(), server,
+                                         api.query_cache))
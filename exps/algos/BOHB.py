@@ -22,14 +22,17 @@ lib_dir = (Path(__file__).parent / '..' / '..' / 'lib').resolve()
 if str(lib_dir) not in sys.path: sys.path.insert(0, str(lib_dir))
 # BOHB: Robust and Efficient Hyperparameter Optimization at Scale, ICML 2018
 import ConfigSpace
-import hpbandster.core.nameserver as hpns
 from config_utils import configure2str, dict2config, load_config
 from datasets import SearchDataset, get_datasets
-from hpbandster.core.worker import Worker
-from hpbandster.optimizers.bohb import BOHB
+from hpbandster.core.dispatcher import Job
+from hpbandster.core.result import Result
+from hpbandster.optimizers.config_generators.bohb import BOHB as CG_BOHB
+from hpbandster.optimizers.iterations import SuccessiveHalving
 from log_utils import AverageMeter, convert_secs2time, time_string
 from models import CellStructure, get_search_spaces
+from nas_201_api import BenchmarkClient, read_authkey
 from nas_201_api import NASBench201API as API
+from nas_201_api import ParallelSimulator
 from procedures import (copy_checkpoint, get_optim_scheduler, prepare_logger,
                         prepare_seed, save_checkpoint)
 from utils import get_model_infos, obtain_accuracy
@@ -61,69 +64,81 @@ def config2structure_func(max_nodes):
     return config2structure
 
 
-class MyWorker(Worker):
+# The BOHB of hpbandster as a searcher of ParallelSimulator (ask/tell), i.e., the iterations of successive halving as
+# Master.run of hpbandster, whose configurations are sampled by the KDE model of BOHB, and the next rung of an iteration
+# waits for all results of the current rung (ask returns None), where the jobs of the same arch are told in order.
+class BOHBSearcher(object):
     def __init__(self,
-                 *args,
-                 convert_func=None,
-                 nas_bench=None,
-                 time_budget=None,
+                 configspace,
+                 config2index,
+                 n_iters,
+                 eta=3,
+                 min_budget=12,
+                 max_budget=200,
                  **kwargs):
-        super().__init__(*args, **kwargs)
-        self.convert_func = convert_func
-        self.nas_bench = nas_bench
-        self.time_budget = time_budget
-        self.seen_archs = []
-        self.sim_cost_time = 0
-        self.real_cost_time = 0
-        self.is_end = False
+        self.config_generator = CG_BOHB(configspace=configspace, **kwargs)
+        self.config2index = config2index
+        self.n_iters = n_iters
+        self.eta = eta
+        self.max_SH_iter = -int(
+            np.log(min_budget / max_budget) / np.log(eta)) + 1
+        self.budgets = max_budget * np.power(
+            eta, -np.linspace(self.max_SH_iter - 1, 0, self.max_SH_iter))
+        # the config of hpbandster.core.result.Result, the jobs have no real time stamps
+        self.config = {
+            'eta': eta,
+            'min_budget': min_budget,
+            'max_budget': max_budget,
+            'budgets': self.budgets,
+            'max_SH_iter': self.max_SH_iter,
+            'time_ref': 0
+        }
+        self.iterations = []
+        # arch-index -> the running jobs in the order of their starts
+        self.jobs = collections.defaultdict(collections.deque)
+
+    # the same bracket as BOHB.get_next_iteration of hpbandster
+    def get_next_iteration(self, iteration):
+        s = self.max_SH_iter - 1 - (iteration % self.max_SH_iter)
+        n0 = int(np.floor((self.max_SH_iter) / (s + 1)) * self.eta**s)
+        ns = [max(int(n0 * (self.eta**(-i))), 1) for i in range(s + 1)]
+        return SuccessiveHalving(
+            HPB_iter=iteration,
+            num_configs=ns,
+            budgets=self.budgets[(-s - 1):],
+            config_sampler=self.config_generator.get_config)
 
-    def get_the_best(self):
-        assert len(self.seen_archs) > 0
-        best_index, best_acc = -1, None
-        for arch_index in self.seen_archs:
-            info = self.nas_bench.get_more_info(arch_index, 'cifar10-valid',
-                                                None, True)
-            vacc = info['valid-accuracy']
-            if best_acc is None or best_acc < vacc:
-                best_acc = vacc
-                best_index = arch_index
-        assert best_index != -1
-        return best_index
+    def ask(self):
+        while True:
+            for iteration in self.iterations:
+                next_run = iteration.get_next_run()
+                if next_run is None: continue
+                config_id, config, budget = next_run
+                index = self.config2index(config)
+                self.jobs[index].append(
+                    Job(config_id, config=config, budget=budget))
+                return index
+            # start the next iteration if all the active ones wait for their running jobs
+            if len(self.iterations) >= self.n_iters: return None
+            self.iterations.append(
+                self.get_next_iteration(len(self.iterations)))
 
-    def compute(self, config, budget, **kwargs):
-        start_time = time.time()
-        structure = self.convert_func(config)
-        arch_index = self.nas_bench.query_index_by_arch(structure)
-        info = self.nas_bench.get_more_info(arch_index, 'cifar10-valid', None,
-                                            True)
-        cur_time = info['train-all-time'] + info['valid-per-time']
-        cur_vacc = info['valid-accuracy']
-        self.real_cost_time += (time.time() - start_time)
-        if self.sim_cost_time + cur_time <= self.time_budget and not self.is_end:
-            self.sim_cost_time += cur_time
-            self.seen_archs.append(arch_index)
-            return ({
-                'loss': 100 - float(cur_vacc),
-                'info': {
-                    'seen-arch': len(self.seen_archs),
-                    'sim-test-time': self.sim_cost_time,
-                    'current-arch': arch_index
-                }
-            })
-        else:
-            self.is_end = True
-            return ({
-                'loss': 100,
-                'info': {
-                    'seen-arch': len(self.seen_archs),
-                    'sim-test-time': self.sim_cost_time,
-                    'current-arch': None
-                }
-            })
+    def tell(self, index, accuracy):
+        job = self.jobs[index].popleft()
+        job.result = {
+            'loss': 100 - float(accuracy),
+            'info': {
+                'current-arch': index
+            }
+        }
+        self.iterations[job.id[0]].register_result(job)
+        self.config_generator.new_result(job)
 
 
 def main(xargs, nas_bench):
-    assert torch.cuda.is_available(), 'CUDA is not available.'
+    # the GPU is only used to train the searched models, i.e., data_path is not None
+    assert xargs.data_path is None or torch.cuda.is_available(
+    ), 'CUDA is not available.'
     torch.backends.cudnn.enabled = True
     torch.backends.cudnn.benchmark = False
     torch.backends.cudnn.deterministic = True
@@ -186,51 +201,37 @@ def main(xargs, nas_bench):
         }
 
     # nas dataset load
-    assert xargs.arch_nas_dataset is not None and os.path.isfile(
-        xargs.arch_nas_dataset)
+    assert nas_bench is not None, 'BOHB requires arch_nas_dataset or arch_nas_server'
     search_space = get_search_spaces('cell', xargs.search_space_name)
     cs = get_configuration_space(xargs.max_nodes, search_space)
 
     config2structure = config2structure_func(xargs.max_nodes)
-    hb_run_id = '0'
 
-    NS = hpns.NameServer(run_id=hb_run_id, host='localhost', port=0)
-    ns_host, ns_port = NS.start()
-    num_workers = 1
+    # the workers are simulated by the discrete-event simulation, where an evaluation costs the training time of the arch
+    def evaluate(arch_index):
+        info = nas_bench.get_more_info(arch_index, 'cifar10-valid', None, True)
+        cost = info['train-all-time'] + info['valid-per-time']
+        return info['valid-accuracy'], cost
 
-    #nas_bench = AANASBenchAPI(xargs.arch_nas_dataset)
-    #logger.log('{:} Create NAS-BENCH-API DONE'.format(time_string()))
-    workers = []
-    for i in range(num_workers):
-        w = MyWorker(nameserver=ns_host,
-                     nameserver_port=ns_port,
-                     convert_func=config2structure,
-                     nas_bench=nas_bench,
-                     time_budget=xargs.time_budget,
-                     run_id=hb_run_id,
-                     id=i)
-        w.run(background=True)
-        workers.append(w)
+    searcher = BOHBSearcher(
+        cs,
+        lambda config: nas_bench.query_index_by_arch(config2structure(config)),
+        xargs.n_iters,
+        eta=3,
+        min_budget=12,
+        max_budget=200,
+        num_samples=xargs.num_samples,
+        random_fraction=xargs.random_fraction,
+        bandwidth_factor=xargs.bandwidth_factor,
+        min_bandwidth=xargs.min_bandwidth)
+    simulator = ParallelSimulator(evaluate, xargs.num_workers,
+                                  xargs.time_budget)
+    logger.log('{:} start {:}'.format(time_string(), simulator))
 
     start_time = time.time()
-    bohb = BOHB(configspace=cs,
-                run_id=hb_run_id,
-                eta=3,
-                min_budget=12,
-                max_budget=200,
-                nameserver=ns_host,
-                nameserver_port=ns_port,
-                num_samples=xargs.num_samples,
-                random_fraction=xargs.random_fraction,
-                bandwidth_factor=xargs.bandwidth_factor,
-                ping_interval=10,
-                min_bandwidth=xargs.min_bandwidth)
-
-    results = bohb.run(xargs.n_iters, min_n_workers=num_workers)
-
-    bohb.shutdown(shutdown_workers=True)
-    NS.shutdown()
-
+    sim_results = simulator.run(searcher)
+    results = Result([deepcopy(x.data) for x in searcher.iterations],
+                     searcher.config)
     real_cost_time = time.time() - start_time
 
     id2config = results.get_id2config_mapping()
@@ -246,8 +247,12 @@ def main(xargs, nas_bench):
         logger.log('{:}'.format(info))
     logger.log('-' * 100)
 
-    logger.log('workers : {:.1f}s with {:} archs'.format(
-        workers[0].time_budget, len(workers[0].seen_archs)))
+    finish_times = sim_results['finish-times']
+    logger.log(
+        'workers : {:.1f}s with {:} archs, the simulated time of {:} workers is {:.1f}s (utilization={:.2f})'
+        .format(xargs.time_budget, len(finish_times), xargs.num_workers,
+                finish_times[-1] if len(finish_times) > 0 else 0,
+                sim_results['utilization']))
     logger.close()
     return logger.log_dir, nas_bench.query_index_by_arch(
         best_arch), real_cost_time
@@ -307,6 +312,11 @@ if __name__ == '__main__':
                         type=int,
                         nargs='?',
                         help='number of iterations for optimization method')
+    parser.add_argument(
+        '--num_workers',
+        default=1,
+        type=int,
+        help='The number of simulated workers to evaluate the configurations.')
     # log
     parser.add_argument('--workers',
                         type=int,
@@ -319,19 +329,35 @@ if __name__ == '__main__':
         '--arch_nas_dataset',
         type=str,
         help='The path to load the architecture dataset (tiny-nas-benchmark).')
+    parser.add_argument(
+        '--arch_nas_server',
+        type=str,
+        default=None,
+        help='The address of the query server (NAS-Bench-201/server.py).')
+    parser.add_argument(
+        '--arch_nas_authkey',
+        type=str,
+        default=None,
+        help='The authkey file of the query server (--authkey_file).')
     parser.add_argument('--print_freq',
                         type=int,
                         help='print frequency (default: 200)')
     parser.add_argument('--rand_seed', type=int, help='manual seed')
     args = parser.parse_args()
     #if args.rand_seed is None or args.rand_seed < 0: args.rand_seed = random.randint(1, 100000)
-    if args.arch_nas_dataset is None or not os.path.isfile(
+    if args.arch_nas_server is not None:
+        print('{:} connect to NAS-Benchmark-API server at {:}'.format(
+            time_string(), args.arch_nas_server))
+        nas_bench = BenchmarkClient(args.arch_nas_server,
+                                    read_authkey(args.arch_nas_authkey))
+    elif args.arch_nas_dataset is None or not os.path.isfile(
             args.arch_nas_dataset):
         nas_bench = None
     else:
         print('{:} build NAS-Benchmark-API from {:}'.format(
             time_string(), args.arch_nas_dataset))
         nas_bench = API(args.arch_nas_dataset)
+        nas_bench.enable_query_cache()
     if args.rand_seed < 0:
         save_dir, all_indexes, num, all_times = None, [], 500, []
         for i in range(num):
@@ -21,6 +21,7 @@ from config_utils import configure2str, dict2config, load_config
 from datasets import SearchDataset, get_datasets
 from log_utils import AverageMeter, convert_secs2time, time_string
 from models import get_search_spaces, get_sub_search_spaces
+from nas_201_api import BenchmarkClient, read_authkey
 from nas_201_api import NASBench201API as API
 from procedures import (copy_checkpoint, get_optim_scheduler, prepare_logger,
                         prepare_seed, save_checkpoint)
@@ -29,7 +30,9 @@ from utils import get_model_infos, obtain_accuracy
 
 
 def main(xargs, nas_bench):
-    assert torch.cuda.is_available(), 'CUDA is not available.'
+    # the GPU is only used to train the searched models, i.e., data_path is not None
+    assert xargs.data_path is None or torch.cuda.is_available(
+    ), 'CUDA is not available.'
     torch.backends.cudnn.enabled = True
     torch.backends.cudnn.benchmark = False
     torch.backends.cudnn.deterministic = True
@@ -160,19 +163,35 @@ if __name__ == '__main__':
         '--arch_nas_dataset',
         type=str,
         help='The path to load the architecture dataset (tiny-nas-benchmark).')
+    parser.add_argument(
+        '--arch_nas_server',
+        type=str,
+        default=None,
+        help='The address of the query server (NAS-Bench-201/server.py).')
+    parser.add_argument(
+        '--arch_nas_authkey',
+        type=str,
+        default=None,
+        help='The authkey file of the query server (--authkey_file).')
     parser.add_argument('--print_freq',
                         type=int,
                         help='print frequency (default: 200)')
     parser.add_argument('--rand_seed', type=int, help='manual seed')
     args = parser.parse_args()
     #if args.rand_seed is None or args.rand_seed < 0: args.rand_seed = random.randint(1, 100000)
-    if args.arch_nas_dataset is None or not os.path.isfile(
+    if args.arch_nas_server is not None:
+        print('{:} connect to NAS-Benchmark-API server at {:}'.format(
+            time_string(), args.arch_nas_server))
+        nas_bench = BenchmarkClient(args.arch_nas_server,
+                                    read_authkey(args.arch_nas_authkey))
+    elif args.arch_nas_dataset is None or not os.path.isfile(
             args.arch_nas_dataset):
         nas_bench = None
     else:
         print('{:} build NAS-Benchmark-API from {:}'.format(
             time_string(), args.arch_nas_dataset))
         nas_bench = API(args.arch_nas_dataset)
+        nas_bench.enable_query_cache()
     if args.rand_seed < 0:
         save_dir, all_indexes, num = None, [], 500
         for i in range(num):
@@ -23,6 +23,7 @@ from config_utils import configure2str, dict2config, load_config
 from datasets import SearchDataset, get_datasets
 from log_utils import AverageMeter, convert_secs2time, time_string
 from models import CellStructure, get_search_spaces
+from nas_201_api import BatchedEvolution, BenchmarkClient, read_authkey
 from nas_201_api import NASBench201API as API
 from procedures import (copy_checkpoint, get_optim_scheduler, prepare_logger,
                         prepare_seed, save_checkpoint)
@@ -180,7 +181,9 @@ def regularized_evolution(cycles, population_size, sample_size, time_budget,
 
 
 def main(xargs, nas_bench):
-    assert torch.cuda.is_available(), 'CUDA is not available.'
+    # the GPU is only used to train the searched models, i.e., data_path is not None
+    assert xargs.data_path is None or torch.cuda.is_available(
+    ), 'CUDA is not available.'
     torch.backends.cudnn.enabled = True
     torch.backends.cudnn.benchmark = False
     torch.backends.cudnn.deterministic = True
@@ -273,6 +276,48 @@ def main(xargs, nas_bench):
     return logger.log_dir, nas_bench.query_index_by_arch(best_arch)
 
 
+# run `num_trials` trials of `main` with ea_fast_by_api in lock-step, where the architectures are arch-indexes and
+# each cycle of all trials is one batched lookup of the benchmark, and return the best arch-index of every trial
+def batched_main(xargs, nas_bench, num_trials):
+    prepare_seed(xargs.rand_seed)
+    logger = prepare_logger(args)
+    search_space = get_search_spaces('cell', xargs.search_space_name)
+    encoder = nas_bench.get_arch_encoder()
+    assert len(search_space)**6 == len(
+        encoder), 'the search space {:} does not match the benchmark'.format(
+            search_space)
+    rng = np.random.default_rng(xargs.rand_seed)
+
+    def evaluate(indexes):
+        info = nas_bench.sample_more_info(indexes, 'cifar10-valid', None, True,
+                                          rng)
+        time_costs = info['train-all-time'] + info['valid-per-time']
+        return info['valid-accuracy'], time_costs
+
+    evolution = BatchedEvolution(encoder, evaluate, num_trials,
+                                 xargs.ea_population, xargs.ea_sample_size,
+                                 xargs.time_budget, rng)
+    x_start_time = time.time()
+    logger.log('{:} use nas_bench : {:}'.format(time_string(), nas_bench))
+    logger.log('-' * 30 + ' start {:} with the time budget of {:} s'.format(
+        evolution, xargs.time_budget))
+    results = evolution.run()
+    logger.log(
+        '{:} batched regularized_evolution finish with history of {:.1f} arch on average with {:.1f} s (real-cost={:.2f} s).'
+        .format(time_string(), results['lengths'].mean(),
+                results['total-costs'].mean(),
+                time.time() - x_start_time))
+    best_indexes = results['best-indexes'].tolist()
+    _, test_accs = nas_bench.get_batch_metrics(best_indexes, 'cifar10',
+                                               'ori-test')
+    logger.log(
+        '{:} the test accuracy of the best archs : {:.2f} +- {:.2f}'.format(
+            time_string(), np.mean(test_accs), np.std(test_accs)))
+    logger.log('-' * 100)
+    logger.close()
+    return logger.log_dir, best_indexes
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser('Regularized Evolution Algorithm')
     parser.add_argument('--data_path', type=str, help='Path to dataset')
@@ -303,6 +348,12 @@ if __name__ == '__main__':
     parser.add_argument('--ea_fast_by_api',
                         type=int,
                         help='Use our API to speed up the experiments or not.')
+    parser.add_argument(
+        '--ea_lockstep',
+        type=int,
+        default=0,
+        help=('Run all trials (rand_seed < 0) in lock-step with the batched'
+              ' benchmark lookups or not (requires ea_fast_by_api).'))
     parser.add_argument(
         '--time_budget',
         type=int,
@@ -319,6 +370,16 @@ if __name__ == '__main__':
         '--arch_nas_dataset',
         type=str,
         help='The path to load the architecture dataset (tiny-nas-benchmark).')
+    parser.add_argument(
+        '--arch_nas_server',
+        type=str,
+        default=None,
+        help='The address of the query server (NAS-Bench-201/server.py).')
+    parser.add_argument(
+        '--arch_nas_authkey',
+        type=str,
+        default=None,
+        help='The authkey file of the query server (--authkey_file).')
     parser.add_argument('--print_freq',
                         type=int,
                         help='print frequency (default: 200)')
@@ -330,14 +391,25 @@ if __name__ == '__main__':
     #if args.rand_seed is None or args.rand_seed < 0: args.rand_seed = random.randint(1, 100000)
     args.ea_fast_by_api = args.ea_fast_by_api > 0
 
-    if args.arch_nas_dataset is None or not os.path.isfile(
+    if args.arch_nas_server is not None:
+        print('{:} connect to NAS-Benchmark-API server at {:}'.format(
+            time_string(), args.arch_nas_server))
+        nas_bench = BenchmarkClient(args.arch_nas_server,
+                                    read_authkey(args.arch_nas_authkey))
+    elif args.arch_nas_dataset is None or not os.path.isfile(
             args.arch_nas_dataset):
         nas_bench = None
     else:
         print('{:} build NAS-Benchmark-API from {:}'.format(
             time_string(), args.arch_nas_dataset))
         nas_bench = API(args.arch_nas_dataset)
-    if args.rand_seed < 0:
+        nas_bench.enable_query_cache()
+    if args.rand_seed < 0 and args.ea_lockstep > 0:
+        assert args.ea_fast_by_api and nas_bench is not None, 'ea_lockstep requires ea_fast_by_api and the benchmark'
+        args.rand_seed = random.randint(1, 100000)
+        save_dir, all_indexes = batched_main(args, nas_bench, 500)
+        torch.save(all_indexes, save_dir / 'results.pth')
+    elif args.rand_seed < 0:
         save_dir, all_indexes, num = None, [], 500
         for i in range(num):
             print('{:} : {:03d}/{:03d}'.format(time_string(), i, num))
@@ -0,0 +1,337 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The multi-fidelity searching on NAS-Bench-201 without hpbandster, where the fidelity is the number of training epochs
+# of the 12-epoch (or 200-epoch) results, and the rungs of a bracket are max_epochs * eta^(i - s) epochs, i = 0, ..., s.
+#   SH   : successive halving, i.e., the most aggressive bracket of Hyperband, which is repeated until the time budget
+#   HB   : Hyperband, i.e., the brackets from the most aggressive one to the full-fidelity random search in turn
+#   ASHA : asynchronous successive halving with one worker, which promotes an arch once it is in the top 1/eta of its rung,
+#          and otherwise samples a new arch at the lowest rung
+# Each arch is one trial (seed) of the benchmark, which is continued when it is promoted, i.e., the promotion from e0 to
+# e1 epochs costs the training time of the epochs (e0, e1] and the evaluation time at the e1-th epoch.
+#
+import argparse
+import bisect
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+lib_dir = (Path(__file__).parent / '..' / '..' / 'lib').resolve()
+if str(lib_dir) not in sys.path: sys.path.insert(0, str(lib_dir))
+from log_utils import time_string
+from nas_201_api import NASBench201API as API
+from procedures import prepare_logger, prepare_seed
+
+
+# the per-epoch results of a (dataset, eval-set) in the benchmark, where the candidate archs have the results of all trials
+class EpochBenchmark(object):
+    def __init__(self,
+                 nas_bench,
+                 dataset,
+                 setname,
+                 use_12epochs_result=True,
+                 rng=None):
+        self.store = nas_bench.get_metric_store(use_12epochs_result)
+        self.dataset = dataset
+        self.setname = setname
+        self.rng = np.random if rng is None else rng
+        self.candidates = np.nonzero(
+            self.store.get_seed_masks(dataset, setname))[0]
+        assert len(
+            self.candidates) > 0, 'there is no {:} result on {:}'.format(
+                setname, dataset)
+        idata = self.store.get_dataset_index(dataset)
+        masks = self.store.trial_masks[self.candidates, idata]
+        epochs = self.store.epochs[self.candidates, idata]
+        self.max_epochs = int(epochs[masks].min())
+
+    def __repr__(self):
+        return ('{name}({dataset}@{setname}, {num} archs, {max_epochs} epochs)'
+                .format(name=self.__class__.__name__,
+                        num=len(self.candidates),
+                        **self.__dict__))
+
+    # `num` random archs and the trial of each arch
+    def sample(self, num):
+        indexes = self.candidates[(self.rng.random(num) *
+                                   len(self.candidates)).astype(np.int64)]
+        iseeds = self.store.sample_trials(indexes, self.dataset, self.setname,
+                                          self.rng)
+        return indexes, iseeds
+
+    # the accuracies after `epochs` and the costs of the training from `start_epochs` (0 for the new archs)
+    def evaluate(self, indexes, iseeds, epochs, start_epochs=0):
+        trains = self.store.get_trial_metrics(indexes, iseeds, self.dataset,
+                                              'train', epochs - 1)
+        valids = self.store.get_trial_metrics(indexes, iseeds, self.dataset,
+                                              self.setname, epochs - 1)
+        costs = trains['all_time'] + valids['cur_time']
+        if np.any(start_epochs > 0):
+            starts = self.store.get_trial_metrics(
+                indexes, iseeds, self.dataset, 'train',
+                np.maximum(start_epochs, 1) - 1)
+            costs -= np.where(start_epochs > 0, starts['all_time'], 0)
+        return valids['accuracy'], costs
+
+
+class MultiFidelitySearch(object):
+    def __init__(self, benchmark, min_epochs, max_epochs, eta, time_budget):
+        assert eta > 1, 'invalid eta : {:}'.format(eta)
+        assert 0 < min_epochs <= max_epochs <= benchmark.max_epochs, 'invalid epochs : {:} ~ {:} vs. {:}'.format(
+            min_epochs, max_epochs, benchmark.max_epochs)
+        self.benchmark = benchmark
+        self.min_epochs = min_epochs
+        self.max_epochs = max_epochs
+        self.eta = eta
+        self.time_budget = time_budget
+        # s_max + 1, i.e., the number of rungs of the most aggressive bracket
+        self.num_rungs = int(
+            np.floor(np.log(max_epochs / min_epochs) / np.log(eta) + 1e-9)) + 1
+        self.reset()
+
+    def __repr__(self):
+        return (
+            '{name}(epochs={min_epochs}~{max_epochs}, eta={eta}, {num_rungs} rungs, budget={time_budget})'
+            .format(name=self.__class__.__name__, **self.__dict__))
+
+    def reset(self):
+        self.total_costs, self.num_brackets, self.is_end = 0, 0, False
+        self.history = []
+
+    # the epochs of the i-th rung of the bracket that starts from the s-th lowest fidelity
+    def get_epochs(self, s, i):
+        return max(int(round(self.max_epochs * self.eta**(i - s))), 1)
+
+    # charge the costs in order, and return the number of evaluations within the time budget
+    def charge(self, costs):
+        num = int(
+            (self.total_costs + np.cumsum(costs) <= self.time_budget).sum())
+        self.total_costs += costs[:num].sum()
+        self.is_end = self.is_end or num < len(costs)
+        return num
+
+    def evaluate(self, indexes, iseeds, epochs, start_epochs=0):
+        accuracies, costs = self.benchmark.evaluate(indexes, iseeds, epochs,
+                                                    start_epochs)
+        num = self.charge(costs)
+        self.history.append(
+            (indexes[:num], np.zeros(num, dtype=np.int64) + epochs,
+             accuracies[:num]))
+        return accuracies[:num]
+
+    # the successive halving from the s-th lowest fidelity, whose survivors of each rung are the top 1/eta archs
+    def run_bracket(self, s):
+        num = int(np.ceil(self.num_rungs / (s + 1) * self.eta**s))
+        indexes, iseeds = self.benchmark.sample(num)
+        start_epochs = 0
+        for i in range(s + 1):
+            epochs = self.get_epochs(s, i)
+            accuracies = self.evaluate(indexes, iseeds, epochs, start_epochs)
+            if self.is_end: return
+            # NaN is the last one
+            order = np.argsort(-accuracies, kind='stable')
+            order = order[:max(int(len(order) / self.eta), 1)]
+            indexes, iseeds = indexes[order], iseeds[order]
+            start_epochs = epochs
+        self.num_brackets += 1
+
+    def run_asha(self):
+        epochs = [
+            self.get_epochs(self.num_rungs - 1, i)
+            for i in range(self.num_rungs)
+        ]
+        indexes, iseeds = [], []
+        # the sorted (-accuracy, arch-id) of all archs and the not promoted archs of each rung, where NaN is the last one
+        rankings = [[] for _ in epochs]
+        candidates = [[] for _ in epochs]
+        while not self.is_end:
+            arch_id, k = None, 0
+            # the best candidate of the highest rung, which is in the top 1/eta of its rung
+            for xk in reversed(range(self.num_rungs - 1)):
+                if len(candidates[xk]) > 0 and bisect.bisect_left(
+                        rankings[xk], candidates[xk][0]) < int(
+                            len(rankings[xk]) / self.eta):
+                    arch_id, k = candidates[xk][0][1], xk + 1
+                    break
+            if arch_id is None:
+                index, iseed = self.benchmark.sample(1)
+                arch_id = len(indexes)
+                indexes.append(index[0])
+                iseeds.append(iseed[0])
+            accuracies = self.evaluate(np.array([indexes[arch_id]]),
+                                       np.array([iseeds[arch_id]]), epochs[k],
+                                       epochs[k - 1] if k > 0 else 0)
+            if self.is_end: break
+            if k > 0: candidates[k - 1].pop(0)
+            key = (np.inf if np.isnan(accuracies[0]) else -accuracies[0],
+                   arch_id)
+            bisect.insort(rankings[k], key)
+            # a bracket of ASHA is finished once an arch reaches the highest rung
+            if k < self.num_rungs - 1:
+                bisect.insort(candidates[k], key)
+            else:
+                self.num_brackets += 1
+
+    # Run the search of `mode` until the time budget, and return a dict of
+    #   history      : the evaluated arch-indexes, their epochs and accuracies, where an arch appears once per rung
+    #   num-brackets : the number of the finished brackets (the archs reaching the highest rung of ASHA)
+    #   total-costs  : the simulated time of all evaluations
+    #   best-index   : the most accurate arch of the highest evaluated epochs, -1 if there is no evaluation
+    def run(self, mode):
+        assert mode in ('SH', 'HB', 'ASHA'), 'invalid mode : {:}'.format(mode)
+        self.reset()
+        if mode == 'ASHA': self.run_asha()
+        else:
+            if mode == 'HB': brackets = range(self.num_rungs - 1, -1, -1)
+            else: brackets = [self.num_rungs - 1]
+            while not self.is_end:
+                for s in brackets:
+                    self.run_bracket(s)
+                    if self.is_end: break
+        if len(self.history) > 0:
+            indexes, epochs, accuracies = [
+                np.concatenate(x) for x in zip(*self.history)
+            ]
+        else:
+            indexes, epochs, accuracies = [np.zeros(0)] * 3
+        if len(indexes) > 0:
+            best = np.lexsort(
+                (-np.nan_to_num(accuracies, nan=-np.inf), -epochs))[0]
+            best_index = int(indexes[best])
+        else:
+            best_index = -1
+        return {
+            'history':
+            (indexes.astype(np.int64), epochs.astype(np.int64), accuracies),
+            'num-brackets':
+            self.num_brackets,
+            'total-costs':
+            self.total_costs,
+            'best-index':
+            best_index
+        }
+
+
+def main(xargs, nas_bench):
+    assert xargs.data_path is None, 'the multi-fidelity search only runs on the benchmark'
+    prepare_seed(xargs.rand_seed)
+    logger = prepare_logger(args)
+
+    assert xargs.dataset == 'cifar10', 'currently only support CIFAR-10'
+    assert isinstance(nas_bench,
+                      API), 'the multi-fidelity search requires a local API'
+    rng = np.random.default_rng(xargs.rand_seed)
+    benchmark = EpochBenchmark(nas_bench, 'cifar10-valid', 'x-valid',
+                               xargs.use_12epochs_result > 0, rng)
+    max_epochs = xargs.max_epochs if xargs.max_epochs is not None else benchmark.max_epochs
+    search = MultiFidelitySearch(benchmark, xargs.min_epochs, max_epochs,
+                                 xargs.eta, xargs.time_budget)
+    logger.log('{:} use nas_bench : {:}'.format(time_string(), nas_bench))
+    logger.log('{:} {:} with {:} on {:}'.format(time_string(), xargs.mode,
+                                                search, benchmark))
+    x_start_time = time.time()
+    results = search.run(xargs.mode)
+    best_index = results['best-index']
+    logger.log(
+        '{:} {:} finish {:} brackets with {:} evaluations of {:} archs with {:.1f} s (real-cost = {:.3f} s).'
+        .format(time_string(), xargs.mode, results['num-brackets'],
+                len(results['history'][0]),
+                len(np.unique(results['history'][0])), results['total-costs'],
+                time.time() - x_start_time))
+    if best_index < 0:
+        logger.log('There is no arch within the time budget.')
+    else:
+        logger.log('{:}'.format(nas_bench.query_by_arch(best_index)))
+    logger.log('-' * 100)
+    logger.close()
+    return logger.log_dir, best_index
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser('Multi-Fidelity Search')
+    parser.add_argument('--data_path', type=str, help='Path to dataset')
+    parser.add_argument('--dataset',
+                        type=str,
+                        choices=['cifar10', 'cifar100', 'ImageNet16-120'],
+                        help='Choose between Cifar10/100 and ImageNet-16.')
+    # channels and number-of-cells
+    parser.add_argument('--search_space_name',
+                        type=str,
+                        help='The search space name.')
+    parser.add_argument('--max_nodes',
+                        type=int,
+                        help='The maximum number of nodes.')
+    parser.add_argument('--channel', type=int, help='The number of channels.')
+    parser.add_argument('--num_cells',
+                        type=int,
+                        help='The number of cells in one stage.')
+    parser.add_argument('--mode',
+                        type=str,
+                        default='HB',
+                        choices=['SH', 'HB', 'ASHA'],
+                        help='The successive halving, Hyperband, or ASHA.')
+    parser.add_argument(
+        '--eta',
+        type=float,
+        default=3,
+        help='Only the top 1/eta archs of a rung are promoted.')
+    parser.add_argument('--min_epochs',
+                        type=int,
+                        default=1,
+                        help='The epochs of the lowest rung.')
+    parser.add_argument(
+        '--max_epochs',
+        type=int,
+        default=None,
+        help='The epochs of the highest rung (default: all epochs).')
+    parser.add_argument(
+        '--use_12epochs_result',
+        type=int,
+        default=1,
+        help='Use the 12-epoch results (as R_EA) or the 200-epoch results.')
+    parser.add_argument(
+        '--time_budget',
+        type=int,
+        help='The total time cost budge for searching (in seconds).')
+    # log
+    parser.add_argument('--workers',
+                        type=int,
+                        default=2,
+                        help='number of data loading workers (default: 2)')
+    parser.add_argument('--save_dir',
+                        type=str,
+                        help='Folder to save checkpoints and log.')
+    parser.add_argument(
+        '--arch_nas_dataset',
+        type=str,
+        help='The path to load the architecture dataset (tiny-nas-benchmark).')
+    parser.add_argument('--print_freq',
+                        type=int,
+                        help='print frequency (default: 200)')
+    parser.add_argument('--rand_seed',
+                        type=int,
+                        default=-1,
+                        help='manual seed')
+    args = parser.parse_args()
+    if args.arch_nas_dataset is None or not os.path.isfile(
+            args.arch_nas_dataset):
+        nas_bench = None
+    else:
+        print('{:} build NAS-Benchmark-API from {:}'.format(
+            time_string(), args.arch_nas_dataset))
+        nas_bench = API(args.arch_nas_dataset)
+    if args.rand_seed < 0:
+        save_dir, all_indexes, num = None, [], 500
+        for i in range(num):
+            print('{:} : {:03d}/{:03d}'.format(time_string(), i, num))
+            args.rand_seed = random.randint(1, 100000)
+            save_dir, index = main(args, nas_bench)
+            all_indexes.append(index)
+        torch.save(all_indexes, save_dir / 'results.pth')
+    else:
+        main(args, nas_bench)
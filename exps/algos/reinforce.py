@@ -24,6 +24,7 @@ from config_utils import configure2str, dict2config, load_config
 from datasets import SearchDataset, get_datasets
 from log_utils import AverageMeter, convert_secs2time, time_string
 from models import CellStructure, get_search_spaces
+from nas_201_api import NAS_BENCH_201_OPS, BenchmarkClient, read_authkey
 from nas_201_api import NASBench201API as API
 from procedures import (copy_checkpoint, get_optim_scheduler, prepare_logger,
                         prepare_seed, save_checkpoint)
@@ -99,8 +100,96 @@ def select_action(policy):
     return m.log_prob(action), action.cpu().tolist()
 
 
+# sample `batch_size` archs at once, and return their log-probs [batch_size] and actions [batch_size, num-edges]
+def select_actions(policy, batch_size):
+    probs = policy()
+    m = Categorical(probs)
+    actions = m.sample((batch_size, ))
+    return m.log_prob(actions).sum(dim=-1), actions.cpu().numpy()
+
+
+# The REINFORCE of the ask/tell interface for the asynchronous workers (see nas_201_api.ParallelSimulator), where the
+# actions of the pending archs are kept, and the log-prob of each arch is computed by the current policy once it is told
+class PolicySearcher(object):
+    def __init__(self, policy, optimizer, baseline, encoder):
+        self.policy = policy
+        self.optimizer = optimizer
+        self.baseline = baseline
+        self.encoder = encoder
+        self.op_ids = np.array(
+            [NAS_BENCH_201_OPS.index(op) for op in policy.search_space])
+        self.pendings = collections.defaultdict(collections.deque)
+
+    def ask(self):
+        with torch.no_grad():
+            action = Categorical(self.policy()).sample().cpu().numpy()
+        index = int(self.encoder.vectors_to_indexes(self.op_ids[action]))
+        assert index >= 0, 'can not find this action : {:}'.format(action)
+        self.pendings[index].append(torch.as_tensor(action))
+        return index
+
+    def tell(self, index, accuracy):
+        action = self.pendings[index].popleft()
+        if len(self.pendings[index]) == 0: self.pendings.pop(index)
+        log_prob = Categorical(self.policy()).log_prob(action)
+        self.baseline.update(accuracy)
+        policy_loss = (-log_prob * (accuracy - self.baseline.value())).sum()
+        self.optimizer.zero_grad()
+        policy_loss.backward()
+        self.optimizer.step()
+
+
+# The REINFORCE with `RL_batch_size` archs per step, which are evaluated by one batched lookup of the benchmark, and the
+# baseline of each arch is the mean reward of the other archs in this step (leave-one-out), which is unbiased and has a
+# lower variance than the moving average. The archs are charged in order, and the search stops at the first arch beyond
+# the time budget as the sequential one.
+def batched_search(xargs, nas_bench, policy, optimizer, baseline, logger):
+    encoder = nas_bench.get_arch_encoder()
+    # the action of an edge is the position in the search space -> the op-id of the benchmark
+    op_ids = np.array(
+        [NAS_BENCH_201_OPS.index(op) for op in policy.search_space])
+    total_steps, total_costs, total_archs = 0, 0, 0
+    while total_costs < xargs.time_budget:
+        start_time = time.time()
+        log_probs, actions = select_actions(policy, xargs.RL_batch_size)
+        indexes = encoder.vectors_to_indexes(op_ids[actions])
+        assert (indexes >= 0).all(), 'can not find {:} archs'.format(
+            (indexes < 0).sum())
+        info = nas_bench.sample_more_info(indexes, 'cifar10-valid', None, True)
+        rewards = info['valid-accuracy']
+        cost_times = info['train-all-time'] + info['valid-per-time']
+        num = int(
+            (total_costs + np.cumsum(cost_times) < xargs.time_budget).sum())
+        if num == 0: break
+        total_costs += cost_times[:num].sum()
+        rewards = torch.as_tensor(rewards[:num], dtype=log_probs.dtype)
+        if num > 1:
+            baselines = (rewards.sum() - rewards) / (num - 1)
+        else:
+            baselines = torch.full_like(
+                rewards,
+                baseline.value() if total_archs > 0 else 0)
+        baseline.update(rewards.mean().item())
+        # calculate loss
+        policy_loss = (-log_probs[:num] * (rewards - baselines)).mean()
+        optimizer.zero_grad()
+        policy_loss.backward()
+        optimizer.step()
+        # accumulate time
+        total_costs += time.time() - start_time
+        total_steps, total_archs = total_steps + 1, total_archs + num
+        logger.log(
+            'step [{:3d}] : {:} archs : average-reward={:.3f} : policy_loss={:.4f} : {:}'
+            .format(total_steps, num, baseline.value(), policy_loss.item(),
+                    policy.genotype()))
+        if num < len(indexes): break
+    return total_steps, total_costs, total_archs
+
+
 def main(xargs, nas_bench):
-    assert torch.cuda.is_available(), 'CUDA is not available.'
+    # the GPU is only used to train the searched models, i.e., data_path is not None
+    assert xargs.data_path is None or torch.cuda.is_available(
+    ), 'CUDA is not available.'
     torch.backends.cudnn.enabled = True
     torch.backends.cudnn.benchmark = False
     torch.backends.cudnn.deterministic = True
@@ -180,33 +269,40 @@ def main(xargs, nas_bench):
     logger.log('Will start searching with time budget of {:} s.'.format(
         xargs.time_budget))
     total_steps, total_costs = 0, 0
-    #for istep in range(xargs.RL_steps):
-    while total_costs < xargs.time_budget:
-        start_time = time.time()
-        log_prob, action = select_action(policy)
-        arch = policy.generate_arch(action)
-        reward, cost_time = train_and_eval(arch, nas_bench, extra_info)
-        # accumulate time
-        if total_costs + cost_time < xargs.time_budget:
-            total_costs += cost_time
-        else:
-            break
+    if xargs.RL_batch_size > 1:
+        assert nas_bench is not None, 'RL_batch_size > 1 requires the benchmark'
+        total_steps, total_costs, total_archs = batched_search(
+            xargs, nas_bench, policy, optimizer, baseline, logger)
+        logger.log('REINFORCE evaluates {:} archs in {:} steps.'.format(
+            total_archs, total_steps))
+    else:
+        #for istep in range(xargs.RL_steps):
+        while total_costs < xargs.time_budget:
+            start_time = time.time()
+            log_prob, action = select_action(policy)
+            arch = policy.generate_arch(action)
+            reward, cost_time = train_and_eval(arch, nas_bench, extra_info)
+            # accumulate time
+            if total_costs + cost_time < xargs.time_budget:
+                total_costs += cost_time
+            else:
+                break
 
-        baseline.update(reward)
-        # calculate loss
-        policy_loss = (-log_prob * (reward - baseline.value())).sum()
-        optimizer.zero_grad()
-        policy_loss.backward()
-        optimizer.step()
-        # accumulate time
-        total_costs += time.time() - start_time
-        total_steps += 1
-        logger.log(
-            'step [{:3d}] : average-reward={:.3f} : policy_loss={:.4f} : {:}'.
-            format(total_steps, baseline.value(), policy_loss.item(),
-                   policy.genotype()))
-        #logger.log('----> {:}'.format(policy.arch_parameters))
-        #logger.log('')
+            baseline.update(reward)
+            # calculate loss
+            policy_loss = (-log_prob * (reward - baseline.value())).sum()
+            optimizer.zero_grad()
+            policy_loss.backward()
+            optimizer.step()
+            # accumulate time
+            total_costs += time.time() - start_time
+            total_steps += 1
+            logger.log(
+                'step [{:3d}] : average-reward={:.3f} : policy_loss={:.4f} : {:}'
+                .format(total_steps, baseline.value(), policy_loss.item(),
+                        policy.genotype()))
+            #logger.log('----> {:}'.format(policy.arch_parameters))
+            #logger.log('')
 
     best_arch = policy.genotype()
     logger.log(
@@ -244,6 +340,11 @@ if __name__ == '__main__':
     parser.add_argument('--learning_rate',
                         type=float,
                         help='The learning rate for REINFORCE.')
+    parser.add_argument(
+        '--RL_batch_size',
+        type=int,
+        default=1,
+        help='The number of archs evaluated in each REINFORCE step.')
     #parser.add_argument('--RL_steps',           type=int,   help='The steps for REINFORCE.')
     parser.add_argument('--EMA_momentum',
                         type=float,
@@ -264,6 +365,16 @@ if __name__ == '__main__':
         '--arch_nas_dataset',
         type=str,
         help='The path to load the architecture dataset (tiny-nas-benchmark).')
+    parser.add_argument(
+        '--arch_nas_server',
+        type=str,
+        default=None,
+        help='The address of the query server (NAS-Bench-201/server.py).')
+    parser.add_argument(
+        '--arch_nas_authkey',
+        type=str,
+        default=None,
+        help='The authkey file of the query server (--authkey_file).')
     parser.add_argument('--print_freq',
                         type=int,
                         help='print frequency (default: 200)')
@@ -273,13 +384,19 @@ if __name__ == '__main__':
                         help='manual seed')
     args = parser.parse_args()
     #if args.rand_seed is None or args.rand_seed < 0: args.rand_seed = random.randint(1, 100000)
-    if args.arch_nas_dataset is None or not os.path.isfile(
+    if args.arch_nas_server is not None:
+        print('{:} connect to NAS-Benchmark-API server at {:}'.format(
+            time_string(), args.arch_nas_server))
+        nas_bench = BenchmarkClient(args.arch_nas_server,
+                                    read_authkey(args.arch_nas_authkey))
+    elif args.arch_nas_dataset is None or not os.path.isfile(
             args.arch_nas_dataset):
         nas_bench = None
     else:
         print('{:} build NAS-Benchmark-API from {:}'.format(
             time_string(), args.arch_nas_dataset))
         nas_bench = API(args.arch_nas_dataset)
+        nas_bench.enable_query_cache()
     if args.rand_seed < 0:
         save_dir, all_indexes, num = None, [], 500
         for i in range(num):
@@ -0,0 +1,321 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# Run the searching algorithms on NAS-Bench-201 (R_EA, reinforce, RANDOM, BOHB, hyperband) with many seeds and time budgets.
+# Every (algorithm, time budget, seed) is one job, and the jobs are run by a process pool (--procs), whose workers
+# attach to the benchmark in shared memory (see SharedBenchmark). The result of each job is saved as one file once
+# it finishes, so that an interrupted sweep resumes by the same command, and the regrets of the found architectures
+# are summarized for every (algorithm, time budget) at the end, see scripts-search/algos/run-search.sh for the usage.
+##################################################
+import argparse
+import ast
+import importlib
+import multiprocessing as mp
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+lib_dir = (Path(__file__).parent / '..' / '..' / 'lib').resolve()
+if str(lib_dir) not in sys.path: sys.path.insert(0, str(lib_dir))
+from log_utils import Logger, convert_secs2time, time_string
+from nas_201_api import NASBench201API as API
+from nas_201_api import SharedBenchmark
+
+# the default arguments of each algorithm, which are the same as the command-line arguments of its script
+ALGOS = {
+    'R_EA': {
+        'search_space_name': 'nas-bench-201',
+        'ea_cycles': 100,
+        'ea_population': 10,
+        'ea_sample_size': 3,
+        'ea_fast_by_api': True
+    },
+    'reinforce': {
+        'search_space_name': 'nas-bench-201',
+        'learning_rate': 0.001,
+        'EMA_momentum': 0.9,
+        'RL_batch_size': 1
+    },
+    # the search space of RANDOM is the index of the sub-search-spaces, and 0 is the full one
+    'RANDOM': {
+        'search_space_name': '0'
+    },
+    'BOHB': {
+        'search_space_name': 'nas-bench-201',
+        'strategy': 'sampling',
+        'min_bandwidth': .3,
+        'num_samples': 64,
+        'random_fraction': .33,
+        'bandwidth_factor': 3,
+        'n_iters': 100,
+        'num_workers': 1
+    },
+    'hyperband': {
+        'search_space_name': 'nas-bench-201',
+        'mode': 'HB',
+        'eta': 3,
+        'min_epochs': 1,
+        'max_epochs': None,
+        'use_12epochs_result': 1
+    }
+}
+# the (dataset, eval-set) pairs of the summary, which are reported in the NAS-Bench-201 paper
+EVAL_SETS = (('cifar10-valid', 'x-valid'), ('cifar10', 'ori-test'),
+             ('cifar100', 'x-valid'), ('cifar100', 'x-test'),
+             ('ImageNet16-120', 'x-valid'), ('ImageNet16-120', 'x-test'))
+# the state of each worker process, i.e., the API, the common arguments of all jobs, and the overrides of each algorithm
+WORKER = dict()
+
+
+def get_algo_dir(save_dir, algo, time_budget):
+    return save_dir / '{:}-T{:}'.format(algo, time_budget)
+
+
+def get_run_path(save_dir, algo, time_budget, seed):
+    return save_dir / 'runs' / '{:}-T{:}-seed-{:06d}.pth'.format(
+        algo, time_budget, seed)
+
+
+# the result is written into a temporary file at first, so that an interrupted run never leaves a broken file
+def save_atomically(results, save_path):
+    tmp_path = save_path.with_name(save_path.name + '.tmp')
+    torch.save(results, tmp_path)
+    os.replace(tmp_path, save_path)
+
+
+def init_worker(nas_bench, xargs, overrides):
+    # each worker uses one CPU thread, and the other cores are used by the other workers
+    torch.set_num_threads(1)
+    if isinstance(nas_bench, SharedBenchmark):
+        nas_bench = API(nas_bench, verbose=False)
+    nas_bench.enable_query_cache()
+    WORKER.update(nas_bench=nas_bench, xargs=xargs, overrides=overrides)
+
+
+def run_job(job):
+    algo, time_budget, seed, save_path = job
+    xargs = dict(WORKER['xargs'], **ALGOS[algo])
+    xargs.update(WORKER['overrides'].get(algo, dict()))
+    xargs.update(time_budget=time_budget,
+                 rand_seed=seed,
+                 save_dir=str(
+                     get_algo_dir(save_path.parent.parent, algo, time_budget)))
+    xargs = argparse.Namespace(**xargs)
+    # the main function of each script reads its arguments from the global `args` of the module
+    module = importlib.import_module(algo)
+    module.args = xargs
+    start_time = time.time()
+    outputs = module.main(xargs, WORKER['nas_bench'])
+    results = {
+        'algo': algo,
+        'time_budget': time_budget,
+        'seed': seed,
+        'index': int(outputs[1]),
+        'real_time': time.time() - start_time,
+        'pid': os.getpid()
+    }
+    save_atomically(results, save_path)
+    return results
+
+
+# the statistics of the found architectures of every (algorithm, time budget), whose regret is the best mean accuracy minus
+# the mean accuracy of the found one on each (dataset, eval-set) pair, and the missing pairs of the benchmark are skipped
+def summarize(nas_bench, all_results, logger):
+    summary = dict()
+    for (algo, time_budget), results in sorted(all_results.items()):
+        results = sorted(results, key=lambda x: x['seed'])
+        indexes = np.array([x['index'] for x in results], dtype=np.int64)
+        xinfo = {
+            'seeds': [x['seed'] for x in results],
+            'indexes': indexes,
+            'real_time': np.mean([x['real_time'] for x in results])
+        }
+        strings = []
+        for dataset, setname in EVAL_SETS:
+            try:
+                _, accuracies = nas_bench.get_batch_metrics(
+                    indexes, dataset, setname)
+                regrets = nas_bench.get_regrets(indexes[:, None], dataset,
+                                                setname)[:, 0]
+            except (KeyError, AssertionError):
+                continue
+            xinfo['{:}@{:}'.format(dataset, setname)] = {
+                'accuracies': accuracies,
+                'regrets': regrets,
+                'mean': np.mean(accuracies),
+                'std': np.std(accuracies),
+                'mean-regret': np.mean(regrets),
+                'median-regret': np.median(regrets),
+                'max-regret': np.max(regrets)
+            }
+            strings.append('{:}@{:} : {:.2f} +- {:.2f} (regret={:.2f})'.format(
+                dataset, setname, np.mean(accuracies), np.std(accuracies),
+                np.mean(regrets)))
+        summary[(algo, time_budget)] = xinfo
+        logger.log(
+            '{:9s} T={:6} with {:4d} runs ({:.1f} s per run) :: {:}'.format(
+                algo, time_budget, len(results), xinfo['real_time'],
+                ', '.join(strings)))
+    return summary
+
+
+def main(xargs):
+    save_dir = Path(xargs.save_dir)
+    (save_dir / 'runs').mkdir(parents=True, exist_ok=True)
+    logger = Logger(str(save_dir), 0, False)
+    for algo in xargs.algos:
+        assert algo in ALGOS, 'invalid algo : {:} vs. {:}'.format(
+            algo, list(ALGOS.keys()))
+        # fail fast if an algorithm misses its dependency (e.g., hpbandster of BOHB)
+        importlib.import_module(algo)
+    seeds = xargs.seeds if xargs.seeds is not None else list(
+        range(1, xargs.num_seeds + 1))
+    # the overrides of the default arguments, e.g., R_EA:ea_population=20, or ea_population=20 for all algorithms
+    overrides = dict()
+    for override in xargs.overrides:
+        key, value = override.split('=', 1)
+        algos = xargs.algos if ':' not in key else [key.split(':')[0]]
+        for algo in algos:
+            overrides.setdefault(algo, dict())[key.split(':')[-1]] = \
+                ast.literal_eval(value)
+    logger.log('xargs : algos     = {:}'.format(xargs.algos))
+    logger.log('xargs : budgets   = {:}'.format(xargs.time_budgets))
+    logger.log('xargs : seeds     = {:} seeds from {:} to {:}'.format(
+        len(seeds), min(seeds), max(seeds)))
+    logger.log('xargs : overrides = {:}'.format(overrides))
+    logger.log('xargs : procs     = {:}'.format(xargs.procs))
+
+    # the finished jobs are skipped unless cover_mode
+    jobs, all_results = [], dict()
+    for algo in xargs.algos:
+        for time_budget in xargs.time_budgets:
+            all_results[(algo, time_budget)] = []
+            for seed in seeds:
+                save_path = get_run_path(save_dir, algo, time_budget, seed)
+                if save_path.exists() and not xargs.cover_mode:
+                    all_results[(algo,
+                                 time_budget)].append(torch.load(save_path))
+                else:
+                    jobs.append((algo, time_budget, seed, save_path))
+    logger.log('There are {:} jobs to run, and {:} jobs are finished.'.format(
+        len(jobs), sum(len(x) for x in all_results.values())))
+
+    nas_bench = API(xargs.arch_nas_dataset, verbose=False)
+    worker_xargs = {
+        'data_path': None,
+        'dataset': 'cifar10',
+        'max_nodes': xargs.max_nodes,
+        'channel': xargs.channel,
+        'num_cells': xargs.num_cells,
+        'workers': 1,
+        'arch_nas_dataset': xargs.arch_nas_dataset,
+        'arch_nas_server': None,
+        'arch_nas_authkey': None,
+        'print_freq': 200
+    }
+    start_time, shared = time.time(), None
+    if xargs.procs <= 1:
+        init_worker(nas_bench, worker_xargs, overrides)
+        results, pool = map(run_job, jobs), None
+    else:
+        # spawn does not inherit the threads of the parent process, and the workers attach to the shared benchmark
+        shared = SharedBenchmark.create_from_api(nas_bench)
+        pool = mp.get_context('spawn').Pool(xargs.procs,
+                                            initializer=init_worker,
+                                            initargs=(shared, worker_xargs,
+                                                      overrides))
+        results = pool.imap_unordered(run_job, jobs)
+    try:
+        for i, result in enumerate(results):
+            all_results[(result['algo'], result['time_budget'])].append(result)
+            need_time = 'Time Left: {:}'.format(
+                convert_secs2time(
+                    (time.time() - start_time) / (i + 1) * (len(jobs) - i - 1),
+                    True))
+            logger.log(
+                '{:} {:5d}/{:5d} : {:9s} T={:} seed={:} -> arch-index={:06d}, cost {:.1f} s by pid={:}, {:}'
+                .format(time_string(), i + 1, len(jobs), result['algo'],
+                        result['time_budget'], result['seed'], result['index'],
+                        result['real_time'], result['pid'], need_time))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if shared is not None: shared.unlink()
+    logger.log('{:} finish {:} jobs with {:}.'.format(
+        time_string(), len(jobs),
+        convert_secs2time(time.time() - start_time, True)))
+
+    logger.log('-' * 100)
+    summary = summarize(nas_bench, all_results, logger)
+    torch.save(summary, save_dir / 'summary.pth')
+    # the arch-indexes of each (algorithm, time budget) as the results.pth of each script
+    for (algo, time_budget), xinfo in summary.items():
+        algo_dir = get_algo_dir(save_dir, algo, time_budget)
+        algo_dir.mkdir(parents=True, exist_ok=True)
+        torch.save(xinfo['indexes'].tolist(), algo_dir / 'results.pth')
+    logger.close()
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        'Run the searching algorithms with many seeds')
+    parser.add_argument('--algos',
+                        type=str,
+                        nargs='+',
+                        default=['R_EA', 'reinforce', 'RANDOM'],
+                        help='The searching algorithms : {:}.'.format(
+                            list(ALGOS.keys())))
+    parser.add_argument('--time_budgets',
+                        type=int,
+                        nargs='+',
+                        default=[12000],
+                        help='The time budgets of searching (in seconds).')
+    parser.add_argument('--num_seeds',
+                        type=int,
+                        default=500,
+                        help='The number of runs, i.e., the seeds 1 to N.')
+    parser.add_argument('--seeds',
+                        type=int,
+                        nargs='+',
+                        help='The seeds, which overwrite num_seeds.')
+    parser.add_argument(
+        '--overrides',
+        type=str,
+        nargs='*',
+        default=[],
+        help='The arguments of the algorithms, e.g., R_EA:ea_population=20.')
+    parser.add_argument('--max_nodes',
+                        type=int,
+                        default=4,
+                        help='The maximum number of nodes.')
+    parser.add_argument('--channel',
+                        type=int,
+                        default=16,
+                        help='The number of channels.')
+    parser.add_argument('--num_cells',
+                        type=int,
+                        default=5,
+                        help='The number of cells in one stage.')
+    parser.add_argument('--procs',
+                        type=int,
+                        default=max(os.cpu_count() or 1, 1),
+                        help='The number of processes to run the jobs.')
+    parser.add_argument('--cover_mode',
+                        type=int,
+                        default=0,
+                        help='Re-run the finished jobs or not.')
+    parser.add_argument('--save_dir',
+                        type=str,
+                        help='Folder to save the results and the logs.')
+    parser.add_argument(
+        '--arch_nas_dataset',
+        type=str,
+        help='The path to load the architecture dataset (NAS-Bench-201).')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,193 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# Simulate the asynchronous parallel searching (R_EA, RANDOM, reinforce) on NAS-Bench-201 with N virtual workers, where
+# the training time of each architecture in the benchmark is replayed by the discrete-event simulation (ParallelSimulator),
+# and every (algorithm, number of workers) over the seeds is summarized by
+#   time-to-target : the simulated time when the incumbent (the best validation accuracy) reaches the test regret target
+#   speedup        : the median time-to-target of the fewest workers over the one of N workers, and efficiency = speedup / N
+#                    (relative to the fewest workers, e.g., 1)
+#   utilization    : the time of the finished evaluations over N x the time budget
+#   curve          : the mean test regret of the incumbent at the evenly spaced times of the time budget
+# see scripts-search/algos/simulate-parallel.sh for the usage.
+##################################################
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+lib_dir = (Path(__file__).parent / '..' / '..' / 'lib').resolve()
+if str(lib_dir) not in sys.path: sys.path.insert(0, str(lib_dir))
+from log_utils import Logger, time_string
+from models import get_search_spaces
+from nas_201_api import EvolutionSearcher
+from nas_201_api import NASBench201API as API
+from nas_201_api import ParallelSimulator, RandomSearcher
+from nas_201_api.simulator import get_time_to_target, get_values_at
+from reinforce import ExponentialMovingAverage, Policy, PolicySearcher
+
+ALGOS = ('R_EA', 'RANDOM', 'reinforce')
+
+
+def create_searcher(algo, xargs, nas_bench, rng):
+    encoder = nas_bench.get_arch_encoder()
+    if algo == 'RANDOM':
+        return RandomSearcher(encoder, rng)
+    elif algo == 'R_EA':
+        return EvolutionSearcher(encoder, xargs.ea_population,
+                                 xargs.ea_sample_size, rng)
+    elif algo == 'reinforce':
+        search_space = get_search_spaces('cell', 'nas-bench-201')
+        policy = Policy(xargs.max_nodes, search_space)
+        optimizer = torch.optim.Adam(policy.parameters(),
+                                     lr=xargs.learning_rate)
+        baseline = ExponentialMovingAverage(xargs.EMA_momentum)
+        return PolicySearcher(policy, optimizer, baseline, encoder)
+    else:
+        raise ValueError('invalid algo : {:}'.format(algo))
+
+
+# one search of `algo` with `num_workers` workers, whose evaluation is the same as train_and_eval of R_EA
+def simulate(algo, num_workers, seed, xargs, nas_bench):
+    rng = np.random.default_rng(seed)
+    torch.manual_seed(seed)
+
+    def evaluate(index):
+        info = nas_bench.sample_more_info(np.array([index]), 'cifar10-valid',
+                                          None, True, rng)
+        time_cost = info['train-all-time'][0] + info['valid-per-time'][0]
+        return float(info['valid-accuracy'][0]), float(time_cost)
+
+    simulator = ParallelSimulator(evaluate, num_workers, xargs.time_budget)
+    return simulator.run(create_searcher(algo, xargs, nas_bench, rng))
+
+
+def main(xargs):
+    save_dir = Path(xargs.save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    logger = Logger(str(save_dir), 0, False)
+    for algo in xargs.algos:
+        assert algo in ALGOS, 'invalid algo : {:} vs. {:}'.format(algo, ALGOS)
+    seeds = list(range(1, xargs.num_seeds + 1))
+    num_workers = sorted(xargs.num_workers)
+    logger.log('xargs : algos   = {:}'.format(xargs.algos))
+    logger.log('xargs : workers = {:}'.format(num_workers))
+    logger.log('xargs : budget  = {:}, target regret = {:}, {:} seeds'.format(
+        xargs.time_budget, xargs.target_regret, len(seeds)))
+
+    nas_bench = API(xargs.arch_nas_dataset, verbose=False)
+    # the test regret of every architecture, NaN for the missing ones
+    _, test_accs = nas_bench.get_batch_metrics(list(range(len(nas_bench))),
+                                               'cifar10', 'ori-test')
+    all_regrets = np.nanmax(test_accs) - test_accs
+    times = np.linspace(0, xargs.time_budget, xargs.num_points + 1)[1:]
+
+    summary = {'times': times}
+    for algo in xargs.algos:
+        for xworkers in num_workers:
+            start_time = time.time()
+            ttts, utilizations, curves, num_evals = [], [], [], []
+            for seed in seeds:
+                results = simulate(algo, xworkers, seed, xargs, nas_bench)
+                regrets = all_regrets[results['incumbents']]
+                ttts.append(
+                    get_time_to_target(results['finish-times'], -regrets,
+                                       -xargs.target_regret))
+                curves.append(
+                    get_values_at(results['finish-times'], regrets, times))
+                utilizations.append(results['utilization'])
+                num_evals.append(len(results['indexes']))
+            ttts, curves = np.array(ttts), np.array(curves)
+            counts = (~np.isnan(curves)).sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                curve = np.nansum(curves, axis=0) / counts
+            xinfo = {
+                'time-to-target': ttts,
+                'median-time-to-target': np.median(ttts),
+                'success-rate': np.isfinite(ttts).mean(),
+                'utilization': np.mean(utilizations),
+                'num-evaluations': np.mean(num_evals),
+                'curve': curve,
+                'real_time': (time.time() - start_time) / len(seeds)
+            }
+            base = summary.get((algo, num_workers[0]), xinfo)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                xinfo['speedup'] = base['median-time-to-target'] / xinfo[
+                    'median-time-to-target']
+            xinfo['efficiency'] = xinfo['speedup'] * num_workers[0] / xworkers
+            summary[(algo, xworkers)] = xinfo
+            logger.log(
+                '{:} {:9s} N={:3d} :: time-to-target={:.0f} s (reach {:.0f}%), speedup={:.2f}, efficiency={:.2f}, utilization={:.2f}, {:.0f} evaluations ({:.3f} s per run)'
+                .format(time_string(), algo, xworkers,
+                        xinfo['median-time-to-target'],
+                        xinfo['success-rate'] * 100, xinfo['speedup'],
+                        xinfo['efficiency'], xinfo['utilization'],
+                        xinfo['num-evaluations'], xinfo['real_time']))
+    torch.save(summary, save_dir / 'simulation.pth')
+    logger.close()
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        'Simulate the asynchronous parallel searching')
+    parser.add_argument('--algos',
+                        type=str,
+                        nargs='+',
+                        default=list(ALGOS),
+                        help='The searching algorithms : {:}.'.format(ALGOS))
+    parser.add_argument('--num_workers',
+                        type=int,
+                        nargs='+',
+                        default=[1, 8, 16, 32, 64],
+                        help='The numbers of the virtual workers.')
+    parser.add_argument(
+        '--time_budget',
+        type=int,
+        default=12000,
+        help='The total time cost budge for searching (in seconds).')
+    parser.add_argument(
+        '--target_regret',
+        type=float,
+        default=1.0,
+        help='The test regret (on CIFAR-10) of the time-to-target.')
+    parser.add_argument('--num_points',
+                        type=int,
+                        default=100,
+                        help='The number of times of the regret curves.')
+    parser.add_argument('--num_seeds',
+                        type=int,
+                        default=100,
+                        help='The number of runs, i.e., the seeds 1 to N.')
+    parser.add_argument('--max_nodes',
+                        type=int,
+                        default=4,
+                        help='The maximum number of nodes.')
+    parser.add_argument('--ea_population',
+                        type=int,
+                        default=10,
+                        help='The population size in EA.')
+    parser.add_argument('--ea_sample_size',
+                        type=int,
+                        default=3,
+                        help='The sample size in EA.')
+    parser.add_argument('--learning_rate',
+                        type=float,
+                        default=0.001,
+                        help='The learning rate for REINFORCE.')
+    parser.add_argument('--EMA_momentum',
+                        type=float,
+                        default=0.9,
+                        help='The momentum value for EMA.')
+    parser.add_argument('--save_dir',
+                        type=str,
+                        help='Folder to save the results and the logs.')
+    parser.add_argument(
+        '--arch_nas_dataset',
+        type=str,
+        help='The path to load the architecture dataset (NAS-Bench-201).')
+    args = parser.parse_args()
+    main(args)
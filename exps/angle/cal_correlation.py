@@ -79,50 +79,30 @@ def main(xargs):
     logger.log('load file from {}'.format(file_name))
     logger.log('length of result={}'.format(len(result.keys())))
 
-    real_acc = {}
-    for key in result.keys():
-        real_acc[key] = get_arch_real_acc(api, key, xargs.dataset)
-        if real_acc[key] is None:
-            sys.exit(0)
-
-    real_acc = sorted(real_acc.items(), key=lambda d: d[1], reverse=True)
-    result = sorted(result.items(), key=lambda d: d[1], reverse=True)
-
-    real_rank = {}
-    rank = 1
-    for value in real_acc:
-        real_rank[value[0]] = rank
-        rank += 1
-
-    metric_rank = {}
-    rank = 1
-    for value in result:
-        metric_rank[value[0]] = rank
-        rank += 1
-
-    real_rank_list, rank_list = [], []
-    rank = 1
-    for value in real_acc:
-        rank_list.append(metric_rank[value[0]])
-        real_rank_list.append(rank)
-        rank += 1
+    keys = list(result.keys())
+    real_ranks, real_percentiles = get_arch_real_ranks(api, keys,
+                                                       xargs.dataset)
+    if (real_ranks < 0).any():
+        sys.exit(0)
+
+    # the ranks of the metric in descending order, and the real ranks are the global ranks in the whole search space
+    metrics = np.array([result[key] for key in keys])
+    rank_list = scipy.stats.rankdata(-metrics, method='ordinal')
+    real_rank_list = real_ranks + 1
+    best = int(np.argmin(rank_list))
+    logger.log('the best arch by the metric is top {:.2f}% : {:}'.format(
+        real_percentiles[best], keys[best]))
     logger.log('ktau = {}'.format(
         scipy.stats.stats.kendalltau(real_rank_list, rank_list)[0]))
 
 
-def get_arch_real_acc(api, genotype, dataset):
-    info = api.query_by_arch(genotype)
-    id = api.query_index_by_arch(genotype)
-    if id in api.arch2infos_full:
-        info = api.arch2infos_full[id]
-        if dataset == 'cifar10':
-            test_info = info.get_metrics('cifar10', 'ori-test')
-        elif dataset == 'cifar100':
-            test_info = info.get_metrics('cifar100', 'x-test')
-        else:
-            test_info = info.get_metrics('ImageNet16-120', 'x-test')
-        return test_info['accuracy']
-    return None
+def get_arch_real_ranks(api, genotypes, dataset):
+    if dataset == 'cifar10':
+        return api.query_ranks(genotypes, 'cifar10', 'ori-test')
+    elif dataset == 'cifar100':
+        return api.query_ranks(genotypes, 'cifar100', 'x-test')
+    else:
+        return api.query_ranks(genotypes, 'ImageNet16-120', 'x-test')
 
 
 if __name__ == '__main__':
@@ -21,7 +21,7 @@ from models import get_cell_based_tiny_net, get_search_spaces
 from nas_201_api import NASBench201API as API
 from procedures import prepare_logger, prepare_seed
 from utils import get_model_infos
-from weight_angle import get_arch_angle
+from weight_angle import get_arch_angle, get_arch_real_accs
 
 
 def load(checkpoint_path, model):
@@ -97,11 +97,12 @@ def main(xargs):
     ), AverageMeter(), AverageMeter(), config.epochs + config.warmup
     all_archs = model.get_all_archs()
     arch_angles = {}
+    real_accs = get_arch_real_accs(api, all_archs)
     process_start_time = time.time()
     for i, genotype in enumerate(all_archs):
         angle = get_arch_angle(init_model, model, genotype, search_space)
         logger.log('[{:}] cal angle : angle={} | {:}, acc: {}'.format(
-            i, angle, genotype, get_arch_real_acc(api, genotype)))
+            i, angle, genotype, real_accs[i]))
         arch_angles[genotype.tostr()] = angle
         # measure elapsed time
         epoch_time.update(time.time() - start_time)
@@ -114,12 +115,6 @@ def main(xargs):
     logger.close()
 
 
-def get_arch_real_acc(api, genotype):
-    info = api.query_by_arch(genotype).split('\n')[7]
-    acc = info.split(':')[-1].split('=')[-1].split(']')[0]
-    return float(acc[:-1])
-
-
 if __name__ == '__main__':
     parser = argparse.ArgumentParser('SETN')
     parser.add_argument('--data_path', type=str, help='Path to dataset')
@@ -17,10 +17,10 @@ def get_weight(model):
     return weight
 
 
-def get_arch_real_acc(api, genotype):
-    info = api.query_by_arch(genotype).split('\n')[7]
-    acc = info.split(':')[-1].split('=')[-1].split(']')[0]
-    return float(acc[:-1])
+# the real accuracies of a list of genotypes (Structure or arch string) in one vectorized query, NaN for the unknown ones
+def get_arch_real_accs(api, genotypes, dataset='cifar100', setname='x-test'):
+    losses, accuracies = api.get_batch_metrics(genotypes, dataset, setname)
+    return accuracies
 
 
 def get_head_vector(weight):
@@ -0,0 +1,46 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+import torch
+import torch.utils.data as data
+
+
+class SyntheticDataset(data.Dataset):
+    # A small random dataset to test the training pipelines on CPU without downloading any data.
+    # Each class has a fixed random template (by template_seed), and each image is its template plus noise,
+    # so that the train and test sets (different seeds) share the templates and the task is learnable.
+    def __init__(self,
+                 length,
+                 shape,
+                 num_classes,
+                 seed,
+                 transform=None,
+                 noise=1.0,
+                 template_seed=0):
+        self.length = length
+        self.shape = tuple(shape)
+        self.num_classes = num_classes
+        self.seed = seed
+        self.transform = transform
+        generator = torch.Generator().manual_seed(template_seed)
+        templates = torch.randn((num_classes, ) + self.shape,
+                                generator=generator)
+        generator = torch.Generator().manual_seed(seed)
+        self.targets = torch.randint(num_classes, (length, ),
+                                     generator=generator)
+        self.data = templates[self.targets] + noise * torch.randn(
+            (length, ) + self.shape, generator=generator)
+
+    def __repr__(self):
+        return (
+            '{name}({length} images, shape={shape}, {num_classes} classes, seed={seed})'
+            .format(name=self.__class__.__name__, **self.__dict__))
+
+    def __getitem__(self, index):
+        img, target = self.data[index], int(self.targets[index])
+        if self.transform is not None:
+            img = self.transform(img)
+        return img, target
+
+    def __len__(self):
+        return self.length
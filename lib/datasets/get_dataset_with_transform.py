@@ -15,8 +15,10 @@ from PIL import Image
 
 from .DownsampledImageNet import ImageNet16
 from .SearchDatasetWrap import SearchDataset
+from .SyntheticDataset import SyntheticDataset
 
 Dataset2Class = {
+    'synthetic': 10,
     'cifar10': 10,
     'cifar100': 100,
     'imagenet-1k-s': 1000,
@@ -110,6 +112,8 @@ def get_datasets(name, root, cutout):
     elif name.startswith('ImageNet16'):
         mean = [x / 255 for x in [122.68, 116.66, 104.01]]
         std = [x / 255 for x in [63.22, 61.26, 65.09]]
+    elif name == 'synthetic':
+        mean, std = None, None  # the images are already standardized tensors
     else:
         raise TypeError('Unknow dataset : {:}'.format(name))
 
@@ -180,6 +184,10 @@ def get_datasets(name, root, cutout):
             transforms.ToTensor(), normalize
         ])
         xshape = (1, 3, 224, 224)
+    elif name == 'synthetic':
+        train_transform = transforms.RandomHorizontalFlip()
+        test_transform = None
+        xshape = (1, 3, 32, 32)
     else:
         raise TypeError('Unknow dataset : {:}'.format(name))
 
@@ -226,6 +234,11 @@ def get_datasets(name, root, cutout):
         train_data = ImageNet16(root, True, train_transform, 200)
         test_data = ImageNet16(root, False, test_transform, 200)
         assert len(train_data) == 254775 and len(test_data) == 10000
+    elif name == 'synthetic':  # `root` is not used
+        train_data = SyntheticDataset(1024, xshape[1:], Dataset2Class[name], 0,
+                                      train_transform)
+        test_data = SyntheticDataset(512, xshape[1:], Dataset2Class[name], 1,
+                                     test_transform)
     else:
         raise TypeError('Unknow dataset : {:}'.format(name))
 
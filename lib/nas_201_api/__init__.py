@@ -2,5 +2,22 @@
 # Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
 ##################################################
 from .api import ArchResults, NASBench201API, ResultsCount
+from .archive import ArchiveCache
+from .arrow import load_arrow, read_table, save_arrow
+from .columnar import load_columnar, save_columnar
+from .evolution import BatchedEvolution
+from .graph import MutationGraph
+from .memo import QueryCache
+from .server import (BenchmarkClient, BenchmarkServer, RemoteArchMetrics,
+                     read_authkey, write_authkey)
+from .shared import SharedBenchmark
+from .simulator import EvolutionSearcher, ParallelSimulator, RandomSearcher
+from .space import (NAS_BENCH_201_OPS, ArchEncoder, IsomorphismIndex,
+                    codes_to_vectors, encode_vector, encode_vectors, str2nodes,
+                    to_unique_str, vector_to_nodes, vector_to_str,
+                    vectors_to_codes)
+from .store import ArchMetrics, MetricStore
+from .views import ArchResultsView, ResultsCountView
+from .weights import WeightStore, export_lite, save_weights
 
 NAS_BENCH_201_API_VERSION = 'v1.0'
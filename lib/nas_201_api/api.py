@@ -16,6 +16,44 @@ from collections import OrderedDict, defaultdict
 import numpy as np
 import torch
 
+from .archive import ArchiveCache, get_archive_path
+from .arrow import is_arrow_dir, load_arrow
+from .columnar import is_columnar_dir, load_columnar
+from .graph import MutationGraph
+from .memo import MemoArchMetrics, QueryCache
+from .shared import SharedBenchmark
+from .space import ArchEncoder, IsomorphismIndex
+from .store import MetricStore, get_rank_correlations
+from .views import ArchResultsView
+from .weights import WeightStore, is_weight_dir
+
+HPS = ('less', 'full')  # the results trained with 12 epochs and 200 epochs
+
+
+# keep the results of `datasets` and `seeds` (None for all) in the state dict of ArchResults
+def select_results(state_dict, datasets=None, seeds=None):
+    if datasets is None and seeds is None: return state_dict
+    dataset_seed = OrderedDict()
+    for dataset, x_seeds in state_dict['dataset_seed'].items():
+        if datasets is not None and dataset not in datasets: continue
+        x_seeds = [seed for seed in x_seeds if seeds is None or seed in seeds]
+        if len(x_seeds) > 0: dataset_seed[dataset] = x_seeds
+    all_results = {(dataset, seed): state_dict['all_results'][(dataset, seed)]
+                   for dataset, x_seeds in dataset_seed.items()
+                   for seed in x_seeds}
+    return dict(state_dict, dataset_seed=dataset_seed, all_results=all_results)
+
+
+# load the ArchResults (less, full) of one architecture from its archive file
+def load_archive(xfile_path):
+    xdata = torch.load(xfile_path)
+    assert isinstance(
+        xdata, dict
+    ) and 'full' in xdata and 'less' in xdata, 'invalid format of data in {:}'.format(
+        xfile_path)
+    return ArchResults.create_from_state_dict(
+        xdata['less']), ArchResults.create_from_state_dict(xdata['full'])
+
 
 def print_information(information, extra_info=None, show=False):
     dataset_names = information.get_dataset_names()
@@ -36,7 +74,8 @@ def print_information(information, extra_info=None, show=False):
             dataset, flop, param, '{:.2f}'.format(latency * 1000)
             if latency is not None and latency > 0 else None)
         train_info = information.get_metrics(dataset, 'train')
-        if dataset == 'cifar10-valid':
+        if dataset.endswith(
+                '-valid'):  # trained on the train split of the train set
             valid_info = information.get_metrics(dataset, 'x-valid')
             str2 = '{:14s} train : [{:}], valid : [{:}]'.format(
                 dataset, metric2str(train_info['loss'],
@@ -62,47 +101,130 @@ def print_information(information, extra_info=None, show=False):
 
 
 class NASBench201API(object):
-    def __init__(self, file_path_or_dict, verbose=True):
-        if isinstance(file_path_or_dict, str):
-            if verbose:
-                print('try to create the NAS-Bench-201 api from {:}'.format(
-                    file_path_or_dict))
-            assert os.path.isfile(
-                file_path_or_dict), 'invalid path : {:}'.format(
-                    file_path_or_dict)
-            file_path_or_dict = torch.load(file_path_or_dict)
-        elif isinstance(file_path_or_dict, dict):
-            file_path_or_dict = copy.deepcopy(file_path_or_dict)
+    # if take_ownership is True, the input dict is used without the deep copy, and it should not be used by the caller anymore
+    # hps/datasets/seeds select the results to be loaded (None for all), e.g., hps=['full'] and datasets=['cifar10-valid'] for
+    # a search on CIFAR-10 with 200 epochs, and querying the results that are not loaded raises KeyError
+    def __init__(self,
+                 file_path_or_dict,
+                 verbose=True,
+                 take_ownership=False,
+                 hps=None,
+                 datasets=None,
+                 seeds=None):
+        self.hps = tuple(HPS if hps is None else hps)
+        for hp in self.hps:
+            assert hp in HPS, 'invalid hp : {:} vs. {:}'.format(hp, HPS)
+        self.datasets = None if datasets is None else tuple(datasets)
+        self.seeds = None if seeds is None else tuple(seeds)
+        is_shared = isinstance(file_path_or_dict, SharedBenchmark)
+        is_columnar = isinstance(file_path_or_dict,
+                                 str) and (is_columnar_dir(file_path_or_dict)
+                                           or is_arrow_dir(file_path_or_dict))
+        # keep the shared blocks alive as long as this API
+        self.shared_benchmark = file_path_or_dict if is_shared else None
+        # the ArchResults are only loaded from the .pth file (or a dict), see get_arch_results
+        self.has_arch_results = not (is_shared or is_columnar)
+        if is_shared or is_columnar:
+            if is_shared:
+                if verbose:
+                    print('try to attach the shared NAS-Bench-201 api : {:}'.
+                          format(file_path_or_dict))
+                shared = file_path_or_dict
+                meta_archs, evaluated_indexes, stores = shared.attach()
+                weight_dir = None
+            else:
+                if verbose:
+                    print('try to open the columnar NAS-Bench-201 api : {:}'.
+                          format(file_path_or_dict))
+                if is_columnar_dir(file_path_or_dict):
+                    meta_archs, evaluated_indexes, stores = load_columnar(
+                        file_path_or_dict)
+                else:
+                    meta_archs, evaluated_indexes, stores = load_arrow(
+                        file_path_or_dict)
+                weight_dir = os.path.join(file_path_or_dict, 'weights')
+            self.meta_archs = meta_archs
+            # there is no ArchResults in the columnar or shared layout, all the metrics are in the stores
+            self.arch2infos_less = OrderedDict()
+            self.arch2infos_full = OrderedDict()
+            self.evaluated_indexes = sorted(list(evaluated_indexes))
+            for hp in HPS:
+                if hp not in self.hps:
+                    stores[hp] = stores[hp].select(datasets=[])
+                elif datasets is not None or seeds is not None:
+                    stores[hp] = stores[hp].select(datasets, seeds)
+            self.metric_store_less = stores['less']
+            self.metric_store_full = stores['full']
         else:
-            raise ValueError('invalid type : {:} not in [str, dict]'.format(
-                type(file_path_or_dict)))
-        assert isinstance(file_path_or_dict,
-                          dict), 'It should be a dict instead of {:}'.format(
-                              type(file_path_or_dict))
-        keys = ('meta_archs', 'arch2infos', 'evaluated_indexes')
-        for key in keys:
-            assert key in file_path_or_dict, 'Can not find key[{:}] in the dict'.format(
-                key)
-        self.meta_archs = copy.deepcopy(file_path_or_dict['meta_archs'])
-        self.arch2infos_less = OrderedDict()
-        self.arch2infos_full = OrderedDict()
-        for xkey in sorted(list(file_path_or_dict['arch2infos'].keys())):
-            all_info = file_path_or_dict['arch2infos'][xkey]
-            self.arch2infos_less[xkey] = ArchResults.create_from_state_dict(
-                all_info['less'])
-            self.arch2infos_full[xkey] = ArchResults.create_from_state_dict(
-                all_info['full'])
-        self.evaluated_indexes = sorted(
-            list(file_path_or_dict['evaluated_indexes']))
+            weight_dir = None
+            if isinstance(file_path_or_dict, str):
+                if verbose:
+                    print(
+                        'try to create the NAS-Bench-201 api from {:}'.format(
+                            file_path_or_dict))
+                assert os.path.isfile(
+                    file_path_or_dict), 'invalid path : {:}'.format(
+                        file_path_or_dict)
+                file_path_or_dict = torch.load(file_path_or_dict)
+            elif isinstance(file_path_or_dict, dict):
+                if not take_ownership:
+                    file_path_or_dict = copy.deepcopy(file_path_or_dict)
+            else:
+                raise ValueError(
+                    'invalid type : {:} not in [str, dict]'.format(
+                        type(file_path_or_dict)))
+            assert isinstance(
+                file_path_or_dict,
+                dict), 'It should be a dict instead of {:}'.format(
+                    type(file_path_or_dict))
+            keys = ('meta_archs', 'arch2infos', 'evaluated_indexes')
+            for key in keys:
+                assert key in file_path_or_dict, 'Can not find key[{:}] in the dict'.format(
+                    key)
+            self.meta_archs = list(file_path_or_dict['meta_archs'])
+            self.arch2infos_less = OrderedDict()
+            self.arch2infos_full = OrderedDict()
+            for xkey in sorted(list(file_path_or_dict['arch2infos'].keys())):
+                all_info = file_path_or_dict['arch2infos'][xkey]
+                for hp in self.hps:
+                    arch2infos = self.get_arch2infos(hp == 'less')
+                    arch2infos[xkey] = ArchResults.create_from_state_dict(
+                        select_results(all_info[hp], datasets, seeds))
+            self.evaluated_indexes = sorted(
+                list(file_path_or_dict['evaluated_indexes']))
+            # all the metrics are queried from the columnar stores
+            self.metric_store_less = MetricStore.create_from_arch2infos(
+                self.arch2infos_less, len(self.meta_archs))
+            self.metric_store_full = MetricStore.create_from_arch2infos(
+                self.arch2infos_full, len(self.meta_archs))
+        if datasets is not None:
+            loaded = self.metric_store_less.datasets + \
+                self.metric_store_full.datasets
+            for dataset in datasets:
+                assert dataset in loaded, 'can not find the dataset {:} in the benchmark'.format(
+                    dataset)
+        self.evaluated_masks = np.zeros(len(self.meta_archs), dtype=bool)
+        self.evaluated_masks[self.evaluated_indexes] = True
         self.archstr2index = {}
         for idx, arch in enumerate(self.meta_archs):
             #assert arch.tostr() not in self.archstr2index, 'This [{:}]-th arch {:} already in the dict ({:}).'.format(idx, arch, self.archstr2index[arch.tostr()])
             assert arch not in self.archstr2index, 'This [{:}]-th arch {:} already in the dict ({:}).'.format(
                 idx, arch, self.archstr2index[arch])
             self.archstr2index[arch] = idx
+        self.isomorphism_indexes = dict()
+        self.arch_encoder = None
+        self.mutation_graphs = dict()
+        self.archive_cache = None
+        self.query_cache = None
+        # the trained weights in the `weights` sub-directory of the columnar layout are opened automatically
+        if weight_dir is not None and is_weight_dir(weight_dir):
+            self.weight_store = WeightStore(weight_dir)
+        else:
+            self.weight_store = None
 
+    # the architecture strings are immutable, so that they are returned without copying
     def __getitem__(self, index):
-        return copy.deepcopy(self.meta_archs[index])
+        return self.meta_archs[index]
 
     def __len__(self):
         return len(self.meta_archs)
@@ -131,24 +253,154 @@ class NASBench201API(object):
             arch_index = -1
         return arch_index
 
+    # the vectorized version of query_index_by_arch, where each item of `archs` is an arch-index, an arch string, or a Structure
+    def query_indexes_by_archs(self, archs):
+        if isinstance(archs, np.ndarray) and archs.dtype.kind in 'iu':
+            return archs.astype(np.int64).reshape(-1)
+        indexes = []
+        for arch in archs:
+            if isinstance(arch, (int, np.integer)): indexes.append(int(arch))
+            else: indexes.append(self.query_index_by_arch(arch))
+        return np.array(indexes, dtype=np.int64)
+
+    # the equivalence classes of isomorphic architectures (computed at the first call), see IsomorphismIndex for the vectorized lookups.
+    # consider_zero=True also merges the architectures with the same zero (none) paths, which leads to 6466 classes in NAS-Bench-201.
+    def get_isomorphism_index(self, consider_zero=True):
+        if consider_zero not in self.isomorphism_indexes:
+            self.isomorphism_indexes[
+                consider_zero] = IsomorphismIndex.create_from_archs(
+                    self.meta_archs, consider_zero)
+        return self.isomorphism_indexes[consider_zero]
+
+    # the mapping between the arch-indexes and the integer codes / uint8 vectors of the cells (computed at the first call),
+    # see space.py for the vectorized encoding and decoding, e.g., `Structure(vector_to_nodes(vector))`
+    def get_arch_encoder(self):
+        if self.arch_encoder is None:
+            self.arch_encoder = ArchEncoder.create_from_archs(self.meta_archs)
+        return self.arch_encoder
+
+    # the CSR graph of all architectures under the single-edge edits (computed at the first call), see MutationGraph for the
+    # vectorized neighbor sampling and random walks, which is collapsed to the isomorphism classes by `collapse_isomorphism`
+    def get_mutation_graph(self,
+                           collapse_isomorphism=False,
+                           consider_zero=True):
+        xkey = (collapse_isomorphism,
+                consider_zero) if collapse_isomorphism else False
+        if xkey not in self.mutation_graphs:
+            graph = MutationGraph.create_from_encoder(self.get_arch_encoder())
+            if collapse_isomorphism:
+                graph = graph.collapse(
+                    self.get_isomorphism_index(consider_zero))
+            self.mutation_graphs[xkey] = graph
+        return self.mutation_graphs[xkey]
+
+    # the mean accuracies of the evaluated architectures as the fitness of the mutation graph (NaN for the others),
+    # and the fitness of an isomorphism class is the best of its members
+    def get_graph_fitness(self,
+                          dataset,
+                          metric_on_set,
+                          iepoch=None,
+                          use_12epochs_result=False,
+                          collapse_isomorphism=False,
+                          consider_zero=True):
+        store = self.get_metric_store(use_12epochs_result)
+        _, accuracies = store.get_mean_metrics(dataset, metric_on_set, iepoch)
+        accuracies = np.where(self.evaluated_masks, accuracies, np.nan)
+        if not collapse_isomorphism: return accuracies
+        iso = self.get_isomorphism_index(consider_zero)
+        values = np.full(len(iso), np.nan)
+        np.fmax.at(values, iso.class_ids, accuracies)
+        return values
+
+    # the fitness distance correlation of the mean accuracies on the mutation graph, see MutationGraph.get_fitness_distance_correlation
+    def get_fitness_distance_correlation(self,
+                                         dataset,
+                                         metric_on_set,
+                                         iepoch=None,
+                                         use_12epochs_result=False,
+                                         collapse_isomorphism=False,
+                                         consider_zero=True):
+        graph = self.get_mutation_graph(collapse_isomorphism, consider_zero)
+        values = self.get_graph_fitness(dataset, metric_on_set, iepoch,
+                                        use_12epochs_result,
+                                        collapse_isomorphism, consider_zero)
+        return graph.get_fitness_distance_correlation(values)
+
+    # load the archive of the `index`-th architecture and keep it in memory, use `open_archives` to load many architectures within a memory budget
     def reload(self, archive_root, index):
         assert os.path.isdir(archive_root), 'invalid directory : {:}'.format(
             archive_root)
-        xfile_path = os.path.join(archive_root,
-                                  '{:06d}-FULL.pth'.format(index))
+        xfile_path = get_archive_path(archive_root, index)
         assert 0 <= index < len(
             self.meta_archs), 'invalid index of {:}'.format(index)
         assert os.path.isfile(xfile_path), 'invalid data path : {:}'.format(
             xfile_path)
-        xdata = torch.load(xfile_path)
-        assert isinstance(
-            xdata, dict
-        ) and 'full' in xdata and 'less' in xdata, 'invalid format of data in {:}'.format(
-            xfile_path)
-        self.arch2infos_less[index] = ArchResults.create_from_state_dict(
-            xdata['less'])
-        self.arch2infos_full[index] = ArchResults.create_from_state_dict(
-            xdata['full'])
+        for hp, arch_result in zip(HPS, load_archive(xfile_path)):
+            if hp not in self.hps: continue
+            arch_result.load_state_dict(
+                select_results(arch_result.state_dict(), self.datasets,
+                               self.seeds))
+            self.get_arch2infos(hp == 'less')[index] = arch_result
+            self.get_metric_store(hp == 'less').update(index, arch_result)
+        if self.query_cache is not None: self.query_cache.clear()
+
+    # lazily load the per-architecture archives in `archive_root` with an LRU cache of `max_bytes` (None for no limit),
+    # which are then used by get_net_param and iterate_net_params, call `api.archive_cache.evict(index)` to release one explicitly
+    def open_archives(self, archive_root, max_bytes=None, workers=2):
+        if self.archive_cache is not None: self.archive_cache.close()
+        self.archive_cache = ArchiveCache(archive_root, load_archive,
+                                          max_bytes, workers)
+        return self.archive_cache
+
+    # read the trained weights from the memory-mapped weight store in `save_dir` (see weights.save_weights), which is used by get_net_param at first
+    def open_weights(self, save_dir):
+        self.weight_store = WeightStore(save_dir)
+        return self.weight_store
+
+    # memoize the results of get_more_info in an LRU cache of `max_size` entries (None for no limit), see memo.py,
+    # and `api.query_cache` reports the hits and misses
+    def enable_query_cache(self, max_size=100000):
+        self.query_cache = QueryCache(max_size)
+        return self.query_cache
+
+    def disable_query_cache(self):
+        self.query_cache = None
+
+    def close_archives(self):
+        if self.archive_cache is not None: self.archive_cache.close()
+        self.archive_cache = None
+
+    # the ArchResults with trained weights, which is from the archive cache if the loaded one has been cleared (clear_params)
+    def get_arch_results(self, index, use_12epochs_result=False):
+        arch2infos = self.get_arch2infos(use_12epochs_result)
+        if index in arch2infos and (not arch2infos[index].clear_net_done
+                                    or self.archive_cache is None):
+            return arch2infos[index]
+        if not self.has_arch_results and self.archive_cache is None:
+            raise KeyError(
+                'ArchResults are not available in the columnar/shared layout, load the .pth file (or open_archives) or use get_more_info/query_by_arch'
+            )
+        assert self.archive_cache is not None, 'can not find the {:}-th arch, please use open_archives first'.format(
+            index)
+        less, full = self.archive_cache.get(index)
+        return less if use_12epochs_result else full
+
+    # raise KeyError if the results of 12 epochs (or 200 epochs) are not loaded, see `hps` of __init__
+    def check_hp(self, use_12epochs_result=False):
+        hp = 'less' if use_12epochs_result else 'full'
+        if hp not in self.hps:
+            raise KeyError(
+                'The results of {:} epochs are not loaded, the loaded hps are {:}'
+                .format(12 if use_12epochs_result else 200, self.hps))
+
+    def get_arch2infos(self, use_12epochs_result=False):
+        if use_12epochs_result: return self.arch2infos_less
+        else: return self.arch2infos_full
+
+    def get_metric_store(self, use_12epochs_result=False):
+        self.check_hp(use_12epochs_result)
+        if use_12epochs_result: return self.metric_store_less
+        else: return self.metric_store_full
 
     def query_by_arch(self, arch, use_12epochs_result=False):
         if isinstance(arch, int):
@@ -157,11 +409,11 @@ class NASBench201API(object):
             arch_index = self.query_index_by_arch(arch)
         if arch_index == -1:
             return None  # the following two lines are used to support few training epochs
-        if use_12epochs_result: arch2infos = self.arch2infos_less
-        else: arch2infos = self.arch2infos_full
-        if arch_index in arch2infos:
-            strings = print_information(arch2infos[arch_index],
-                                        'arch-index={:}'.format(arch_index))
+        store = self.get_metric_store(use_12epochs_result)
+        if arch_index in store:
+            strings = print_information(
+                store.view(arch_index, self.meta_archs[arch_index]),
+                'arch-index={:}'.format(arch_index))
             return '\n'.join(strings)
         else:
             print(
@@ -170,35 +422,44 @@ class NASBench201API(object):
             return None
 
     # query information with the training of 12 epochs or 200 epochs
-    # if dataname is None, return the ArchResults
+    # if dataname is None, return the metrics of the architecture (ArchMetrics), see query_meta_info_by_index
     # else, return a dict with all trials on that dataset (the key is the seed)
+    # if read_only is True, return the read-only views (ResultsCountView) of the trials without copying
     def query_by_index(self,
                        arch_index,
                        dataname=None,
-                       use_12epochs_result=False):
-        if use_12epochs_result:
-            basestr, arch2infos = '12epochs', self.arch2infos_less
-        else:
-            basestr, arch2infos = '200epochs', self.arch2infos_full
-        assert arch_index in arch2infos, 'arch_index [{:}] does not in arch2info with {:}'.format(
-            arch_index, basestr)
-        archInfo = copy.deepcopy(arch2infos[arch_index])
-        if dataname is None: return archInfo
-        else:
-            assert dataname in archInfo.get_dataset_names(
-            ), 'invalid dataset-name : {:}'.format(dataname)
-            info = archInfo.query(dataname)
-            return info
-
-    def query_meta_info_by_index(self, arch_index, use_12epochs_result=False):
-        if use_12epochs_result:
-            basestr, arch2infos = '12epochs', self.arch2infos_less
+                       use_12epochs_result=False,
+                       read_only=False):
+        if dataname is None:
+            return self.query_meta_info_by_index(arch_index,
+                                                 use_12epochs_result)
+        self.check_hp(use_12epochs_result)
+        if self.has_arch_results:
+            if use_12epochs_result:
+                basestr, arch2infos = '12epochs', self.arch2infos_less
+            else:
+                basestr, arch2infos = '200epochs', self.arch2infos_full
+            assert arch_index in arch2infos, 'arch_index [{:}] does not in arch2info with {:}'.format(
+                arch_index, basestr)
+            archInfo = arch2infos[arch_index]
         else:
-            basestr, arch2infos = '200epochs', self.arch2infos_full
-        assert arch_index in arch2infos, 'arch_index [{:}] does not in arch2info with {:}'.format(
-            arch_index, basestr)
-        archInfo = copy.deepcopy(arch2infos[arch_index])
-        return archInfo
+            archInfo = self.get_arch_results(arch_index, use_12epochs_result)
+        if read_only: archInfo = ArchResultsView(archInfo)
+        assert dataname in archInfo.get_dataset_names(
+        ), 'invalid dataset-name : {:}'.format(dataname)
+        info = archInfo.query(dataname)
+        return info if read_only else copy.deepcopy(info)
+
+    # the metrics of the architecture (ArchMetrics), which is a read-only view of the metric store without copying, so
+    # read_only makes no difference. Please use get_arch_results for the ArchResults (e.g., the weights) of the .pth file
+    def query_meta_info_by_index(self,
+                                 arch_index,
+                                 use_12epochs_result=False,
+                                 read_only=False):
+        store = self.get_metric_store(use_12epochs_result)
+        assert arch_index in store, 'arch_index [{:}] does not in the metrics with {:}'.format(
+            arch_index, '12epochs' if use_12epochs_result else '200epochs')
+        return store.view(arch_index, self.meta_archs[arch_index])
 
     def find_best(self,
                   dataset,
@@ -206,41 +467,176 @@ class NASBench201API(object):
                   FLOP_max=None,
                   Param_max=None,
                   use_12epochs_result=False):
-        if use_12epochs_result:
-            basestr, arch2infos = '12epochs', self.arch2infos_less
-        else:
-            basestr, arch2infos = '200epochs', self.arch2infos_full
-        best_index, highest_accuracy = -1, None
-        for i, idx in enumerate(self.evaluated_indexes):
-            info = arch2infos[idx].get_comput_costs(dataset)
-            flop, param, latency = info['flops'], info['params'], info[
-                'latency']
-            if FLOP_max is not None and flop > FLOP_max: continue
-            if Param_max is not None and param > Param_max: continue
-            xinfo = arch2infos[idx].get_metrics(dataset, metric_on_set)
-            loss, accuracy = xinfo['loss'], xinfo['accuracy']
-            if best_index == -1:
-                best_index, highest_accuracy = idx, accuracy
-            elif highest_accuracy < accuracy:
-                best_index, highest_accuracy = idx, accuracy
-        return best_index, highest_accuracy
+        results = self.constrained_search(
+            dataset,
+            metric_on_set,
+            topk=1,
+            FLOP_max=FLOP_max,
+            Param_max=Param_max,
+            use_12epochs_result=use_12epochs_result)
+        if len(results['topk-indexes']) == 0: return -1, None
+        return int(results['topk-indexes'][0]), results['topk-accuracies'][0]
+
+    # find the top-k architectures and the accuracy-vs-cost Pareto front under the FLOP/param/latency constraints in one call,
+    # where `cost` (flops, params, or latency) is the x-axis of the Pareto front. It returns a dict of numpy arrays, i.e.,
+    # topk-indexes/topk-accuracies sorted by the accuracy, and pareto-indexes/pareto-accuracies/pareto-costs sorted by the cost.
+    def constrained_search(self,
+                           dataset,
+                           metric_on_set,
+                           topk=1,
+                           FLOP_max=None,
+                           Param_max=None,
+                           Latency_max=None,
+                           cost='flops',
+                           iepoch=None,
+                           use_12epochs_result=False):
+        store = self.get_metric_store(use_12epochs_result)
+        return store.search(dataset, metric_on_set, iepoch, topk, FLOP_max,
+                            Param_max, Latency_max, cost, self.evaluated_masks)
+
+    # query the mean loss and accuracy of many architectures in one call, where each item of `archs` is an arch-index, an arch string, or a Structure.
+    # It returns two numpy arrays (losses, accuracies) in the order of `archs`, and NaN for the architectures that are not found or not evaluated.
+    def get_batch_metrics(self,
+                          archs,
+                          dataset,
+                          metric_on_set,
+                          iepoch=None,
+                          use_12epochs_result=False):
+        indexes = self.query_indexes_by_archs(archs)
+        store = self.get_metric_store(use_12epochs_result)
+        return store.get_batch_metrics(indexes, dataset, metric_on_set, iepoch)
+
+    # the per-epoch loss/accuracy/time/all_time curves of many architectures as numpy arrays, see MetricStore.get_curves
+    def get_learning_curves(self,
+                            archs,
+                            dataset,
+                            metric_on_set,
+                            reduce_seeds=False,
+                            use_12epochs_result=False):
+        indexes = self.query_indexes_by_archs(archs)
+        store = self.get_metric_store(use_12epochs_result)
+        return store.get_curves(indexes, dataset, metric_on_set, reduce_seeds)
+
+    # the cached rank table of all architectures, i.e., (ranks, percentiles, order), see MetricStore.get_rank_table
+    def get_rank_table(self,
+                       dataset,
+                       metric_on_set,
+                       iepoch=None,
+                       use_12epochs_result=False):
+        store = self.get_metric_store(use_12epochs_result)
+        return store.get_rank_table(dataset, metric_on_set, iepoch)
+
+    # the ranks and percentiles of many architectures, each item of `archs` is an arch-index, an arch string, or a Structure
+    def query_ranks(self,
+                    archs,
+                    dataset,
+                    metric_on_set,
+                    iepoch=None,
+                    use_12epochs_result=False):
+        indexes = self.query_indexes_by_archs(archs)
+        ranks, percentiles, _ = self.get_rank_table(dataset, metric_on_set,
+                                                    iepoch,
+                                                    use_12epochs_result)
+        valids = indexes >= 0
+        indexes = np.where(valids, indexes, 0)
+        return np.where(valids, ranks[indexes],
+                        -1), np.where(valids, percentiles[indexes], np.nan)
+
+    # the regrets of the search trajectories (an integer array of arch-indexes [..., num-steps]) at every step
+    def get_regrets(self,
+                    trajectories,
+                    dataset,
+                    metric_on_set,
+                    iepoch=None,
+                    use_12epochs_result=False):
+        store = self.get_metric_store(use_12epochs_result)
+        return store.get_regrets(trajectories, dataset, metric_on_set, iepoch)
+
+    # the boolean masks [num-subspaces, num-archs] of the sub-search-spaces, where each subspace is an op subset (e.g., the ones of
+    # models.get_sub_search_spaces) and it has the architectures whose edges only use these ops
+    def get_subspace_masks(self, subspaces):
+        return self.get_arch_encoder().get_subspace_masks(subspaces)
+
+    # the statistics of the evaluated architectures in many subspaces in one call (see MetricStore.get_subspace_stats),
+    # and `sizes` is the number of all architectures in each subspace
+    def query_subspaces(self,
+                        subspaces,
+                        dataset,
+                        metric_on_set,
+                        iepoch=None,
+                        use_12epochs_result=False):
+        masks = self.get_subspace_masks(subspaces)
+        store = self.get_metric_store(use_12epochs_result)
+        stats = store.get_subspace_stats(masks & self.evaluated_masks, dataset,
+                                         metric_on_set, iepoch)
+        stats['sizes'] = masks.sum(axis=1)
+        return stats
+
+    # constrained_search within the subspace of one op subset, i.e., the top-k architectures and the Pareto front
+    def subspace_search(self,
+                        ops,
+                        dataset,
+                        metric_on_set,
+                        topk=1,
+                        FLOP_max=None,
+                        Param_max=None,
+                        Latency_max=None,
+                        cost='flops',
+                        iepoch=None,
+                        use_12epochs_result=False):
+        masks = self.get_subspace_masks([ops])[0] & self.evaluated_masks
+        store = self.get_metric_store(use_12epochs_result)
+        return store.search(dataset, metric_on_set, iepoch, topk, FLOP_max,
+                            Param_max, Latency_max, cost, masks)
+
+    # the Spearman rank correlations [num-subspaces] between two mean accuracies within each subspace, e.g., between
+    # the validation and test accuracies, or between the accuracies after 12 epochs and 200 epochs (other_use_12epochs_result)
+    def get_subspace_correlations(self,
+                                  subspaces,
+                                  dataset,
+                                  metric_on_set,
+                                  other_dataset,
+                                  other_metric_on_set,
+                                  use_12epochs_result=False,
+                                  other_use_12epochs_result=False):
+        masks = self.get_subspace_masks(subspaces) & self.evaluated_masks
+        _, xaccuracies = self.get_metric_store(
+            use_12epochs_result).get_mean_metrics(dataset, metric_on_set)
+        _, yaccuracies = self.get_metric_store(
+            other_use_12epochs_result).get_mean_metrics(
+                other_dataset, other_metric_on_set)
+        return get_rank_correlations(masks, xaccuracies, yaccuracies)
 
     # return the topology structure of the `index`-th architecture
     def arch(self, index):
         assert 0 <= index < len(
             self.meta_archs), 'invalid index : {:} vs. {:}.'.format(
                 index, len(self.meta_archs))
-        return copy.deepcopy(self.meta_archs[index])
+        return self.meta_archs[index]
 
     # obtain the trained weights of the `index`-th architecture on `dataset` with the seed of `seed`
     def get_net_param(self, index, dataset, seed, use_12epochs_result=False):
-        if use_12epochs_result:
-            basestr, arch2infos = '12epochs', self.arch2infos_less
-        else:
-            basestr, arch2infos = '200epochs', self.arch2infos_full
-        archresult = arch2infos[index]
+        if self.weight_store is not None and self.weight_store.has(
+                index, dataset, seed, use_12epochs_result):
+            return self.weight_store.get_net_param(index, dataset, seed,
+                                                   use_12epochs_result)
+        archresult = self.get_arch_results(index, use_12epochs_result)
         return archresult.get_net_param(dataset, seed)
 
+    # yield (index, weights) for every index in `indexes`, and the next `prefetch` archives are loaded in the background
+    def iterate_net_params(self,
+                           indexes,
+                           dataset,
+                           seed=None,
+                           use_12epochs_result=False,
+                           prefetch=4):
+        indexes = list(indexes)
+        for i, index in enumerate(indexes):
+            if self.archive_cache is not None and prefetch > 0:
+                self.archive_cache.prefetch(indexes[i + 1:i + 1 + prefetch])
+            yield index, self.get_net_param(index, dataset, seed,
+                                            use_12epochs_result)
+
     # obtain the metric for the `index`-th architecture
     def get_more_info(self,
                       index,
@@ -248,12 +644,25 @@ class NASBench201API(object):
                       iepoch=None,
                       use_12epochs_result=False,
                       is_random=True):
-        if use_12epochs_result:
-            basestr, arch2infos = '12epochs', self.arch2infos_less
-        else:
-            basestr, arch2infos = '200epochs', self.arch2infos_full
-        archresult = arch2infos[index]
-        if dataset == 'cifar10-valid':
+        if self.query_cache is None or is_random:
+            return self.compute_more_info(index, dataset, iepoch,
+                                          use_12epochs_result, is_random)
+        hp = 'less' if use_12epochs_result else 'full'
+        xinfo = self.query_cache.get(
+            ('more-info', index, dataset, iepoch, hp, is_random),
+            lambda: self.compute_more_info(index, dataset, iepoch,
+                                           use_12epochs_result, is_random))
+        return dict(xinfo)
+
+    def compute_more_info(self, index, dataset, iepoch, use_12epochs_result,
+                          is_random):
+        archresult = self.get_metric_store(use_12epochs_result).view(
+            index, self.meta_archs[index])
+        if self.query_cache is not None and is_random:
+            archresult = MemoArchMetrics(
+                self.query_cache, archresult,
+                'less' if use_12epochs_result else 'full')
+        if dataset.endswith('-valid'):
             train_info = archresult.get_metrics(dataset,
                                                 'train',
                                                 iepoch=iepoch,
@@ -324,6 +733,48 @@ class NASBench201API(object):
                 xifo['valid-accuracy'] = valid_info['accuracy']
             return xifo
 
+    # The vectorized get_more_info with is_random=True for many architectures (an arch-index array with any shape or a list
+    # of archs), i.e., a dict of the same keys whose values are arrays, and every metric is of an independent random seed
+    # drawn by rng (a numpy.random.Generator or numpy.random), e.g., the batched benchmark lookups of BatchedEvolution.
+    # The optional eval-set (e.g., ori-test of cifar10-valid) is included only if all architectures have its results.
+    def sample_more_info(self,
+                         archs,
+                         dataset,
+                         iepoch=None,
+                         use_12epochs_result=False,
+                         rng=None):
+        if isinstance(archs, np.ndarray) and archs.dtype.kind in 'iu':
+            indexes = archs.astype(np.int64)
+        else:
+            indexes = self.query_indexes_by_archs(archs)
+        store = self.get_metric_store(use_12epochs_result)
+        infos = {
+            'train':
+            store.sample_seed_metrics(indexes, dataset, 'train', iepoch, rng)
+        }
+        if dataset.endswith('-valid'):
+            names = (('valid', 'x-valid', True), ('test', 'ori-test', False))
+        elif dataset == 'cifar10':
+            names = (('test', 'ori-test', True), ('valid', 'x-valid', False))
+        else:
+            names = (('test', 'x-test', True), ('valid', 'x-valid', False))
+        for key, setname, required in names:
+            try:
+                infos[key] = store.sample_seed_metrics(indexes, dataset,
+                                                       setname, iepoch, rng)
+            except KeyError:
+                if required: raise
+        xifo = dict()
+        for key, info in infos.items():
+            xifo['{:}-loss'.format(key)] = info['loss']
+            xifo['{:}-accuracy'.format(key)] = info['accuracy']
+        if dataset.endswith('-valid'):
+            xifo['train-all-time'] = infos['train']['all_time']
+            xifo['valid-all-time'] = infos['valid']['all_time']
+            xifo['valid-per-time'] = infos['valid']['all_time'] / (
+                infos['train']['iepoch'] + 1)
+        return xifo
+
     def show(self, index=-1):
         if index < 0:  # show all architectures
             print(self)
@@ -332,10 +783,12 @@ class NASBench201API(object):
                       ' The ({:5d}/{:5d}) {:06d}-th architecture! '.format(
                           i, len(self.evaluated_indexes), idx) + '-' * 10)
                 print('arch : {:}'.format(self.meta_archs[idx]))
-                strings = print_information(self.arch2infos_full[idx])
+                strings = print_information(
+                    self.metric_store_full.view(idx, self.meta_archs[idx]))
                 print('>' * 40 + ' 200 epochs ' + '>' * 40)
                 print('\n'.join(strings))
-                strings = print_information(self.arch2infos_less[idx])
+                strings = print_information(
+                    self.metric_store_less.view(idx, self.meta_archs[idx]))
                 print('>' * 40 + '  12 epochs ' + '>' * 40)
                 print('\n'.join(strings))
                 print('<' * 40 + '------------' + '<' * 40)
@@ -346,10 +799,14 @@ class NASBench201API(object):
                         'The {:}-th architecture has not been evaluated or not saved.'
                         .format(index))
                 else:
-                    strings = print_information(self.arch2infos_full[index])
+                    strings = print_information(
+                        self.metric_store_full.view(index,
+                                                    self.meta_archs[index]))
                     print('>' * 40 + ' 200 epochs ' + '>' * 40)
                     print('\n'.join(strings))
-                    strings = print_information(self.arch2infos_less[index])
+                    strings = print_information(
+                        self.metric_store_less.view(index,
+                                                    self.meta_archs[index]))
                     print('>' * 40 + '  12 epochs ' + '>' * 40)
                     print('\n'.join(strings))
                     print('<' * 40 + '------------' + '<' * 40)
@@ -0,0 +1,130 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The lazy loader of the per-architecture archives (archive_root/{index:06d}-FULL.pth).
+# The loaded archives are kept in an LRU cache with a byte budget (the size of the archive file),
+# and the upcoming indexes can be loaded in the background by a thread pool via `prefetch`, where a finished prefetch
+# is moved into the LRU cache at once, i.e., it is counted in the byte budget and can be evicted.
+#
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_archive_path(archive_root, index):
+    return os.path.join(archive_root, '{:06d}-FULL.pth'.format(index))
+
+
+class ArchiveCache(object):
+    # load_func(file_path) returns the object to be cached, max_bytes=None means no limit
+    def __init__(self, archive_root, load_func, max_bytes=None, workers=2):
+        assert os.path.isdir(archive_root), 'invalid directory : {:}'.format(
+            archive_root)
+        assert max_bytes is None or max_bytes > 0, 'invalid max_bytes : {:}'.format(
+            max_bytes)
+        self.archive_root = archive_root
+        self.load_func = load_func
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.RLock()
+        # index -> (archive, nbytes), the last one is the most recently used
+        self.archives = OrderedDict()
+        # index -> the future of an unfinished prefetch, whose result is moved into `archives` once it is loaded
+        self.futures = dict()
+        self.nbytes = 0
+        self.hits, self.misses = 0, 0
+
+    def __len__(self):
+        return len(self.archives)
+
+    def __contains__(self, index):
+        return index in self.archives
+
+    def __repr__(self):
+        return (
+            '{name}({num} archives, {nbytes:.1f}/{max_bytes} MB, hits={hits}, misses={misses}, root={root})'
+            .format(name=self.__class__.__name__,
+                    num=len(self.archives),
+                    nbytes=self.nbytes / 1e6,
+                    max_bytes='{:.1f}'.format(self.max_bytes / 1e6)
+                    if self.max_bytes is not None else 'inf',
+                    hits=self.hits,
+                    misses=self.misses,
+                    root=self.archive_root))
+
+    def has_archive(self, index):
+        return os.path.isfile(get_archive_path(self.archive_root, index))
+
+    def load(self, index):
+        xfile_path = get_archive_path(self.archive_root, index)
+        assert os.path.isfile(xfile_path), 'invalid data path : {:}'.format(
+            xfile_path)
+        return self.load_func(xfile_path), os.path.getsize(xfile_path)
+
+    def insert(self, index, archive, nbytes):
+        with self.lock:
+            if index in self.archives:
+                self.nbytes -= self.archives.pop(index)[1]
+            self.archives[index] = (archive, nbytes)
+            self.nbytes += nbytes
+            # always keep the latest archive, even if it alone exceeds the budget
+            while self.max_bytes is not None and self.nbytes > self.max_bytes and len(
+                    self.archives) > 1:
+                _, (_, xbytes) = self.archives.popitem(last=False)
+                self.nbytes -= xbytes
+
+    def get(self, index):
+        with self.lock:
+            if index in self.archives:
+                self.hits += 1
+                self.archives.move_to_end(index)
+                return self.archives[index][0]
+            self.misses += 1
+            future = self.futures.pop(index, None)
+        if future is not None: archive, nbytes = future.result()
+        else: archive, nbytes = self.load(index)
+        self.insert(index, archive, nbytes)
+        return archive
+
+    # load the archive of a prefetch, which is cached unless it is taken by `get` or evicted in the meantime
+    def prefetch_load(self, index):
+        archive, nbytes = self.load(index)
+        with self.lock:
+            if self.futures.pop(index, None) is not None:
+                self.insert(index, archive, nbytes)
+        return archive, nbytes
+
+    # load the archives of `indexes` in the background, which are then cached as the most recently used ones
+    def prefetch(self, indexes):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers)
+            for index in indexes:
+                if index in self.archives or index in self.futures: continue
+                self.futures[index] = self.executor.submit(
+                    self.prefetch_load, index)
+
+    def evict(self, index):
+        with self.lock:
+            future = self.futures.pop(index, None)
+            if future is not None: future.cancel()
+            if index in self.archives:
+                self.nbytes -= self.archives.pop(index)[1]
+                return True
+            return False
+
+    def clear(self):
+        with self.lock:
+            for future in self.futures.values():
+                future.cancel()
+            self.futures.clear()
+            self.archives.clear()
+            self.nbytes = 0
+
+    def close(self):
+        self.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,230 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The Parquet (or Arrow IPC) layout of NAS-Bench-201, i.e., the long-format tables for pandas/polars/duckdb and plots.
+#   save_dir/arrow.json : the format, and the datasets/setnames/shapes of the MetricStore of each hp (less or full)
+#   save_dir/archs      : arch_index, arch_str, evaluated
+#   save_dir/trials     : arch_index, trial, seed, epochs, flops, params, latency, partitioned by hp=*/dataset=*
+#   save_dir/curves     : arch_index, trial, seed, epoch, loss, accuracy, time, all_time, partitioned by hp=*/dataset=*/setname=*
+# `read_table` loads only the selected columns and skips the files (and row groups) that do not match the filter, e.g.,
+#   read_table(save_dir, 'curves', ['arch_index', 'epoch', 'accuracy'], (field('hp') == 'full') & (field('setname') == 'ori-test'))
+# and `API(save_dir)` uses this layout as the backend by `load_arrow`.
+# pyarrow is only required when this layout is written or read.
+#
+import json
+import os
+
+import numpy as np
+
+from .store import MetricStore
+
+ARROW_HEADER_NAME = 'arrow.json'
+# format -> file extension
+ARROW_FORMATS = {'parquet': 'parquet', 'ipc': 'arrow'}
+# the columns of trials/curves -> the arrays of MetricStore
+TRIAL_COLUMNS = (('seed', 'seeds'), ('epochs', 'epochs'), ('flops', 'flops'),
+                 ('params', 'params'), ('latency', 'latencies'))
+CURVE_COLUMNS = (('loss', 'losses'), ('accuracy', 'accuracies'),
+                 ('time', 'times'), ('all_time', 'cum_times'))
+TABLE_PARTITIONS = {
+    'archs': (),
+    'trials': ('hp', 'dataset'),
+    'curves': ('hp', 'dataset', 'setname')
+}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            'The Parquet/Arrow layout of NAS-Bench-201 requires pyarrow, please install it by `pip install pyarrow`.'
+        )
+    return pyarrow
+
+
+def is_arrow_dir(path):
+    return os.path.isdir(path) and os.path.isfile(
+        os.path.join(path, ARROW_HEADER_NAME))
+
+
+class TableWriter(object):
+    # write the record batches of one partition into save_dir/name/key=value/.../part-0.{ext}
+    def __init__(self, save_dir, name, partitions, schema, fmt):
+        pa = import_pyarrow()
+        xdir = os.path.join(
+            save_dir, name,
+            *['{:}={:}'.format(key, value) for key, value in partitions])
+        os.makedirs(xdir, exist_ok=True)
+        file_path = os.path.join(xdir, 'part-0.{:}'.format(ARROW_FORMATS[fmt]))
+        if fmt == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(file_path, schema)
+        else:
+            self.writer = pa.ipc.new_file(file_path, schema)
+        self.schema = schema
+
+    def write(self, columns):
+        pa = import_pyarrow()
+        self.writer.write_table(
+            pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+# chunk_size is the number of architectures in one batch (i.e., one row group of Parquet)
+def save_arrow(api, save_dir, fmt='parquet', chunk_size=1024):
+    pa = import_pyarrow()
+    assert fmt in ARROW_FORMATS, 'invalid format : {:} vs. {:}'.format(
+        fmt, list(ARROW_FORMATS.keys()))
+    os.makedirs(save_dir, exist_ok=True)
+    header = {'format': fmt, 'stores': dict()}
+    writer = TableWriter(
+        save_dir, 'archs', (),
+        pa.schema([('arch_index', pa.int64()), ('arch_str', pa.string()),
+                   ('evaluated', pa.bool_())]), fmt)
+    writer.write({
+        'arch_index': np.arange(len(api.meta_archs)),
+        'arch_str': list(api.meta_archs),
+        'evaluated': api.evaluated_masks
+    })
+    writer.close()
+    trial_schema = pa.schema([('arch_index', pa.int64()),
+                              ('trial', pa.int64()), ('seed', pa.int64()),
+                              ('epochs', pa.int32()), ('flops', pa.float64()),
+                              ('params', pa.float64()),
+                              ('latency', pa.float64())])
+    curve_schema = pa.schema([('arch_index', pa.int64()),
+                              ('trial', pa.int64()), ('seed', pa.int64()),
+                              ('epoch', pa.int32()), ('loss', pa.float64()),
+                              ('accuracy', pa.float64()), ('time',
+                                                           pa.float64()),
+                              ('all_time', pa.float64())])
+    for hp, store in (('less', api.metric_store_less),
+                      ('full', api.metric_store_full)):
+        arrays = store.get_arrays()
+        header['stores'][hp] = {
+            'datasets': store.datasets,
+            'setnames': store.setnames,
+            'shape': list(arrays['losses'].shape)
+        }
+        num_epochs = arrays['losses'].shape[3]
+        for idata, dataset in enumerate(store.datasets):
+            writer = TableWriter(save_dir, 'trials',
+                                 (('hp', hp), ('dataset', dataset)),
+                                 trial_schema, fmt)
+            for start in range(0, len(store), chunk_size):
+                xslice = slice(start, start + chunk_size)
+                masks = arrays['seeds'][xslice, idata] >= 0
+                indexes, trials = np.nonzero(masks)
+                columns = {'arch_index': indexes + start, 'trial': trials}
+                for column, name in TRIAL_COLUMNS:
+                    values = arrays[name][xslice, idata]
+                    columns[column] = values[masks]
+                writer.write(columns)
+            writer.close()
+            for iset, setname in enumerate(store.setnames):
+                writer = None
+                for start in range(0, len(store), chunk_size):
+                    xslice = slice(start, start + chunk_size)
+                    masks = arrays['set_masks'][xslice, idata, :, iset].copy()
+                    seeds = arrays['seeds'][xslice, idata]
+                    masks &= seeds >= 0
+                    epochs = arrays['epochs'][xslice, idata, :, None]
+                    epoch_masks = np.arange(num_epochs) < epochs
+                    masks = masks[:, :, None] & epoch_masks
+                    if not masks.any(): continue
+                    if writer is None:
+                        writer = TableWriter(save_dir, 'curves',
+                                             (('hp', hp), ('dataset', dataset),
+                                              ('setname', setname)),
+                                             curve_schema, fmt)
+                    indexes, trials, epochs = np.nonzero(masks)
+                    columns = {
+                        'arch_index': indexes + start,
+                        'trial': trials,
+                        'seed': seeds[indexes, trials],
+                        'epoch': epochs
+                    }
+                    for column, name in CURVE_COLUMNS:
+                        values = arrays[name][xslice, idata]
+                        columns[column] = values[:, :, :, iset][masks]
+                    writer.write(columns)
+                if writer is not None: writer.close()
+    # the header is written at last, so that an interrupted conversion does not look valid
+    with open(os.path.join(save_dir, ARROW_HEADER_NAME), 'w') as cfile:
+        json.dump(header, cfile)
+    return header
+
+
+def get_arrow_header(save_dir):
+    assert is_arrow_dir(save_dir), 'invalid arrow directory : {:}'.format(
+        save_dir)
+    with open(os.path.join(save_dir, ARROW_HEADER_NAME), 'r') as cfile:
+        return json.load(cfile)
+
+
+# the pyarrow dataset of one table (archs, trials, or curves), whose partition keys are also columns
+def open_table(save_dir, name):
+    pa = import_pyarrow()
+    assert name in TABLE_PARTITIONS, 'invalid table : {:} vs. {:}'.format(
+        name, list(TABLE_PARTITIONS.keys()))
+    fmt = get_arrow_header(save_dir)['format']
+    schema = pa.schema([(key, pa.string()) for key in TABLE_PARTITIONS[name]])
+    partitioning = pa.dataset.partitioning(schema, flavor='hive')
+    return pa.dataset.dataset(os.path.join(save_dir, name),
+                              format=fmt,
+                              partitioning=partitioning)
+
+
+# read the `columns` (None for all) of the rows satisfying `filter` (a pyarrow.dataset.Expression) as a pyarrow.Table
+def read_table(save_dir, name, columns=None, filter=None):
+    return open_table(save_dir, name).to_table(columns=columns, filter=filter)
+
+
+# return (meta_archs, evaluated_indexes, stores) as load_columnar, where the dense arrays are rebuilt from the tables
+def load_arrow(save_dir):
+    pa = import_pyarrow()
+    header = get_arrow_header(save_dir)
+    archs = read_table(save_dir, 'archs').sort_by('arch_index')
+    meta_archs = archs.column('arch_str').to_pylist()
+    evaluated_indexes = np.nonzero(
+        archs.column('evaluated').to_numpy())[0].tolist()
+    stores = dict()
+    for hp, xheader in header['stores'].items():
+        datasets, setnames = xheader['datasets'], xheader['setnames']
+        shape = tuple(xheader['shape'][:3])
+        arrays = {
+            'seeds': np.full(shape, -1, dtype=np.int64),
+            'epochs': np.zeros(shape, dtype=np.int32),
+            'set_masks': np.zeros(shape + (len(setnames), ), dtype=bool),
+            'flops': np.full(shape, np.nan, dtype=np.float64),
+            'params': np.full(shape, np.nan, dtype=np.float64),
+            'latencies': np.full(shape, np.nan, dtype=np.float64)
+        }
+        for _, name in CURVE_COLUMNS:
+            arrays[name] = np.full(xheader['shape'], np.nan, dtype=np.float64)
+        hp_filter = pa.dataset.field('hp') == hp
+        for idata, dataset in enumerate(datasets):
+            xfilter = hp_filter & (pa.dataset.field('dataset') == dataset)
+            table = read_table(save_dir, 'trials', filter=xfilter)
+            xkey = (table.column('arch_index').to_numpy(), idata,
+                    table.column('trial').to_numpy())
+            for column, name in TRIAL_COLUMNS:
+                arrays[name][xkey] = table.column(column).to_numpy()
+            for iset, setname in enumerate(setnames):
+                set_filter = pa.dataset.field('setname') == setname
+                table = read_table(save_dir,
+                                   'curves',
+                                   filter=xfilter & set_filter)
+                indexes = table.column('arch_index').to_numpy()
+                trials = table.column('trial').to_numpy()
+                xkey = (indexes, idata, trials,
+                        table.column('epoch').to_numpy(), iset)
+                arrays['set_masks'][indexes, idata, trials, iset] = True
+                for column, name in CURVE_COLUMNS:
+                    arrays[name][xkey] = table.column(column).to_numpy()
+        stores[hp] = MetricStore(datasets, setnames, arrays)
+    return meta_archs, evaluated_indexes, stores
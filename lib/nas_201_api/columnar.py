@@ -0,0 +1,75 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The flat on-disk layout of NAS-Bench-201, which does not rely on pickle.
+#   save_dir/meta.json         : architecture strings, evaluated indexes, and the dtype/shape of every array
+#   save_dir/{hp}-{name}.bin   : raw C-order bytes of the `name` array in the MetricStore of `hp` (less or full)
+# The arrays are opened via np.memmap, so creating the API takes milliseconds and
+# the pages are shared among processes through the OS page cache.
+#
+import json
+import os
+
+import numpy as np
+
+from .store import MetricStore
+
+HEADER_NAME = 'meta.json'
+
+
+def is_columnar_dir(path):
+    return os.path.isdir(path) and os.path.isfile(
+        os.path.join(path, HEADER_NAME))
+
+
+def save_columnar(api, save_dir):
+    os.makedirs(save_dir, exist_ok=True)
+    header = {
+        'meta_archs': list(api.meta_archs),
+        'evaluated_indexes': [int(x) for x in api.evaluated_indexes],
+        'stores': dict()
+    }
+    for hp, store in (('less', api.metric_store_less),
+                      ('full', api.metric_store_full)):
+        arrays = dict()
+        for name, array in store.get_arrays().items():
+            file_name = '{:}-{:}.bin'.format(hp, name)
+            array = np.ascontiguousarray(array)
+            array.tofile(os.path.join(save_dir, file_name))
+            arrays[name] = {
+                'file': file_name,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape)
+            }
+        header['stores'][hp] = {
+            'datasets': store.datasets,
+            'setnames': store.setnames,
+            'arrays': arrays
+        }
+    # the header is written at last, so that an interrupted conversion does not look valid
+    with open(os.path.join(save_dir, HEADER_NAME), 'w') as cfile:
+        json.dump(header, cfile)
+    return header
+
+
+# mmap_mode='c' is copy-on-write : the pages are shared until being written (e.g., by reload), and the files are never changed
+def load_columnar(save_dir, mmap_mode='c'):
+    assert is_columnar_dir(
+        save_dir), 'invalid columnar directory : {:}'.format(save_dir)
+    with open(os.path.join(save_dir, HEADER_NAME), 'r') as cfile:
+        header = json.load(cfile)
+    stores = dict()
+    for hp, xheader in header['stores'].items():
+        arrays = dict()
+        for name, info in xheader['arrays'].items():
+            dtype, shape = np.dtype(info['dtype']), tuple(info['shape'])
+            if int(np.prod(shape)) == 0:  # np.memmap can not map an empty file
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(os.path.join(save_dir, info['file']),
+                                         dtype=dtype,
+                                         mode=mmap_mode,
+                                         shape=shape)
+        stores[hp] = MetricStore(xheader['datasets'], xheader['setnames'],
+                                 arrays)
+    return header['meta_archs'], header['evaluated_indexes'], stores
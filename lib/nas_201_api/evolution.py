@@ -0,0 +1,137 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The regularized evolution (exps/algos/R_EA.py) of many independent trials in lock-step on a tabular benchmark.
+# The architectures are arch-indexes, and each cycle of all trials is a few numpy operations:
+#   population : [num-trials, population-size] ring buffers, where the oldest one of every trial is at `head`
+#   tournament : sample_size positions with replacement, and the parent is the first best one of them as `max`
+#   mutation   : the same distribution as mutate_arch_func, i.e., a random node, a random input edge, and a different op
+#   evaluation : evaluate_func(indexes) -> (accuracies, time-costs), e.g., one batched benchmark lookup of all trials
+# A trial stops when the cost of its next child exceeds the time budget, and the other trials go on.
+#
+import time
+
+import numpy as np
+
+from .space import CODE_BASES, NAS_BENCH_201_OPS, NUM_NODES, get_edge_index
+
+
+# the uniformly random arch-indexes with `shape`, i.e., random_architecture_func in R_EA on the full search space
+def random_indexes(encoder, shape, rng=None):
+    rng = np.random if rng is None else rng
+    return (rng.random(shape) * len(encoder)).astype(np.int64)
+
+
+# the vectorized mutate_arch_func of R_EA on the arch-indexes (an integer array with any shape), -1 if the child is not in the benchmark
+def mutate_indexes(encoder, indexes, rng=None):
+    rng = np.random if rng is None else rng
+    indexes = np.asarray(indexes, dtype=np.int64)
+    # the i-th node (1-based) has i input edges
+    nodes = 1 + (rng.random(indexes.shape) * (NUM_NODES - 1)).astype(np.int64)
+    xfroms = (rng.random(indexes.shape) * nodes).astype(np.int64)
+    edges = get_edge_index(nodes, xfroms)
+    old_ops = encoder.index2vector[indexes, edges].astype(np.int64)
+    new_ops = (rng.random(indexes.shape) *
+               (len(NAS_BENCH_201_OPS) - 1)).astype(np.int64)
+    new_ops += new_ops >= old_ops
+    codes = encoder.index2code[indexes] + (new_ops -
+                                           old_ops) * CODE_BASES[edges]
+    return encoder.code2index[codes]
+
+
+class BatchedEvolution(object):
+    def __init__(self,
+                 encoder,
+                 evaluate_func,
+                 num_trials,
+                 population_size,
+                 sample_size,
+                 time_budget,
+                 rng=None):
+        assert sample_size > 0 and population_size > 0, 'invalid sizes : {:} and {:}'.format(
+            sample_size, population_size)
+        self.encoder = encoder
+        self.evaluate_func = evaluate_func
+        self.num_trials = num_trials
+        self.population_size = population_size
+        self.sample_size = sample_size
+        self.time_budget = time_budget
+        self.rng = np.random if rng is None else rng
+
+    def __repr__(self):
+        return (
+            '{name}({num_trials} trials, population={population_size}, sample={sample_size}, budget={time_budget})'
+            .format(name=self.__class__.__name__, **self.__dict__))
+
+    def evaluate(self, indexes):
+        assert (indexes >= 0).all(), 'can not find {:} archs'.format(
+            (indexes < 0).sum())
+        accuracies, time_costs = self.evaluate_func(indexes)
+        accuracies = np.asarray(accuracies, dtype=np.float64)
+        return accuracies, np.asarray(time_costs, dtype=np.float64)
+
+    # Run all trials, and return a dict of
+    #   history/accuracies : [num-trials, max-length], the evaluated arch-indexes (-1 for padding) and their accuracies (NaN)
+    #   lengths            : [num-trials], the number of evaluated architectures of each trial
+    #   total-costs        : [num-trials], the searching cost of each trial, including the real cost of the evolution
+    #   best-indexes       : [num-trials], the most accurate one (the first one for the ties) in the history of each trial
+    def run(self):
+        num_trials, rng = self.num_trials, self.rng
+        trials = np.arange(num_trials)
+        population = np.zeros((num_trials, self.population_size),
+                              dtype=np.int64)
+        population_accs = np.zeros((num_trials, self.population_size))
+        total_costs = np.zeros(num_trials)
+        histories, history_accs = [], []
+        # initialize the population with random models, whose costs are always counted
+        for i in range(self.population_size):
+            children = random_indexes(self.encoder, num_trials, rng)
+            accuracies, time_costs = self.evaluate(children)
+            population[:, i], population_accs[:, i] = children, accuracies
+            total_costs += time_costs
+            histories.append(children)
+            history_accs.append(accuracies)
+        # carry out evolution in cycles, and each cycle replaces the oldest model of every active trial by a child
+        actives, head = total_costs < self.time_budget, 0
+        while actives.any():
+            start_time = time.time()
+            xtrials = trials[actives]
+            positions = (rng.random((len(xtrials), self.sample_size)) *
+                         self.population_size).astype(np.int64)
+            winners = population_accs[xtrials[:, None],
+                                      positions].argmax(axis=1)
+            parents = population[xtrials, positions[np.arange(len(xtrials)),
+                                                    winners]]
+            children = mutate_indexes(self.encoder, parents, rng)
+            # the real cost of the evolution is shared by the active trials
+            total_costs[xtrials] += (time.time() - start_time) / len(xtrials)
+            accuracies, time_costs = self.evaluate(children)
+            dones = total_costs[xtrials] + time_costs > self.time_budget
+            actives[xtrials[dones]] = False
+            xtrials, children = xtrials[~dones], children[~dones]
+            accuracies, time_costs = accuracies[~dones], time_costs[~dones]
+            total_costs[xtrials] += time_costs
+            population[xtrials, head] = children
+            population_accs[xtrials, head] = accuracies
+            head = (head + 1) % self.population_size
+            xhistory = np.full(num_trials, -1, dtype=np.int64)
+            xaccs = np.full(num_trials, np.nan)
+            xhistory[xtrials], xaccs[xtrials] = children, accuracies
+            histories.append(xhistory)
+            history_accs.append(xaccs)
+            actives &= total_costs < self.time_budget
+        histories = np.stack(histories, axis=1)
+        history_accs = np.stack(history_accs, axis=1)
+        # drop the last cycle without any child
+        lengths = (histories >= 0).sum(axis=1)
+        histories = histories[:, :max(lengths.max(), 1)]
+        history_accs = history_accs[:, :histories.shape[1]]
+        best_positions = np.where(np.isnan(history_accs), -np.inf,
+                                  history_accs).argmax(axis=1)
+        return {
+            'history': histories,
+            'accuracies': history_accs,
+            'lengths': lengths,
+            'total-costs': total_costs,
+            'best-indexes': histories[trials, best_positions]
+        }
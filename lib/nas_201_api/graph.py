@@ -0,0 +1,153 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The mutation graph of the NAS-Bench-201 search space, where two architectures are neighbors if they differ in
+# the op of exactly one edge (i.e., the mutation of R_EA), and the neighbors are stored in the CSR format, i.e.,
+#   the neighbors of the i-th node are indices[indptr[i]:indptr[i+1]], sorted by the edge and then the op-id
+# The nodes are the arch-indexes, or the class-ids of IsomorphismIndex for the graph collapsed by `collapse`,
+# where two classes are neighbors if any of their members are neighbors. `rng` is a numpy.random.Generator or
+# numpy.random (by default), so that the sampling and the random walks are vectorized over many nodes.
+#
+import numpy as np
+
+from .space import CODE_BASES, NAS_BENCH_201_OPS
+
+
+# the positions of the concatenated ranges [starts[i], ends[i])
+def get_range_positions(starts, ends):
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(int(lengths.sum()))
+
+
+# the Pearson correlation between x and y, where the NaN values are ignored, and NaN if it is undefined
+def get_pearson(xvalues, yvalues):
+    xvalues = np.asarray(xvalues, dtype=np.float64).reshape(-1)
+    yvalues = np.asarray(yvalues, dtype=np.float64).reshape(-1)
+    masks = ~np.isnan(xvalues) & ~np.isnan(yvalues)
+    if masks.sum() < 2: return np.nan
+    xvalues = xvalues[masks] - xvalues[masks].mean()
+    yvalues = yvalues[masks] - yvalues[masks].mean()
+    norm = np.sqrt((xvalues * xvalues).sum() * (yvalues * yvalues).sum())
+    return (xvalues * yvalues).sum() / norm if norm > 0 else np.nan
+
+
+class MutationGraph(object):
+    def __init__(self, indptr, indices):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.degrees = np.diff(self.indptr)
+        assert self.indptr[-1] == len(
+            self.indices), 'invalid CSR : {:} vs. {:}'.format(
+                self.indptr[-1], len(self.indices))
+        for array in (self.indptr, self.indices, self.degrees):
+            array.flags.writeable = False
+
+    # the graph of all architectures under the single-edge edits, and the edits to the codes out of the benchmark are ignored
+    @staticmethod
+    def create_from_encoder(encoder):
+        vectors = encoder.index2vector.astype(np.int64)[:, :, None]
+        op_ids = np.arange(len(NAS_BENCH_201_OPS))
+        # [num-archs, num-edges, num-ops] : the code after setting the op of the edge
+        codes = encoder.index2code[:, None, None] + (
+            op_ids - vectors) * CODE_BASES[:, None]
+        masks = op_ids != vectors
+        targets = np.where(masks, encoder.code2index[np.where(masks, codes,
+                                                              0)], -1)
+        targets = targets.reshape(len(encoder), -1)
+        masks = targets >= 0
+        indptr = np.zeros(len(encoder) + 1, dtype=np.int64)
+        np.cumsum(masks.sum(axis=1), out=indptr[1:])
+        return MutationGraph(indptr, targets[masks])
+
+    def __len__(self):
+        return len(self.degrees)
+
+    def __repr__(self):
+        return (
+            '{name}({num} nodes, {edges} edges, degree={min}-{max})'.format(
+                name=self.__class__.__name__,
+                num=len(self),
+                edges=len(self.indices),
+                min=int(self.degrees.min()) if len(self) > 0 else 0,
+                max=int(self.degrees.max()) if len(self) > 0 else 0))
+
+    # the graph of the isomorphism classes, which has no self-loop
+    def collapse(self, isomorphism_index):
+        num_class = len(isomorphism_index)
+        sources = isomorphism_index.class_ids[np.repeat(
+            np.arange(len(self)), self.degrees)]
+        targets = isomorphism_index.class_ids[self.indices]
+        masks = sources != targets
+        pairs = np.unique(sources[masks] * num_class + targets[masks])
+        indptr = np.zeros(num_class + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs // num_class, minlength=num_class),
+                  out=indptr[1:])
+        return MutationGraph(indptr, pairs % num_class)
+
+    def get_neighbors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    # the concatenated neighbors of `nodes`, and the node of each returned neighbor
+    def get_all_neighbors(self, nodes):
+        nodes = np.asarray(nodes, dtype=np.int64).reshape(-1)
+        positions = get_range_positions(self.indptr[nodes],
+                                        self.indptr[nodes + 1])
+        return self.indices[positions], np.repeat(nodes, self.degrees[nodes])
+
+    # a uniformly random neighbor of each node (with any shape), and the node itself if it has no neighbor
+    def sample_neighbors(self, nodes, rng=None):
+        rng = np.random if rng is None else rng
+        nodes = np.asarray(nodes, dtype=np.int64)
+        degrees = self.degrees[nodes]
+        offsets = (rng.random(nodes.shape) * degrees).astype(np.int64)
+        positions = np.minimum(self.indptr[nodes] + offsets,
+                               len(self.indices) - 1)
+        return np.where(degrees > 0, self.indices[positions], nodes)
+
+    # the random walks [num-walks, num-steps + 1] from `starts`, whose first column is the starts
+    def random_walks(self, starts, num_steps, rng=None):
+        starts = np.asarray(starts, dtype=np.int64).reshape(-1)
+        walks = np.zeros((len(starts), num_steps + 1), dtype=np.int64)
+        walks[:, 0] = starts
+        for step in range(num_steps):
+            walks[:, step + 1] = self.sample_neighbors(walks[:, step], rng)
+        return walks
+
+    # the number of edits (the shortest path) from the nearest one of `sources` to every node, -1 for the unreachable ones
+    def get_distances(self, sources):
+        distances = np.full(len(self), -1, dtype=np.int64)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64).reshape(-1))
+        distances[frontier] = 0
+        distance = 0
+        while len(frontier) > 0:
+            distance += 1
+            neighbors, _ = self.get_all_neighbors(frontier)
+            frontier = np.unique(neighbors[distances[neighbors] < 0])
+            distances[frontier] = distance
+        return distances
+
+    # The fitness distance correlation of the fitness `values` [num-nodes] (NaN for the missing ones), i.e., the Pearson
+    # correlation between the fitness and the distance to the nearest global optimum, which is close to -1 if the fitness
+    # increases towards the optimum (an easy landscape for the local search)
+    def get_fitness_distance_correlation(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        assert len(values) == len(self), 'invalid values : {:} vs. {:}'.format(
+            len(values), len(self))
+        assert not np.isnan(values).all(), 'there is no valid value'
+        optimums = np.nonzero(values == np.nanmax(values))[0]
+        distances = self.get_distances(optimums)
+        xdistances = np.where(distances >= 0, distances, np.nan)
+        return {
+            'fdc': get_pearson(values, xdistances),
+            'optimum-indexes': optimums,
+            'distances': distances
+        }
+
+    # the autocorrelation of the fitness `values` along the random walks [num-walks, num-steps + 1] with the lag of `lag` steps,
+    # which measures the ruggedness of the landscape (close to 1 for a smooth one)
+    def get_walk_autocorrelation(self, values, walks, lag=1):
+        values = np.asarray(values, dtype=np.float64)[walks]
+        assert 0 < lag < values.shape[-1], 'invalid lag : {:} vs. {:}'.format(
+            lag, values.shape[-1])
+        return get_pearson(values[..., :-lag], values[..., lag:])
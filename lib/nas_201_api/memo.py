@@ -0,0 +1,102 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The memoization of the benchmark queries, which is enabled by `api.enable_query_cache(max_size)`.
+# A search (e.g., R_EA, REINFORCE, BOHB) queries the same architectures again and again in hundreds of trials:
+#   is_random=False : the result of get_more_info is deterministic, and it is memoized as a whole
+#   is_random=True  : the metrics of all seeds are memoized, and a seed is still randomly drawn for each query,
+#                     i.e., the same calls of `random` as the uncached query, so that the search results do not change
+#
+import random
+import threading
+from collections import OrderedDict
+
+from .store import reduce_seed_metrics
+
+
+class QueryCache(object):
+    # an LRU cache of at most `max_size` entries (None means no limit), which is shared by the threads of BenchmarkServer
+    def __init__(self, max_size=None):
+        assert max_size is None or max_size > 0, 'invalid max_size : {:}'.format(
+            max_size)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # key -> value, the last one is the most recently used
+        self.entries = OrderedDict()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __repr__(self):
+        return (
+            '{name}({num}/{max_size} entries, hits={hits}, misses={misses}, hit-rate={rate:.2f}%, evictions={evictions})'
+            .format(
+                name=self.__class__.__name__,
+                num=len(self.entries),
+                max_size=self.max_size if self.max_size is not None else 'inf',
+                hits=self.hits,
+                misses=self.misses,
+                rate=self.hit_rate * 100,
+                evictions=self.evictions))
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self):
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.evictions
+        }
+
+    # return the cached value of `key`, or create it by create_func(), the exceptions of create_func are not cached
+    def get(self, key, create_func):
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        value = create_func()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while self.max_size is not None and len(
+                    self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class MemoArchMetrics(object):
+    # the ArchMetrics whose metrics of all seeds are memoized in `cache`, and get_metrics returns the same as ArchMetrics
+    def __init__(self, cache, archresult, hp):
+        self.cache = cache
+        self.archresult = archresult
+        self.hp = hp
+
+    def get_metrics(self, dataset, setname, iepoch=None, is_random=False):
+        store, index = self.archresult.store, self.archresult.arch_index
+        iepochs, infos = self.cache.get(
+            ('seed-metrics', index, dataset, setname, iepoch, self.hp),
+            lambda: store.get_seed_metrics(index, dataset, setname, iepoch))
+        if is_random: iseed = random.randint(0, len(iepochs) - 1)
+        else: iseed = None
+        return reduce_seed_metrics(iepochs, infos, iseed)
@@ -0,0 +1,266 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# A local query server of NAS-Bench-201, so that many search processes share one benchmark in memory.
+# The server and clients talk through multiprocessing.connection, i.e., a Unix socket (a file path) or
+# a loopback TCP address (host:port), and each connection is served by its own thread.
+# The messages are pickled, so a client must prove that it has the random authkey of the server, which is only
+# readable by the user (write_authkey), and the server only listens on the loopback unless `allow_remote` is True.
+#   server : server = BenchmarkServer(API(path), 'localhost:6201'), write_authkey(key_path, server.authkey), then server.serve_forever()
+#   client : api = BenchmarkClient('localhost:6201', read_authkey(key_path)), then use it as NASBench201API, or api.batch for many calls
+#
+import ipaddress
+import os
+import random
+import socket
+import threading
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from .store import ArchMetrics
+
+
+# 'host:port' -> (host, port), otherwise the path of a Unix socket
+def parse_address(address):
+    if isinstance(address, (tuple, list)): return tuple(address)
+    host, _, port = address.rpartition(':')
+    if host != '' and port.isdigit(): return (host, int(port))
+    else: return address
+
+
+# a Unix socket, or a TCP address whose host only resolves to the loopback addresses
+def is_loopback(address):
+    if not isinstance(address, tuple): return True
+    host, port = address
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        return False
+    return len(infos) > 0 and all(
+        ipaddress.ip_address(info[4][0]).is_loopback for info in infos)
+
+
+# save the authkey as hex in a new file that only the user can read and write
+def write_authkey(path, authkey):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, 'w') as xfile:
+        xfile.write(authkey.hex())
+
+
+def read_authkey(path):
+    with open(path, 'r') as xfile:
+        return bytes.fromhex(xfile.read().strip())
+
+
+# the Structure of the client is sent as the arch string, so that the server does not need to import `models`
+def to_message(value):
+    if hasattr(value, 'tostr'): return value.tostr()
+    elif isinstance(value, (list, tuple)):
+        return type(value)(to_message(x) for x in value)
+    else:
+        return value
+
+
+# the ArchMetrics of an architecture on the server (see query_meta_info_by_index), whose queries are sent by the client
+class RemoteArchMetrics(object):
+    methods = ('get_comput_costs', 'get_metrics', 'get_dataset_names')
+
+    def __init__(self, client, arch_index, arch_str, use_12epochs_result):
+        self.client = client
+        self.arch_index = arch_index
+        self.arch_str = arch_str
+        self.use_12epochs_result = use_12epochs_result
+
+    def remote(self, method, *args):
+        return self.client.remote('ArchMetrics.' + method, self.arch_index,
+                                  self.use_12epochs_result, *args)
+
+    def get_comput_costs(self, dataset):
+        return self.remote('get_comput_costs', dataset)
+
+    def get_metrics(self, dataset, setname, iepoch=None, is_random=False):
+        return self.remote('get_metrics', dataset, setname, iepoch, is_random)
+
+    def get_dataset_names(self):
+        return self.remote('get_dataset_names')
+
+    def arch_idx_str(self):
+        return '{:06d}'.format(self.arch_index)
+
+    def __repr__(self):
+        return (
+            '{name}(arch-index={index}, arch={arch}, client={client})'.format(
+                name=self.__class__.__name__,
+                index=self.arch_index,
+                arch=self.arch_str,
+                client=self.client))
+
+
+class BenchmarkServer(object):
+    # the public query methods of NASBench201API, the other methods (e.g., reload) are not served
+    methods = ('__len__', '__getitem__', 'random', 'query_index_by_arch',
+               'query_indexes_by_archs', 'query_by_arch', 'find_best',
+               'constrained_search', 'get_batch_metrics',
+               'get_learning_curves', 'get_subspace_masks', 'query_subspaces',
+               'subspace_search', 'get_subspace_correlations',
+               'get_mutation_graph', 'get_graph_fitness',
+               'get_fitness_distance_correlation', 'arch', 'get_more_info',
+               'sample_more_info', 'get_arch_encoder', 'query_ranks',
+               'get_rank_table', 'get_regrets', 'query_by_index',
+               'query_meta_info_by_index', 'enable_query_cache',
+               'get_net_param') + tuple('ArchMetrics.' + name
+                                        for name in RemoteArchMetrics.methods)
+    # the methods using the `random` module, which is re-seeded by the seed of the client for each call
+    random_methods = ('random', 'get_more_info', 'ArchMetrics.get_metrics')
+    # the methods with an `rng` argument (its position in args), which is a numpy Generator of the seed of the client
+    rng_methods = {'sample_more_info': 4}
+
+    # authkey=None creates a random one, and a non-loopback address requires allow_remote=True
+    def __init__(self, api, address, authkey=None, allow_remote=False):
+        self.api = api
+        self.address = parse_address(address)
+        if not allow_remote and not is_loopback(self.address):
+            raise ValueError(
+                '{:} is not a loopback address, set allow_remote=True to serve it'
+                .format(address))
+        self.authkey = os.urandom(32) if authkey is None else authkey
+        self.listener = None
+        self.random_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.num_connections, self.num_calls = 0, 0
+
+    def __repr__(self):
+        return (
+            '{name}(address={address}, api={api}, {conns} connections, {calls} calls)'
+            .format(name=self.__class__.__name__,
+                    address=self.address,
+                    api=self.api,
+                    conns=self.num_connections,
+                    calls=self.num_calls))
+
+    def call(self, method, args, kwargs, seed):
+        if method not in self.methods:
+            raise AttributeError('{:} does not support {:}'.format(
+                self.__class__.__name__, method))
+        if method == 'enable_query_cache':
+            # the cache is shared by all clients, so that it is created once and is not sent back
+            if self.api.query_cache is None:
+                self.api.enable_query_cache(*args, **kwargs)
+            return None
+        if method.startswith('ArchMetrics.'):
+            # args are (arch_index, use_12epochs_result, the args of the ArchMetrics method)
+            metrics = self.api.query_meta_info_by_index(*args[:2])
+            func, args = getattr(metrics, method.split('.')[1]), args[2:]
+        else:
+            func = getattr(self.api, method)
+        if method in self.rng_methods:
+            kwargs = dict(kwargs, rng=np.random.default_rng(seed))
+        if method in self.random_methods:
+            with self.random_lock:
+                random.seed(seed)
+                result = func(*args, **kwargs)
+        else:
+            result = func(*args, **kwargs)
+        # the ArchMetrics is a view of the whole metric store, so that it is queried on the server
+        if isinstance(result, ArchMetrics):
+            result = RemoteArchMetrics(
+                None, result.arch_index, result.arch_str,
+                result.store is self.api.metric_store_less)
+        return result
+
+    # each request is a list of (method, args, kwargs, seed), and the reply is a list of (is_ok, result-or-exception)
+    def handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    calls = conn.recv()
+                except EOFError:
+                    break
+                replies = []
+                for method, args, kwargs, seed in calls:
+                    try:
+                        replies.append(
+                            (True, self.call(method, args, kwargs, seed)))
+                    except Exception as e:
+                        replies.append((False, e))
+                with self.stats_lock:
+                    self.num_calls += len(calls)
+                conn.send(replies)
+
+    def serve_forever(self):
+        self.listener = Listener(self.address, authkey=self.authkey)
+        try:
+            while True:
+                conn = self.listener.accept()
+                with self.stats_lock:
+                    self.num_connections += 1
+                thread = threading.Thread(target=self.handle,
+                                          args=(conn, ),
+                                          daemon=True)
+                thread.start()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+
+
+class BenchmarkClient(object):
+    # authkey is the one of the server, e.g., read_authkey(the key file of the server)
+    def __init__(self, address, authkey):
+        self.address = parse_address(address)
+        self.conn = Client(self.address, authkey=authkey)
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return ('{name}(address={address})'.format(
+            name=self.__class__.__name__, address=self.address))
+
+    # calls is a list of (method, args) or (method, args, kwargs), and the results are returned in the same order.
+    # It raises the first exception on the server, unless return_exceptions is True.
+    def batch(self, calls, return_exceptions=False):
+        messages = []
+        for call in calls:
+            method, args = call[0], to_message(tuple(call[1]))
+            kwargs = call[2] if len(call) > 2 else dict()
+            kwargs = {key: to_message(value) for key, value in kwargs.items()}
+            seed = random.randint(0, 2**31 - 1)
+            if method in BenchmarkServer.rng_methods:
+                # the rng of the client only draws the seed, which creates the rng on the server
+                position = BenchmarkServer.rng_methods[method]
+                rng = args[position] if len(args) > position else kwargs.pop(
+                    'rng', None)
+                args = args[:position]
+                if rng is not None: seed = int(rng.random() * (2**31 - 1))
+            messages.append((method, args, kwargs, seed))
+        with self.lock:
+            self.conn.send(messages)
+            replies = self.conn.recv()
+        results = []
+        for is_ok, result in replies:
+            if not is_ok and not return_exceptions: raise result
+            if isinstance(result, RemoteArchMetrics): result.client = self
+            results.append(result)
+        return results
+
+    def remote(self, method, *args, **kwargs):
+        return self.batch([(method, args, kwargs)])[0]
+
+    def __getattr__(self, name):
+        if name not in BenchmarkServer.methods:
+            raise AttributeError('{:} does not support {:}'.format(
+                self.__class__.__name__, name))
+        return lambda *args, **kwargs: self.remote(name, *args, **kwargs)
+
+    def __len__(self):
+        return self.remote('__len__')
+
+    def __getitem__(self, index):
+        return self.remote('__getitem__', index)
+
+    def close(self):
+        self.conn.close()
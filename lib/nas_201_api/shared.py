@@ -0,0 +1,137 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# Put the metric arrays of NASBench201API into multiprocessing.shared_memory blocks, so that the workers of a
+# process pool attach to them by name without copying or unpickling the benchmark.
+#   parent : shared = SharedBenchmark.create_from_api(api), and pass `shared` to the workers (only the names are pickled)
+#   worker : api = NASBench201API(shared), whose metric arrays are read-only views of the shared blocks
+#   parent : shared.unlink() when all workers finish
+#
+import secrets
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .store import MetricStore
+
+ATTACH_LOCK = threading.Lock()
+
+
+# The block is owned by the creator, so that the attached process should not track (and unlink) it at exit.
+# Before python 3.13 (track=False), the registration is skipped, since unregistering it in a forked worker
+# would also remove the registration of the creator from their shared resource tracker.
+def attach_shared_memory(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedBenchmark(object):
+    def __init__(self, header, blocks, is_owner):
+        # header : the names, dtypes, and shapes of all blocks, which is the only thing to be pickled
+        self.header = header
+        self.blocks = blocks
+        self.is_owner = is_owner
+
+    @staticmethod
+    def create_from_api(api):
+        prefix = 'nb201-{:}'.format(secrets.token_hex(4))
+        blocks = dict()
+
+        def share(key, array):
+            array = np.ascontiguousarray(array)
+            name = '{:}-{:}'.format(prefix, key)
+            # SharedMemory does not support zero size
+            block = shared_memory.SharedMemory(name=name,
+                                               create=True,
+                                               size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype,
+                       buffer=block.buf)[...] = array
+            blocks[name] = block
+            return {
+                'name': name,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape)
+            }
+
+        meta_archs = np.frombuffer('\n'.join(api.meta_archs).encode('utf-8'),
+                                   dtype=np.uint8)
+        evaluated_indexes = np.array(api.evaluated_indexes, dtype=np.int64)
+        header = dict(meta_archs=share('meta_archs', meta_archs),
+                      evaluated_indexes=share('evaluated_indexes',
+                                              evaluated_indexes),
+                      stores=dict())
+        for hp, store in (('less', api.metric_store_less),
+                          ('full', api.metric_store_full)):
+            header['stores'][hp] = {
+                'datasets': store.datasets,
+                'setnames': store.setnames,
+                'arrays': {
+                    name: share('{:}-{:}'.format(hp, name), array)
+                    for name, array in store.get_arrays().items()
+                }
+            }
+        return SharedBenchmark(header, blocks, True)
+
+    def __getstate__(self):
+        return {'header': self.header}
+
+    def __setstate__(self, state):
+        self.header = state['header']
+        self.blocks = dict()
+        self.is_owner = False
+
+    def __repr__(self):
+        return ('{name}({num} blocks, {size:.1f} MB, owner={owner})'.format(
+            name=self.__class__.__name__,
+            num=len(self.blocks),
+            size=sum(block.size for block in self.blocks.values()) / 1e6,
+            owner=self.is_owner))
+
+    def get_array(self, info):
+        if info['name'] not in self.blocks:
+            self.blocks[info['name']] = attach_shared_memory(info['name'])
+        array = np.ndarray(tuple(info['shape']),
+                           dtype=np.dtype(info['dtype']),
+                           buffer=self.blocks[info['name']].buf)
+        array.flags.writeable = False
+        return array
+
+    # return (meta_archs, evaluated_indexes, stores) as load_columnar
+    def attach(self):
+        meta_archs = self.get_array(self.header['meta_archs'])
+        meta_archs = bytes(meta_archs).decode('utf-8').split('\n')
+        evaluated_indexes = self.get_array(
+            self.header['evaluated_indexes']).tolist()
+        stores = dict()
+        for hp, xheader in self.header['stores'].items():
+            arrays = {
+                name: self.get_array(info)
+                for name, info in xheader['arrays'].items()
+            }
+            stores[hp] = MetricStore(xheader['datasets'], xheader['setnames'],
+                                     arrays)
+        return meta_archs, evaluated_indexes, stores
+
+    def close(self):
+        for block in self.blocks.values():
+            try:
+                block.close()
+            except BufferError:  # still used by some arrays, which is released with these arrays
+                pass
+        self.blocks = dict()
+
+    # only the owner can unlink the blocks, which are removed after all processes close them
+    def unlink(self):
+        assert self.is_owner, 'only the owner can unlink the shared blocks'
+        for block in self.blocks.values():
+            block.unlink()
+        self.close()
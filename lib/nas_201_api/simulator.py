@@ -0,0 +1,162 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The discrete-event simulation of an asynchronous parallel search on the benchmark with `num_workers` virtual workers.
+# A searcher has the ask/tell interface, i.e., ask() -> an arch-index to evaluate, and tell(index, accuracy) once the
+# evaluation of this arch finishes, where the other evaluations may be still running (e.g., the asynchronous evolution).
+#   events     : an idle worker asks for an arch at once, whose evaluation by evaluate_func(index) -> (accuracy, time-cost)
+#                finishes after time-cost simulated seconds, and the evaluations are told in the order of the finish time
+#                (the ties are in the order of the start)
+#   barriers   : ask() returns None if the searcher waits for the running evaluations (e.g., a rung of successive halving),
+#                then the worker is idle and asks again after the next tell, i.e., an evaluation starts at the later one of
+#                the time when its worker is free and the time when the results it depends on are told
+#   the budget : the search ends at the time budget (or when all workers are idle), and the unfinished evaluations are dropped
+# With one worker, the simulation is the sequential search of exps/algos, whose time cost is the sum of the evaluations.
+#
+import heapq
+from collections import deque
+
+import numpy as np
+
+from .evolution import mutate_indexes, random_indexes
+
+
+# the position of the most accurate one (the first one for the ties, NaN is ignored) after each finished evaluation
+def get_incumbent_positions(accuracies):
+    accuracies = np.asarray(accuracies, dtype=np.float64)
+    if len(accuracies) == 0: return np.zeros(0, dtype=np.int64)
+    values = np.where(np.isnan(accuracies), -np.inf, accuracies)
+    previous = np.maximum.accumulate(np.concatenate(([-np.inf], values[:-1])))
+    positions = np.where(values > previous, np.arange(len(values)), 0)
+    return np.maximum.accumulate(positions)
+
+
+# the values [..., num-evaluations] at each time of `times`, where the value at t is the last one finished before or at t,
+# and NaN if there is no finished evaluation at t
+def get_values_at(finish_times, values, times):
+    positions = np.searchsorted(finish_times, times, side='right') - 1
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[-1] == 0:
+        return np.full(values.shape[:-1] + np.shape(times), np.nan)
+    return np.where(positions >= 0, values[..., np.maximum(positions, 0)],
+                    np.nan)
+
+
+# the first finish time when the value reaches the target (value >= target), inf if it never reaches
+def get_time_to_target(finish_times, values, target):
+    reaches = np.nonzero(np.asarray(values) >= target)[0]
+    return finish_times[reaches[0]] if len(reaches) > 0 else np.inf
+
+
+class ParallelSimulator(object):
+    def __init__(self, evaluate_func, num_workers, time_budget):
+        assert num_workers > 0, 'invalid num_workers : {:}'.format(num_workers)
+        self.evaluate_func = evaluate_func
+        self.num_workers = num_workers
+        self.time_budget = time_budget
+
+    def __repr__(self):
+        return ('{name}({num_workers} workers, budget={time_budget})'.format(
+            name=self.__class__.__name__, **self.__dict__))
+
+    # the idle workers (in the order of their ids) start the evaluations of the asked archs at `now` until the searcher
+    # waits, and return the number of the started evaluations
+    def dispatch(self, searcher, events, idles, now, num_started):
+        idles.sort()
+        while len(idles) > 0:
+            index = searcher.ask()
+            if index is None: break
+            worker, (accuracy, cost) = idles.pop(0), self.evaluate_func(index)
+            heapq.heappush(
+                events,
+                (now + cost, num_started, worker, now, index, accuracy))
+            num_started += 1
+        return num_started
+
+    # Run the searcher until the time budget, and return a dict of
+    #   indexes/accuracies       : [num-evaluations], the finished evaluations in the order of their finish times
+    #   start-times/finish-times : [num-evaluations], the simulated time when each evaluation starts and finishes
+    #   workers                  : [num-evaluations], the worker of each evaluation
+    #   incumbents               : [num-evaluations], the most accurate arch-index after each finished evaluation
+    #   utilization              : the time of the finished evaluations over num-workers x budget, i.e., the unfinished
+    #                              evaluations at the time budget are wasted
+    def run(self, searcher):
+        events, finishes, busy_time = [], [], 0
+        idles = list(range(self.num_workers))
+        num_started = self.dispatch(searcher, events, idles, 0, 0)
+        while len(events) > 0 and events[0][0] <= self.time_budget:
+            finish_time, _, worker, start_time, index, accuracy = heapq.heappop(
+                events)
+            busy_time += finish_time - start_time
+            searcher.tell(index, accuracy)
+            finishes.append((index, accuracy, start_time, finish_time, worker))
+            idles.append(worker)
+            num_started = self.dispatch(searcher, events, idles, finish_time,
+                                        num_started)
+        if len(finishes) > 0:
+            indexes, accuracies, start_times, finish_times, workers = [
+                np.array(x) for x in zip(*finishes)
+            ]
+        else:
+            indexes, accuracies, start_times, finish_times, workers = [
+                np.zeros(0)
+            ] * 5
+        indexes = indexes.astype(np.int64)
+        incumbents = indexes[get_incumbent_positions(accuracies)]
+        capacity = self.num_workers * self.time_budget
+        return {
+            'indexes': indexes,
+            'accuracies': accuracies.astype(np.float64),
+            'start-times': start_times.astype(np.float64),
+            'finish-times': finish_times.astype(np.float64),
+            'workers': workers.astype(np.int64),
+            'incumbents': incumbents,
+            'utilization': busy_time / capacity if capacity > 0 else 0.0
+        }
+
+
+# the random search (exps/algos/RANDOM.py on the full search space) of the ask/tell interface
+class RandomSearcher(object):
+    def __init__(self, encoder, rng=None):
+        self.encoder = encoder
+        self.rng = np.random if rng is None else rng
+
+    def ask(self):
+        return int(random_indexes(self.encoder, 1, self.rng)[0])
+
+    def tell(self, index, accuracy):
+        pass
+
+
+# The asynchronous regularized evolution, whose population is the latest `population_size` finished archs, and a new arch
+# is random until the population is full, otherwise the mutation of the best one of `sample_size` random members, i.e.,
+# the same as R_EA with one worker
+class EvolutionSearcher(object):
+    def __init__(self, encoder, population_size, sample_size, rng=None):
+        assert sample_size > 0 and population_size > 0, 'invalid sizes : {:} and {:}'.format(
+            sample_size, population_size)
+        self.encoder = encoder
+        self.population_size = population_size
+        self.sample_size = sample_size
+        self.rng = np.random if rng is None else rng
+        self.population = deque()
+
+    def ask(self):
+        if len(self.population) < self.population_size:
+            return int(random_indexes(self.encoder, 1, self.rng)[0])
+        positions = (self.rng.random(self.sample_size) *
+                     len(self.population)).astype(np.int64)
+        # the first best one of the samples
+        parent, best_acc = None, None
+        for position in positions:
+            index, accuracy = self.population[position]
+            if best_acc is None or accuracy > best_acc:
+                parent, best_acc = index, accuracy
+        child = int(mutate_indexes(self.encoder, [parent], self.rng)[0])
+        assert child >= 0, 'can not find the child of {:}'.format(parent)
+        return child
+
+    def tell(self, index, accuracy):
+        self.population.append((index, accuracy))
+        if len(self.population) > self.population_size:
+            self.population.popleft()
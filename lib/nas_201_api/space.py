@@ -0,0 +1,253 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The utilities of the NAS-Bench-201 search space, which only rely on the architecture strings,
+# so that they do not import `models` and work with the standalone `nas_201_api` package.
+#
+import numpy as np
+
+
+# parse '|op~0|+|op~0|op~1|+...' into a tuple of nodes, each node is a tuple of (op-name, input-node-index)
+def str2nodes(arch_str):
+    assert isinstance(arch_str,
+                      str), 'must take string (not {:}) as input'.format(
+                          type(arch_str))
+    nodes = []
+    for node_str in arch_str.split('+'):
+        inputs = [x for x in node_str.split('|') if x != '']
+        for xinput in inputs:
+            assert len(xinput.split(
+                '~')) == 2, 'invalid input length : {:}'.format(xinput)
+        nodes.append(
+            tuple(
+                (op, int(IDX)) for op, IDX in (x.split('~') for x in inputs)))
+    return tuple(nodes)
+
+
+# the same canonical string as Structure.to_unique_str, two architectures are isomorphic if their strings are equal
+def to_unique_str(nodes, consider_zero=True):
+    if isinstance(nodes, str): nodes = str2nodes(nodes)
+    xnodes = {0: '0'}
+    for i_node, node_info in enumerate(nodes):
+        cur_node = []
+        for op, xin in node_info:
+            if consider_zero is None:
+                x = '(' + xnodes[xin] + ')' + '@{:}'.format(op)
+            elif consider_zero:
+                if op == 'none' or xnodes[xin] == '#': x = '#'  # zero
+                elif op == 'skip_connect': x = xnodes[xin]
+                else: x = '(' + xnodes[xin] + ')' + '@{:}'.format(op)
+            else:
+                if op == 'skip_connect': x = xnodes[xin]
+                else: x = '(' + xnodes[xin] + ')' + '@{:}'.format(op)
+            cur_node.append(x)
+        xnodes[i_node + 1] = '+'.join(sorted(cur_node))
+    return xnodes[len(nodes)]
+
+
+# The equivalence classes of isomorphic architectures, where all arrays are indexed by the arch-index or the class-id.
+#   class_ids       : [num-archs], the class-id of each architecture (class-ids follow the order of their first architecture)
+#   representatives : [num-classes], the smallest arch-index in each class
+#   members/offsets : the arch-indexes of the c-th class are members[offsets[c]:offsets[c+1]] (in the ascending order)
+class IsomorphismIndex(object):
+    def __init__(self, unique_strs, class_ids, consider_zero=True):
+        self.unique_strs = list(unique_strs)
+        self.consider_zero = consider_zero
+        self.class_ids = np.asarray(class_ids, dtype=np.int64)
+        self.members = np.argsort(self.class_ids, kind='stable')
+        self.class_sizes = np.bincount(self.class_ids,
+                                       minlength=len(self.unique_strs))
+        self.offsets = np.zeros(len(self.unique_strs) + 1, dtype=np.int64)
+        np.cumsum(self.class_sizes, out=self.offsets[1:])
+        self.representatives = self.members[self.offsets[:-1]]
+        self.unique2class = {
+            xstr: index
+            for index, xstr in enumerate(self.unique_strs)
+        }
+        for array in (self.class_ids, self.members, self.class_sizes,
+                      self.offsets, self.representatives):
+            array.flags.writeable = False
+
+    @staticmethod
+    def create_from_archs(arch_strs, consider_zero=True):
+        unique2class, unique_strs, class_ids = dict(), [], []
+        for arch_str in arch_strs:
+            xstr = to_unique_str(arch_str, consider_zero)
+            if xstr not in unique2class:
+                unique2class[xstr] = len(unique_strs)
+                unique_strs.append(xstr)
+            class_ids.append(unique2class[xstr])
+        return IsomorphismIndex(unique_strs, class_ids, consider_zero)
+
+    def __len__(self):
+        return len(self.unique_strs)
+
+    def __repr__(self):
+        return (
+            '{name}({num} classes for {total} architectures, consider_zero={zero})'
+            .format(name=self.__class__.__name__,
+                    num=len(self),
+                    total=len(self.class_ids),
+                    zero=self.consider_zero))
+
+    # arch-indexes -> class-ids, a scalar index returns a scalar
+    def get_class_ids(self, indexes):
+        return self.class_ids[indexes]
+
+    # arch-indexes -> the arch-indexes of their representatives
+    def get_representatives(self, indexes):
+        return self.representatives[self.class_ids[indexes]]
+
+    def is_representative(self, indexes):
+        return self.get_representatives(indexes) == indexes
+
+    # class-id -> all its arch-indexes
+    def get_members(self, class_id):
+        return self.members[self.offsets[class_id]:self.offsets[class_id + 1]]
+
+    # class-ids -> the concatenated arch-indexes of these classes, and the class-id of each returned arch-index
+    def get_all_members(self, class_ids):
+        class_ids = np.asarray(class_ids, dtype=np.int64).reshape(-1)
+        sizes = self.class_sizes[class_ids]
+        starts = np.repeat(self.offsets[class_ids] - np.cumsum(sizes) + sizes,
+                           sizes)
+        positions = starts + np.arange(int(sizes.sum()))
+        return self.members[positions], np.repeat(class_ids, sizes)
+
+    # remove the isomorphic duplicates and keep the first appearance of each class
+    def deduplicate(self, indexes):
+        indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+        _, positions = np.unique(self.class_ids[indexes], return_index=True)
+        return indexes[np.sort(positions)]
+
+    def get_class_id_by_unique_str(self, unique_str):
+        return self.unique2class.get(unique_str, -1)
+
+
+# The integer encoding of the NAS-Bench-201 cells, where the op-ids follow OPS_CODING in models/cell_operations.py.
+# A cell is a uint8 vector of its 6 edges, i.e., (1<-0), (2<-0), (2<-1), (3<-0), (3<-1), (3<-2), and its code is the
+# base-5 integer of this vector (the first edge is the most significant digit), so that the codes are in [0, 5^6).
+NAS_BENCH_201_OPS = ('none', 'skip_connect', 'nor_conv_1x1', 'nor_conv_3x3',
+                     'avg_pool_3x3')
+NUM_NODES = 4
+NUM_EDGES = NUM_NODES * (NUM_NODES - 1) // 2
+NUM_CODES = len(NAS_BENCH_201_OPS)**NUM_EDGES
+CODE_BASES = len(NAS_BENCH_201_OPS)**np.arange(NUM_EDGES - 1, -1, -1)
+OP2ID = {op: index for index, op in enumerate(NAS_BENCH_201_OPS)}
+
+
+def get_edge_index(to_node, from_node):
+    return (to_node - 1) * to_node // 2 + from_node
+
+
+# an arch string, a Structure, or the nodes of str2nodes -> a uint8 vector of 6 op-ids
+def encode_vector(arch):
+    if isinstance(arch, str): nodes = str2nodes(arch)
+    elif hasattr(arch, 'nodes'): nodes = arch.nodes
+    else: nodes = arch
+    assert len(nodes) == NUM_NODES - 1, 'invalid number of nodes : {:}'.format(
+        len(nodes))
+    vector = np.zeros(NUM_EDGES, dtype=np.uint8)
+    for i_node, node_info in enumerate(nodes):
+        assert len(node_info) == i_node + 1, 'invalid node : {:}'.format(
+            node_info)
+        for op, xin in node_info:
+            vector[get_edge_index(i_node + 1, xin)] = OP2ID[op]
+    return vector
+
+
+def encode_vectors(archs):
+    vectors = np.zeros((len(archs), NUM_EDGES), dtype=np.uint8)
+    for i, arch in enumerate(archs):
+        vectors[i] = encode_vector(arch)
+    return vectors
+
+
+# [..., 6] vectors <-> [...] codes
+def vectors_to_codes(vectors):
+    return np.asarray(vectors, dtype=np.int64) @ CODE_BASES
+
+
+def codes_to_vectors(codes):
+    codes = np.asarray(codes, dtype=np.int64)
+    vectors = (codes[..., None] // CODE_BASES) % len(NAS_BENCH_201_OPS)
+    return vectors.astype(np.uint8)
+
+
+# a vector -> the nodes, which can be used to create a Structure, i.e., Structure(vector_to_nodes(vector))
+def vector_to_nodes(vector):
+    return tuple(
+        tuple((NAS_BENCH_201_OPS[vector[get_edge_index(i_node, xin)]], xin)
+              for xin in range(i_node)) for i_node in range(1, NUM_NODES))
+
+
+def vector_to_str(vector):
+    strings = []
+    for node_info in vector_to_nodes(vector):
+        string = '|'.join([op + '~{:}'.format(xin) for op, xin in node_info])
+        strings.append('|{:}|'.format(string))
+    return '+'.join(strings)
+
+
+# the op subsets (e.g., models.get_sub_search_spaces('cell', 2)) -> the boolean masks [num-subsets, num-ops] of the op-ids
+def get_op_masks(subspaces):
+    op_masks = np.zeros((len(subspaces), len(NAS_BENCH_201_OPS)), dtype=bool)
+    for i, ops in enumerate(subspaces):
+        for op in ops:
+            assert op in OP2ID, 'invalid op : {:} vs. {:}'.format(
+                op, NAS_BENCH_201_OPS)
+            op_masks[i, OP2ID[op]] = True
+    return op_masks
+
+
+# The mapping between the codes (or vectors) and the arch-indexes of the benchmark, whose order is not the order of codes.
+#   index2code : [num-archs], code2index : [5^6] with -1 for the codes that are not in the benchmark
+class ArchEncoder(object):
+    def __init__(self, index2code):
+        self.index2code = np.asarray(index2code, dtype=np.int64)
+        self.code2index = np.full(NUM_CODES, -1, dtype=np.int64)
+        self.code2index[self.index2code] = np.arange(len(self.index2code))
+        assert (self.code2index >= 0).sum() == len(
+            self.index2code), 'there are duplicate architectures'
+        self.index2vector = codes_to_vectors(self.index2code)
+        for array in (self.index2code, self.code2index, self.index2vector):
+            array.flags.writeable = False
+
+    @staticmethod
+    def create_from_archs(arch_strs):
+        return ArchEncoder(vectors_to_codes(encode_vectors(arch_strs)))
+
+    def __len__(self):
+        return len(self.index2code)
+
+    def __repr__(self):
+        return (
+            '{name}({num} architectures, {edges} edges x {ops} ops)'.format(
+                name=self.__class__.__name__,
+                num=len(self),
+                edges=NUM_EDGES,
+                ops=len(NAS_BENCH_201_OPS)))
+
+    def indexes_to_codes(self, indexes):
+        return self.index2code[indexes]
+
+    def codes_to_indexes(self, codes):
+        return self.code2index[codes]
+
+    def indexes_to_vectors(self, indexes):
+        return self.index2vector[indexes]
+
+    def vectors_to_indexes(self, vectors):
+        return self.code2index[vectors_to_codes(vectors)]
+
+    # the sub-search-spaces of the op subsets -> the boolean masks [num-subsets, num-archs],
+    # where an architecture is in a subspace if all its edges only use the ops of this subset
+    def get_subspace_masks(self, subspaces):
+        op_masks = get_op_masks(subspaces)
+        return op_masks[:, self.index2vector].all(axis=2)
+
+    # an arch string, a Structure, or a vector -> the arch-index (-1 if it is not in the benchmark)
+    def get_index(self, arch):
+        if isinstance(arch, np.ndarray): vector = arch
+        else: vector = encode_vector(arch)
+        return int(self.code2index[vectors_to_codes(vector)])
@@ -0,0 +1,716 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The columnar storage of NAS-Bench-201.
+# All results of one fidelity (12 epochs or 200 epochs) are kept in dense numpy
+# arrays indexed by [arch, dataset, seed, epoch, eval-set], where a missing
+# trial has seed=-1 and missing metrics are NaN.
+#
+import random
+from operator import itemgetter
+
+import numpy as np
+
+
+def gather_values(container, keys):
+    # read `keys` from a dict (or list) in one C-level call
+    if len(keys) == 1: return [container[keys[0]]]
+    try:
+        return list(itemgetter(*keys)(container))
+    except KeyError:  # the old-version results may miss some epochs
+        return [container.get(key, None) for key in keys]
+
+
+def to_float(value):
+    return None if value is None or np.isnan(value) else float(value)
+
+
+# the cumulative times over epochs (the second last axis), which are accumulated in float64 and kept in the dtype of `times`
+def get_cum_times(times):
+    return np.cumsum(times, axis=-2, dtype=np.float64).astype(times.dtype)
+
+
+# the metrics of the iseed-th seed as ArchResults.get_metrics with is_random, or the mean over all seeds if iseed is None
+def reduce_seed_metrics(iepochs, infos, iseed=None):
+    if iseed is not None:
+        return_info = {'iepoch': iepochs[iseed]}
+        for key, value in infos.items():
+            return_info[key] = to_float(value[iseed])
+    else:
+        return_info = {'iepoch': np.mean(iepochs)}
+        for key, value in infos.items():
+            if np.isnan(value[0]): return_info[key] = None
+            else: return_info[key] = np.float64(sum(value) / len(value))
+    return return_info
+
+
+# the 0-based ranks (ascending) of the values, where the tied values share their average rank
+def get_average_ranks(values):
+    order = np.argsort(values, kind='stable')
+    _, inverse, counts = np.unique(values[order],
+                                   return_inverse=True,
+                                   return_counts=True)
+    ends = np.cumsum(counts)
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[order] = ((ends - counts + ends - 1) / 2.0)[inverse]
+    return ranks
+
+
+# the Spearman rank correlations between x and y [num-archs] within each of the masks [K, num-archs], where the NaN values
+# are ignored, and the correlation is NaN if there are less than two architectures or the ranks are constant
+def get_rank_correlations(masks, xvalues, yvalues):
+    masks = np.asarray(masks, dtype=bool).reshape(-1, len(xvalues))
+    masks = masks & ~np.isnan(xvalues) & ~np.isnan(yvalues)
+    correlations = np.full(len(masks), np.nan)
+    for i, xmasks in enumerate(masks):
+        if xmasks.sum() < 2: continue
+        xranks = get_average_ranks(xvalues[xmasks])
+        yranks = get_average_ranks(yvalues[xmasks])
+        xranks, yranks = xranks - xranks.mean(), yranks - yranks.mean()
+        norm = np.sqrt((xranks * xranks).sum() * (yranks * yranks).sum())
+        if norm > 0: correlations[i] = (xranks * yranks).sum() / norm
+    return correlations
+
+
+class MetricStore(object):
+    # the arrays that fully describe a store, used for saving and sharing
+    array_names = ('seeds', 'epochs', 'set_masks', 'losses', 'accuracies',
+                   'times', 'cum_times', 'flops', 'params', 'latencies')
+
+    # dataset_indexes are the positions of `datasets` on the dataset axis of the arrays (None for 0, 1, ...), and the trials
+    # of the seeds not in `seeds` (None for all) are masked out, see select
+    def __init__(self,
+                 datasets,
+                 setnames,
+                 arrays,
+                 dataset_indexes=None,
+                 seeds=None):
+        self.datasets = list(datasets)
+        self.setnames = list(setnames)
+        assert self.setnames[0] == 'train', 'invalid setnames : {:}'.format(
+            self.setnames)
+        if dataset_indexes is None:
+            dataset_indexes = range(len(self.datasets))
+        self.dataset2index = {
+            name: int(index)
+            for name, index in zip(self.datasets, dataset_indexes)
+        }
+        self.setname2index = {
+            name: index
+            for index, name in enumerate(self.setnames)
+        }
+        # cum_times is derived from times, and computed at load if it is not saved (e.g., by the older versions)
+        if 'cum_times' not in arrays and 'times' in arrays:
+            arrays = dict(arrays, cum_times=get_cum_times(arrays['times']))
+        for name in self.array_names:
+            assert name in arrays, 'Can not find {:} in arrays'.format(name)
+            setattr(self, name, arrays[name])
+        self.selected_seeds = None if seeds is None else tuple(seeds)
+        # [num-archs, num-datasets, num-trials], the trials of the loaded datasets and seeds
+        self.trial_masks = self.compute_trial_masks(self.seeds)
+        self.num_seeds = self.trial_masks.sum(axis=-1)
+        self.eval_keys = dict()
+        # the read-only arrays derived from the store, e.g., mean metrics of all architectures
+        self.caches = dict()
+
+    def __len__(self):
+        return self.seeds.shape[0]
+
+    def __contains__(self, index):
+        return 0 <= index < len(self) and bool(self.num_seeds[index].any())
+
+    def __repr__(self):
+        return (
+            '{name}({num} architectures, {datasets}, {seed} seeds, {epoch} epochs, {setnames})'
+            .format(name=self.__class__.__name__,
+                    num=len(self),
+                    datasets=self.datasets,
+                    seed=self.get_num_trials(),
+                    epoch=self.losses.shape[3],
+                    setnames=self.setnames))
+
+    # the size of the trial axis of a store that only has the selected seeds
+    def get_num_trials(self):
+        if self.selected_seeds is None: return self.seeds.shape[2]
+        return max(int(self.num_seeds.max(initial=0)), 1)
+
+    # the trials (seeds >= 0) of the loaded datasets and the selected seeds, `seeds` is [..., num-datasets, num-trials]
+    def compute_trial_masks(self, seeds):
+        masks = seeds >= 0
+        if self.selected_seeds is not None:
+            masks &= np.isin(seeds, self.selected_seeds)
+        dataset_masks = np.zeros(seeds.shape[-2], dtype=bool)
+        dataset_masks[list(self.dataset2index.values())] = True
+        return masks & dataset_masks[:, None]
+
+    def is_selection(self):
+        idatas = [self.dataset2index[dataset] for dataset in self.datasets]
+        return self.selected_seeds is not None or idatas != list(
+            range(self.seeds.shape[1]))
+
+    # the arrays of the loaded datasets and seeds (e.g., for saving and sharing), which are copied if it is a selection
+    def get_arrays(self):
+        arrays = {name: getattr(self, name) for name in self.array_names}
+        if not self.is_selection(): return arrays
+        idatas = [self.dataset2index[dataset] for dataset in self.datasets]
+        arrays = {name: array[:, idatas] for name, array in arrays.items()}
+        keeps = self.trial_masks[:, idatas]
+        # the trials are kept at the front, since the valid trials of each architecture should be its first trials
+        order = np.argsort(~keeps, axis=2, kind='stable')
+        order = order[:, :, :self.get_num_trials()]
+        for name, array in arrays.items():
+            xorder = order.reshape(order.shape + (1, ) * (array.ndim - 3))
+            arrays[name] = np.take_along_axis(array, xorder, axis=2)
+        removes = ~np.take_along_axis(keeps, order, axis=2)
+        arrays['seeds'][removes], arrays['epochs'][removes] = -1, 0
+        arrays['set_masks'][removes] = False
+        for name in ('losses', 'accuracies', 'times', 'cum_times', 'flops',
+                     'params', 'latencies'):
+            arrays[name][removes] = np.nan
+        return arrays
+
+    # a store with the results of `datasets` and `seeds` only (None for all), which shares the arrays of this store (e.g.,
+    # the memory-mapped or shared ones), i.e., the datasets are mapped onto the dataset axis, and the other seeds are masked
+    def select(self, datasets=None, seeds=None):
+        datasets = [
+            dataset for dataset in self.datasets
+            if datasets is None or dataset in datasets
+        ]
+        if self.selected_seeds is not None:
+            seeds = self.selected_seeds if seeds is None else [
+                seed for seed in seeds if seed in self.selected_seeds
+            ]
+        arrays = {name: getattr(self, name) for name in self.array_names}
+        return MetricStore(
+            datasets, self.setnames, arrays,
+            [self.dataset2index[dataset] for dataset in datasets], seeds)
+
+    @staticmethod
+    def create_from_arch2infos(arch2infos, num_archs, dtype=np.float64):
+        # arch2infos is a dict whose key is the arch-index and value is ArchResults, and the per-epoch curves are kept in
+        # float64 so that the queries are the same as ArchResults, dtype=np.float32 halves their memory with rounding errors
+        datasets, setnames, max_seed, max_epoch = [], ['train'], 1, 1
+        for arch_index, arch_result in arch2infos.items():
+            for dataset in arch_result.get_dataset_names():
+                if dataset not in datasets: datasets.append(dataset)
+                x_seeds = arch_result.dataset_seed[dataset]
+                max_seed = max(max_seed, len(x_seeds))
+                for seed in x_seeds:
+                    result = arch_result.all_results[(dataset, seed)]
+                    max_epoch = max(max_epoch, result.epochs)
+                    for name in result.get_eval_set():
+                        if name not in setnames: setnames.append(name)
+        shape = (num_archs, len(datasets), max_seed)
+        arrays = {
+            'seeds': np.full(shape, -1, dtype=np.int64),
+            'epochs': np.zeros(shape, dtype=np.int32),
+            'set_masks': np.zeros(shape + (len(setnames), ), dtype=bool),
+            'flops': np.full(shape, np.nan, dtype=np.float64),
+            'params': np.full(shape, np.nan, dtype=np.float64),
+            'latencies': np.full(shape, np.nan, dtype=np.float64)
+        }
+        for name in ('losses', 'accuracies', 'times'):
+            arrays[name] = np.full(shape + (max_epoch, len(setnames)),
+                                   np.nan,
+                                   dtype=dtype)
+        store = MetricStore(datasets, setnames, arrays)
+        for arch_index, arch_result in arch2infos.items():
+            store.update(arch_index, arch_result)
+        return store
+
+    # the keys of ResultsCount.eval_* for all epochs, which are cached to avoid re-formatting
+    def get_eval_keys(self, name, epochs):
+        if (name, epochs) not in self.eval_keys:
+            self.eval_keys[(name, epochs)] = [
+                '{:}@{:}'.format(name, iepoch) for iepoch in range(epochs)
+            ]
+        return self.eval_keys[(name, epochs)]
+
+    # (re-)write all results of the `index`-th architecture from an ArchResults
+    def update(self, index, arch_result):
+        assert 0 <= index < len(self), 'invalid index : {:} vs. {:}'.format(
+            index, len(self))
+        self.seeds[index], self.epochs[index], self.set_masks[
+            index] = -1, 0, False
+        for name in ('losses', 'accuracies', 'times', 'flops', 'params',
+                     'latencies'):
+            getattr(self, name)[index] = np.nan
+        for dataset in arch_result.get_dataset_names():
+            assert dataset in self.dataset2index, 'invalid dataset : {:} vs. {:}'.format(
+                dataset, self.datasets)
+            idata, x_seeds = self.dataset2index[
+                dataset], arch_result.dataset_seed[dataset]
+            assert len(x_seeds) <= self.seeds.shape[
+                2], '{:} has {:} seeds on {:}, but the store only supports {:}'.format(
+                    index, len(x_seeds), dataset, self.seeds.shape[2])
+            for iseed, seed in enumerate(x_seeds):
+                result = arch_result.all_results[(dataset, seed)]
+                self.update_result(index, idata, iseed, result)
+        self.cum_times[index] = get_cum_times(self.times[index])
+        self.trial_masks[index] = self.compute_trial_masks(self.seeds[index])
+        self.num_seeds[index] = self.trial_masks[index].sum(axis=-1)
+        self.caches.clear()
+
+    def update_result(self, index, idata, iseed, result):
+        epochs = result.epochs
+        assert epochs <= self.losses.shape[
+            3], 'invalid epochs : {:} vs. {:}'.format(epochs,
+                                                      self.losses.shape[3])
+        xkey = (index, idata, iseed)
+        self.seeds[xkey], self.epochs[xkey] = result.seed, epochs
+        self.flops[xkey], self.params[xkey] = result.flop, result.params
+        self.latencies[xkey] = result.get_latency()
+        # the training set is always the 0-th set
+        iepochs = list(range(epochs))
+        self.set_masks[xkey + (0, )] = True
+        self.losses[xkey][:epochs, 0] = gather_values(result.train_losses,
+                                                      iepochs)
+        self.accuracies[xkey][:epochs,
+                              0] = gather_values(result.train_acc1es, iepochs)
+        if result.train_times is not None:
+            self.times[xkey][:epochs,
+                             0] = gather_values(result.train_times, iepochs)
+        for name in result.get_eval_set():
+            assert name in self.setname2index, 'invalid eval-set : {:} vs. {:}'.format(
+                name, self.setnames)
+            iset, keys = self.setname2index[name], self.get_eval_keys(
+                name, epochs)
+            self.set_masks[xkey + (iset, )] = True
+            self.losses[xkey][:epochs, iset] = [
+                np.nan if x is None else x
+                for x in gather_values(result.eval_losses, keys)
+            ]
+            self.accuracies[xkey][:epochs, iset] = [
+                np.nan if x is None else x
+                for x in gather_values(result.eval_acc1es, keys)
+            ]
+            if isinstance(result.eval_times,
+                          dict) and len(result.eval_times) > 0:
+                self.times[xkey][:epochs, iset] = [
+                    np.nan if x is None else x
+                    for x in gather_values(result.eval_times, keys)
+                ]
+
+    def get_dataset_names(self, index):
+        return [
+            dataset for dataset in self.datasets
+            if self.num_seeds[index, self.dataset2index[dataset]] > 0
+        ]
+
+    # raise KeyError for the dataset that is not in the store, e.g., not selected when creating the API
+    def get_dataset_index(self, dataset):
+        if dataset not in self.dataset2index:
+            raise KeyError(
+                'The dataset {:} is not loaded, the loaded datasets are {:}'.
+                format(dataset, self.datasets))
+        return self.dataset2index[dataset]
+
+    def locate(self, index, dataset):
+        # return the dataset index and the positions of the trials, raise KeyError for missing trials as ArchResults
+        idata = self.get_dataset_index(dataset)
+        trials = np.flatnonzero(self.trial_masks[index, idata])
+        if len(trials) == 0:
+            raise KeyError('The {:}-th arch has no results on {:}'.format(
+                index, dataset))
+        return idata, trials
+
+    def get_comput_costs(self, index, dataset):
+        idata, trials = self.locate(index, dataset)
+        latencies = self.latencies[index, idata, trials]
+        latencies = latencies[latencies > 0]
+        info = {
+            'flops': np.mean(self.flops[index, idata, trials]),
+            'params': np.mean(self.params[index, idata, trials]),
+            'latency': np.mean(latencies) if len(latencies) > 0 else None
+        }
+        # as ResultsCount.get_times, there is no time if the first trial does not record the training time
+        has_time = not np.isnan(self.times[index, idata, trials[0], 0, 0])
+        epochs = self.epochs[index, idata, trials]
+        for iset, name in enumerate(self.setnames):
+            set_masks = self.set_masks[index, idata, trials, iset]
+            if not set_masks.any(): continue
+            if has_time:
+                epoch_times, total_times = [], []
+                for itrial in np.nonzero(set_masks)[0]:
+                    xtimes = self.times[index, idata,
+                                        trials[itrial], :epochs[itrial], iset]
+                    epoch_times.append(np.mean(xtimes, dtype=np.float64))
+                    total_times.append(np.sum(xtimes, dtype=np.float64))
+                info['T-{:}@epoch'.format(name)] = np.mean(epoch_times)
+                info['T-{:}@total'.format(name)] = np.mean(total_times)
+            else:
+                info['T-{:}@epoch'.format(name)] = None
+                info['T-{:}@total'.format(name)] = None
+        return info
+
+    # the metrics of all seeds, i.e., (iepochs, {'loss', 'accuracy', 'cur_time', 'all_time'}) of tuples with one value per seed
+    def get_seed_metrics(self, index, dataset, setname, iepoch=None):
+        idata, trials = self.locate(index, dataset)
+        iset = self.setname2index.get(setname, None)
+        if iset is None or not self.set_masks[index, idata, trials,
+                                              iset].all():
+            raise KeyError('The {:}-th arch has no {:} results on {:}'.format(
+                index, setname, dataset))
+        epochs = self.epochs[index, idata, trials].tolist()
+        if iepoch is None:
+            iepochs = tuple(epoch - 1 for epoch in epochs)
+        else:
+            assert 0 <= iepoch < min(
+                epochs), 'invalid iepoch={:} < {:}'.format(
+                    iepoch, min(epochs))
+            iepochs = (iepoch, ) * len(trials)
+        xkey = (index, idata, trials, list(iepochs), iset)
+        infos = {
+            'loss': tuple(self.losses[xkey].tolist()),
+            'accuracy': tuple(self.accuracies[xkey].tolist()),
+            'cur_time': tuple(self.times[xkey].tolist()),
+            'all_time': tuple(self.cum_times[xkey].tolist())
+        }
+        return iepochs, infos
+
+    def get_metrics(self,
+                    index,
+                    dataset,
+                    setname,
+                    iepoch=None,
+                    is_random=False):
+        iepochs, infos = self.get_seed_metrics(index, dataset, setname, iepoch)
+        if is_random: iseed = random.randint(0, len(iepochs) - 1)
+        else: iseed = None
+        return reduce_seed_metrics(iepochs, infos, iseed)
+
+    # The vectorized get_metrics with is_random=True, i.e., the metrics of a random seed of each architecture in `indexes`
+    # (an integer array with any shape), where the seeds are drawn by rng (a numpy.random.Generator or numpy.random),
+    # and raise KeyError if any architecture has no results of `setname` on `dataset` as get_seed_metrics
+    def sample_seed_metrics(self,
+                            indexes,
+                            dataset,
+                            setname,
+                            iepoch=None,
+                            rng=None):
+        iseeds = self.sample_trials(indexes, dataset, setname, rng)
+        return self.get_trial_metrics(indexes, iseeds, dataset, setname,
+                                      iepoch)
+
+    # the random trial (the position of its seed) of each architecture in `indexes`, see sample_seed_metrics
+    def sample_trials(self, indexes, dataset, setname, rng=None):
+        rng = np.random if rng is None else rng
+        idata = self.get_dataset_index(dataset)
+        indexes = np.asarray(indexes, dtype=np.int64)
+        if setname not in self.setname2index:
+            valids = np.zeros(indexes.shape, dtype=bool)
+        else:
+            valids = self.get_seed_masks(dataset, setname)[indexes]
+        if not valids.all():
+            raise KeyError('The {:}-th arch has no {:} results on {:}'.format(
+                indexes[~valids][0], setname, dataset))
+        masks = self.trial_masks[indexes, idata]
+        ktrials = (rng.random(indexes.shape) *
+                   self.num_seeds[indexes, idata]).astype(np.int64)
+        # the position of the k-th trial of each architecture
+        order = np.argsort(~masks, axis=-1, kind='stable')
+        return np.take_along_axis(order, ktrials[..., None], axis=-1)[..., 0]
+
+    # the metrics of the iseeds-th trials of `indexes` after the iepochs-th epoch (a scalar or an array), where None is the
+    # last epoch of each trial, so that a trial can be followed over epochs (e.g., the rungs of successive halving)
+    def get_trial_metrics(self,
+                          indexes,
+                          iseeds,
+                          dataset,
+                          setname,
+                          iepochs=None):
+        idata = self.get_dataset_index(dataset)
+        iset = self.setname2index[setname]
+        indexes = np.asarray(indexes, dtype=np.int64)
+        epochs = self.epochs[indexes, idata, iseeds]
+        if iepochs is None: iepochs = epochs - 1
+        else:
+            iepochs = np.zeros(indexes.shape, dtype=np.int64) + iepochs
+            valids = (iepochs >= 0) & (iepochs < epochs)
+            assert valids.all(), 'invalid iepoch={:} < {:}'.format(
+                iepochs.max(), epochs.min())
+        xkey = (indexes, idata, iseeds, iepochs, iset)
+        return {
+            'iepoch': iepochs,
+            'loss': self.losses[xkey].astype(np.float64),
+            'accuracy': self.accuracies[xkey].astype(np.float64),
+            'cur_time': self.times[xkey].astype(np.float64),
+            'all_time': self.cum_times[xkey].astype(np.float64)
+        }
+
+    # [num-archs], whether all trials of the architecture have the results of `setname` on `dataset`
+    def get_seed_masks(self, dataset, setname):
+        def create_func():
+            idata = self.get_dataset_index(dataset)
+            iset = self.setname2index[setname]
+            set_masks = self.set_masks[:, idata, :,
+                                       iset] | ~self.trial_masks[:, idata]
+            return (self.num_seeds[:, idata] > 0) & set_masks.all(axis=1)
+
+        return self.get_cache(('seed-masks', dataset, setname), create_func)
+
+    def get_cache(self, key, create_func):
+        if key not in self.caches:
+            values = create_func()
+            for value in (values if isinstance(values, tuple) else [values]):
+                value.flags.writeable = False
+            self.caches[key] = values
+        return self.caches[key]
+
+    # the mean loss and accuracy over all seeds for every architecture, NaN for the missing ones
+    def get_mean_metrics(self, dataset, setname, iepoch=None):
+        return self.get_cache(
+            ('mean-metrics', dataset, setname, iepoch),
+            lambda: self.compute_mean_metrics(dataset, setname, iepoch))
+
+    def compute_mean_metrics(self, dataset, setname, iepoch):
+        idata = self.get_dataset_index(dataset)
+        if setname not in self.setname2index:
+            raise KeyError('invalid eval-set : {:}'.format(setname))
+        iset = self.setname2index[setname]
+        epochs = self.epochs[:, idata]
+        if iepoch is None: iepochs = np.maximum(epochs - 1, 0)
+        else: iepochs = np.full(epochs.shape, iepoch)
+        masks = self.trial_masks[:, idata] & self.set_masks[:, idata, :, iset]
+        masks &= iepochs < epochs
+        losses = np.take_along_axis(self.losses[:, idata, :, :, iset],
+                                    iepochs[:, :, None],
+                                    axis=2)[:, :, 0].astype(np.float64)
+        accuracies = np.take_along_axis(self.accuracies[:, idata, :, :, iset],
+                                        iepochs[:, :, None],
+                                        axis=2)[:, :, 0].astype(np.float64)
+        counts = masks.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            losses = np.where(masks, losses, 0).sum(axis=1) / counts
+            accuracies = np.where(masks, accuracies, 0).sum(axis=1) / counts
+        return losses, accuracies
+
+    # the mean loss and accuracy of the architectures in `indexes` (a sequence of arch-indexes), NaN for the invalid (e.g., -1) or missing ones
+    def get_batch_metrics(self, indexes, dataset, setname, iepoch=None):
+        losses, accuracies = self.get_mean_metrics(dataset, setname, iepoch)
+        indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+        valids = (indexes >= 0) & (indexes < len(losses))
+        indexes = np.where(valids, indexes, 0)
+        return np.where(valids, losses[indexes],
+                        np.nan), np.where(valids, accuracies[indexes], np.nan)
+
+    # The per-epoch curves of the architectures in `indexes` (a sequence of arch-indexes), i.e., a dict of
+    #   loss/accuracy/time/all_time : [N, num-seeds, num-epochs], where all_time is the cumulative time up to each epoch
+    #   seeds/epochs                : [N, num-seeds], the seed (-1 for the missing trial) and the number of epochs of each trial
+    # the missing trials (or epochs) and the invalid (e.g., -1) indexes are NaN. If reduce_seeds is True, the curves are
+    # averaged over the trials with results, i.e., [N, num-epochs].
+    def get_curves(self, indexes, dataset, setname, reduce_seeds=False):
+        idata = self.get_dataset_index(dataset)
+        if setname not in self.setname2index:
+            raise KeyError('invalid eval-set : {:}'.format(setname))
+        iset = self.setname2index[setname]
+        indexes = np.asarray(indexes, dtype=np.int64).reshape(-1)
+        valids = (indexes >= 0) & (indexes < len(self))
+        indexes = np.where(valids, indexes, 0)
+        trials = np.arange(self.seeds.shape[2])
+        if self.selected_seeds is not None:
+            # the selected trials are moved to the front, as the ones of a store that only has these seeds
+            trials = np.argsort(~self.trial_masks[indexes, idata],
+                                axis=-1,
+                                kind='stable')[:, :self.get_num_trials()]
+        xkey = (indexes[:, None], idata, trials)
+        seeds = np.where(valids[:, None] & self.trial_masks[xkey],
+                         self.seeds[xkey], -1)
+        masks = (seeds >= 0) & self.set_masks[xkey + (iset, )]
+        curves = {
+            'seeds': seeds,
+            'epochs': np.where(masks, self.epochs[xkey], 0)
+        }
+        for key, name in (('loss', 'losses'), ('accuracy', 'accuracies'),
+                          ('time', 'times'), ('all_time', 'cum_times')):
+            values = getattr(self, name)[xkey + (slice(None), iset)]
+            values[~masks] = np.nan
+            if reduce_seeds:
+                counts = (~np.isnan(values)).sum(axis=1)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = np.nansum(values, axis=1,
+                                       dtype=np.float64) / counts
+            curves[key] = values
+        return curves
+
+    # the mean FLOPs, params, and latency over all seeds for every architecture, NaN for the missing ones
+    def get_mean_costs(self, dataset):
+        return self.get_cache(('mean-costs', dataset),
+                              lambda: self.compute_mean_costs(dataset))
+
+    def compute_mean_costs(self, dataset):
+        idata = self.get_dataset_index(dataset)
+        masks = self.trial_masks[:, idata]
+        counts = masks.sum(axis=1)
+        latency_masks = masks & (self.latencies[:, idata] > 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            flops = np.where(masks, self.flops[:, idata],
+                             0).sum(axis=1) / counts
+            params = np.where(masks, self.params[:, idata],
+                              0).sum(axis=1) / counts
+            latencies = np.where(latency_masks, self.latencies[:, idata],
+                                 0).sum(axis=1) / latency_masks.sum(axis=1)
+        return flops, params, latencies
+
+    # the arch-indexes sorted by the mean accuracy (descending, NaN at last), the tie is broken by the smaller index
+    def get_accuracy_order(self, dataset, setname, iepoch=None):
+        def create_func():
+            _, accuracies = self.get_mean_metrics(dataset, setname, iepoch)
+            return np.lexsort((np.arange(len(accuracies)), -accuracies))
+
+        return self.get_cache(('accuracy-order', dataset, setname, iepoch),
+                              create_func)
+
+    # ranks    : [num-archs], the 0-based rank by the mean accuracy (descending), where tied architectures share the best rank, -1 for the missing ones
+    # percentiles : [num-archs], the architecture is in the top `percentile`% of all architectures with results, NaN for the missing ones
+    # order    : the arch-indexes with results sorted by the rank, i.e., the inverse of ranks (order[ranks[i]] = i without ties)
+    def get_rank_table(self, dataset, setname, iepoch=None):
+        def create_func():
+            _, accuracies = self.get_mean_metrics(dataset, setname, iepoch)
+            order = self.get_accuracy_order(dataset, setname, iepoch)
+            order = order[:int((~np.isnan(accuracies)).sum())]
+            xaccs = -accuracies[order]
+            ranks = np.full(len(accuracies), -1, dtype=np.int64)
+            ranks[order] = np.searchsorted(xaccs, xaccs, side='left')
+            percentiles = np.full(len(accuracies), np.nan)
+            percentiles[order] = (ranks[order] + 1) * 100.0 / len(order)
+            return ranks, percentiles, order
+
+        return self.get_cache(('rank-table', dataset, setname, iepoch),
+                              create_func)
+
+    # the regret (the best mean accuracy - the best accuracy found so far) of each step of the search trajectories,
+    # which is an integer array of arch-indexes with any shape [..., num-steps], and the missing architectures and the
+    # invalid indexes (e.g., -1 for the padding) are ignored
+    def get_regrets(self, trajectories, dataset, setname, iepoch=None):
+        _, accuracies = self.get_mean_metrics(dataset, setname, iepoch)
+        _, _, order = self.get_rank_table(dataset, setname, iepoch)
+        assert len(order) > 0, 'there is no result of {:} on {:}'.format(
+            setname, dataset)
+        trajectories = np.asarray(trajectories, dtype=np.int64)
+        valids = (trajectories >= 0) & (trajectories < len(accuracies))
+        values = accuracies[np.where(valids, trajectories, 0)]
+        values = np.where(valids, values, np.nan)
+        founds = np.fmax.accumulate(values, axis=-1)
+        return accuracies[order[0]] - founds
+
+    # The statistics of the architectures with results in each of the masks [K, num-archs] (e.g., the sub-search-spaces), i.e.,
+    #   num-archs          : [K], the number of architectures with results
+    #   mean/std-accuracy  : [K], the mean and (population) std of their mean accuracies, NaN for the empty ones
+    #   best-indexes/ranks : [K], the most accurate one (the smaller index for the ties) and its rank in all architectures,
+    #                        -1 for the empty ones, and best-accuracies is NaN for them
+    def get_subspace_stats(self, masks, dataset, setname, iepoch=None):
+        _, accuracies = self.get_mean_metrics(dataset, setname, iepoch)
+        ranks, _, _ = self.get_rank_table(dataset, setname, iepoch)
+        order = self.get_accuracy_order(dataset, setname, iepoch)
+        masks = np.asarray(masks, dtype=bool).reshape(-1, len(accuracies))
+        masks = masks & ~np.isnan(accuracies)
+        counts = masks.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(masks, accuracies, 0).sum(axis=1) / counts
+            stds = np.sqrt(
+                np.where(masks,
+                         (accuracies - means[:, None])**2, 0).sum(axis=1) /
+                counts)
+        # the first one of each mask in the cached order of accuracies
+        best_indexes = np.where(counts > 0,
+                                order[masks[:, order].argmax(axis=1)], -1)
+        valids = best_indexes >= 0
+        xindexes = np.where(valids, best_indexes, 0)
+        return {
+            'num-archs': counts,
+            'mean-accuracy': means,
+            'std-accuracy': stds,
+            'best-indexes': best_indexes,
+            'best-accuracies': np.where(valids, accuracies[xindexes], np.nan),
+            'best-ranks': np.where(valids, ranks[xindexes], -1)
+        }
+
+    # the arch-indexes sorted by the cost (ascending), then by the mean accuracy (descending)
+    def get_cost_order(self, dataset, setname, iepoch=None, cost='flops'):
+        def create_func():
+            _, accuracies = self.get_mean_metrics(dataset, setname, iepoch)
+            costs = self.get_costs(dataset, cost)
+            return np.lexsort((np.arange(len(accuracies)), -accuracies, costs))
+
+        return self.get_cache(('cost-order', dataset, setname, iepoch, cost),
+                              create_func)
+
+    def get_costs(self, dataset, cost):
+        flops, params, latencies = self.get_mean_costs(dataset)
+        xcosts = {'flops': flops, 'params': params, 'latency': latencies}
+        assert cost in xcosts, 'invalid cost : {:} vs. {:}'.format(
+            cost, list(xcosts.keys()))
+        return xcosts[cost]
+
+    # find the top-k architectures and the accuracy-vs-cost Pareto front among the architectures satisfying all constraints,
+    # masks is an optional boolean array to restrict the candidates (e.g., the evaluated architectures)
+    def search(self,
+               dataset,
+               setname,
+               iepoch=None,
+               topk=1,
+               flop_max=None,
+               param_max=None,
+               latency_max=None,
+               cost='flops',
+               masks=None):
+        _, accuracies = self.get_mean_metrics(dataset, setname, iepoch)
+        flops, params, latencies = self.get_mean_costs(dataset)
+        valid_masks = ~np.isnan(accuracies)
+        if masks is not None: valid_masks &= masks
+        with np.errstate(invalid='ignore'):
+            if flop_max is not None: valid_masks &= flops <= flop_max
+            if param_max is not None: valid_masks &= params <= param_max
+            if latency_max is not None: valid_masks &= latencies <= latency_max
+        # the top-k in the cached order of accuracies
+        order = self.get_accuracy_order(dataset, setname, iepoch)
+        topk_indexes = order[valid_masks[order]][:topk]
+        # the Pareto front in the cached order of costs : an architecture is kept if it is more accurate than all cheaper ones
+        costs = self.get_costs(dataset, cost)
+        order = self.get_cost_order(dataset, setname, iepoch, cost)
+        order = order[valid_masks[order] & ~np.isnan(costs[order])]
+        xaccuracies = accuracies[order]
+        if len(order) > 0:
+            best_so_far = np.maximum.accumulate(xaccuracies)
+            pareto_masks = np.ones(len(order), dtype=bool)
+            pareto_masks[1:] = xaccuracies[1:] > best_so_far[:-1]
+            order = order[pareto_masks]
+        return {
+            'topk-indexes': topk_indexes,
+            'topk-accuracies': accuracies[topk_indexes],
+            'pareto-indexes': order,
+            'pareto-accuracies': accuracies[order],
+            'pareto-costs': costs[order]
+        }
+
+    def view(self, index, arch_str):
+        return ArchMetrics(self, index, arch_str)
+
+
+class ArchMetrics(object):
+    # the metrics of one architecture in a MetricStore, which has the same query interface as ArchResults
+    def __init__(self, store, arch_index, arch_str):
+        self.store = store
+        self.arch_index = int(arch_index)
+        self.arch_str = arch_str
+
+    def get_comput_costs(self, dataset):
+        return self.store.get_comput_costs(self.arch_index, dataset)
+
+    def get_metrics(self, dataset, setname, iepoch=None, is_random=False):
+        return self.store.get_metrics(self.arch_index, dataset, setname,
+                                      iepoch, is_random)
+
+    def get_dataset_names(self):
+        return self.store.get_dataset_names(self.arch_index)
+
+    def arch_idx_str(self):
+        return '{:06d}'.format(self.arch_index)
+
+    def __repr__(self):
+        return ('{name}(arch-index={index}, arch={arch}, datasets={datasets})'.
+                format(name=self.__class__.__name__,
+                       index=self.arch_index,
+                       arch=self.arch_str,
+                       datasets=self.get_dataset_names()))
@@ -0,0 +1,93 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# Read-only views of ArchResults and ResultsCount, which can be returned by the
+# API without copying. Their attributes are exposed as read-only proxies, and the
+# methods that modify the results are disabled. Call `copy()` to get a mutable
+# (deep-copied) ArchResults or ResultsCount. Note that the trained weights from
+# `get_net_param` are still the original tensors.
+#
+import copy
+from types import MappingProxyType
+
+
+def read_only(value):
+    if isinstance(value, dict): return MappingProxyType(value)
+    elif isinstance(value, list): return tuple(value)
+    else: return value
+
+
+class ResultsCountView(object):
+    modify_methods = ('update_train_info', 'reset_eval', 'update_latency',
+                      'update_eval', 'update_OLD_eval', 'load_state_dict',
+                      'state_dict')
+
+    def __init__(self, result):
+        object.__setattr__(self, 'result', result)
+
+    def __getattr__(self, name):
+        if name in self.modify_methods:
+            raise AttributeError(
+                '{:} is read-only and does not support {:}, please use copy() first'
+                .format(self.__class__.__name__, name))
+        return read_only(getattr(self.result, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{:} is read-only, can not set {:}'.format(
+            self.__class__.__name__, name))
+
+    def get_eval_set(self):
+        return tuple(self.result.eval_names)
+
+    def __repr__(self):
+        return 'ReadOnly-{:}'.format(self.result)
+
+    def copy(self):
+        return copy.deepcopy(self.result)
+
+
+class ArchResultsView(object):
+    modify_methods = ('update', 'load_state_dict', 'state_dict',
+                      'clear_params')
+
+    def __init__(self, arch_result):
+        object.__setattr__(self, 'arch_result', arch_result)
+
+    def __getattr__(self, name):
+        if name in self.modify_methods:
+            raise AttributeError(
+                '{:} is read-only and does not support {:}, please use copy() first'
+                .format(self.__class__.__name__, name))
+        if name == 'all_results':
+            return MappingProxyType({
+                key: ResultsCountView(value)
+                for key, value in self.arch_result.all_results.items()
+            })
+        elif name == 'dataset_seed':
+            return MappingProxyType({
+                key: tuple(value)
+                for key, value in self.arch_result.dataset_seed.items()
+            })
+        return read_only(getattr(self.arch_result, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{:} is read-only, can not set {:}'.format(
+            self.__class__.__name__, name))
+
+    def query(self, dataset, seed=None):
+        if seed is None:
+            x_seeds = self.arch_result.dataset_seed[dataset]
+            return {
+                seed:
+                ResultsCountView(self.arch_result.all_results[(dataset, seed)])
+                for seed in x_seeds
+            }
+        else:
+            return ResultsCountView(self.arch_result.all_results[(dataset,
+                                                                  seed)])
+
+    def __repr__(self):
+        return 'ReadOnly-{:}'.format(self.arch_result)
+
+    def copy(self):
+        return copy.deepcopy(self.arch_result)
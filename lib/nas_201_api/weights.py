@@ -0,0 +1,178 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The trained weights of NAS-Bench-201, which are stored apart from the metrics.
+#   save_dir/weights.bin : raw bytes of all tensors (64-byte aligned)
+#   save_dir/weights.npz : the index, i.e., every entry (hp, arch-index, dataset, seed) with hp=0/1 for less/full owns
+#                          the tensor records [entry_starts[e], entry_starts[e+1]) with their names/dtypes/shapes/offsets
+# `WeightStore` maps weights.bin via np.memmap, and the tensors returned by `get_net_param` are views of the mapped pages,
+# so that the weights are only read from the disk when they are used.
+#
+import os
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+import torch
+
+WEIGHT_DATA_NAME = 'weights.bin'
+WEIGHT_INDEX_NAME = 'weights.npz'
+ALIGNMENT = 64
+
+
+def is_weight_dir(path):
+    return os.path.isdir(path) and os.path.isfile(
+        os.path.join(path, WEIGHT_INDEX_NAME))
+
+
+def save_weights(arch2infos_less, arch2infos_full, save_dir):
+    os.makedirs(save_dir, exist_ok=True)
+    datasets, names, dtypes = dict(), dict(), dict()  # value -> id
+    entry_keys, entry_starts = [], [0]
+    record_names, record_dtypes, record_offsets, record_shapes = [], [], [], []
+
+    def get_id(values, value):
+        if value not in values: values[value] = len(values)
+        return values[value]
+
+    offset = 0
+    with open(os.path.join(save_dir, WEIGHT_DATA_NAME), 'wb') as cfile:
+        for ihp, arch2infos in enumerate((arch2infos_less, arch2infos_full)):
+            for index in sorted(arch2infos.keys()):
+                for (dataset, seed), result in sorted(
+                        arch2infos[index].all_results.items()):
+                    state_dict = result.get_net_param()
+                    if state_dict is None: continue
+                    for name, tensor in state_dict.items():
+                        assert isinstance(
+                            tensor, torch.Tensor
+                        ), 'invalid type of {:} in {:}/{:}/{:} : {:}'.format(
+                            name, index, dataset, seed, type(tensor))
+                        array = tensor.detach().cpu().contiguous().numpy()
+                        padding = (-offset) % ALIGNMENT
+                        cfile.write(b'\0' * padding)
+                        offset += padding
+                        record_names.append(get_id(names, name))
+                        record_dtypes.append(get_id(dtypes, array.dtype.str))
+                        record_offsets.append(offset)
+                        record_shapes.append(list(array.shape))
+                        cfile.write(array.tobytes())
+                        offset += array.nbytes
+                    entry_keys.append(
+                        [ihp, index,
+                         get_id(datasets, dataset), seed])
+                    entry_starts.append(len(record_names))
+    max_ndim = max([len(shape) for shape in record_shapes] + [1])
+    shapes = np.full((len(record_shapes), max_ndim), -1, dtype=np.int64)
+    ndims = np.zeros(len(record_shapes), dtype=np.int64)
+    for i, shape in enumerate(record_shapes):
+        shapes[i, :len(shape)], ndims[i] = shape, len(shape)
+    np.savez(os.path.join(save_dir, WEIGHT_INDEX_NAME),
+             datasets=np.array(list(datasets), dtype=str),
+             names=np.array(list(names), dtype=str),
+             dtypes=np.array(list(dtypes), dtype=str),
+             entry_keys=np.array(entry_keys, dtype=np.int64).reshape(-1, 4),
+             entry_starts=np.array(entry_starts, dtype=np.int64),
+             record_names=np.array(record_names, dtype=np.int64),
+             record_dtypes=np.array(record_dtypes, dtype=np.int64),
+             record_offsets=np.array(record_offsets, dtype=np.int64),
+             record_shapes=shapes,
+             record_ndims=ndims)
+    return len(entry_keys), offset
+
+
+# save the benchmark without the trained weights into `file_path`, which can be loaded by API(file_path) as the original one
+def export_lite(meta_archs, arch2infos_less, arch2infos_full,
+                evaluated_indexes, file_path):
+    def lite_state_dict(arch_result):
+        state_dict = arch_result.state_dict()
+        state_dict['all_results'] = {
+            key: dict(value, net_state_dict=None)
+            for key, value in state_dict['all_results'].items()
+        }
+        state_dict['clear_net_done'] = True
+        return state_dict
+
+    arch2infos = dict()
+    for index in arch2infos_full.keys():
+        arch2infos[index] = {
+            'less': lite_state_dict(arch2infos_less[index]),
+            'full': lite_state_dict(arch2infos_full[index])
+        }
+    torch.save(
+        {
+            'meta_archs': list(meta_archs),
+            'arch2infos': arch2infos,
+            'evaluated_indexes': list(evaluated_indexes)
+        }, file_path)
+
+
+class WeightStore(object):
+    # mmap_mode='c' is copy-on-write, so that modifying the returned tensors does not change the file
+    def __init__(self, save_dir, mmap_mode='c'):
+        assert is_weight_dir(
+            save_dir), 'invalid weight directory : {:}'.format(save_dir)
+        self.save_dir = save_dir
+        with np.load(os.path.join(save_dir, WEIGHT_INDEX_NAME)) as index:
+            for key in index.files:
+                setattr(self, key, index[key])
+        self.datasets = self.datasets.tolist()
+        self.names = self.names.tolist()
+        self.dtypes = [np.dtype(dtype) for dtype in self.dtypes.tolist()]
+        self.key2entry, self.key2seeds = dict(), defaultdict(list)
+        for ientry, (ihp, index, idata,
+                     seed) in enumerate(self.entry_keys.tolist()):
+            dataset = self.datasets[idata]
+            self.key2entry[(ihp, index, dataset, seed)] = ientry
+            self.key2seeds[(ihp, index, dataset)].append(seed)
+        data_path = os.path.join(save_dir, WEIGHT_DATA_NAME)
+        if os.path.getsize(data_path) == 0: self.data = np.zeros(0, np.uint8)
+        else: self.data = np.memmap(data_path, dtype=np.uint8, mode=mmap_mode)
+
+    def __len__(self):
+        return len(self.key2entry)
+
+    def __repr__(self):
+        return ('{name}({num} weights, {size:.1f} MB, dir={save_dir})'.format(
+            name=self.__class__.__name__,
+            num=len(self),
+            size=len(self.data) / 1e6,
+            save_dir=self.save_dir))
+
+    def has(self, index, dataset, seed=None, use_12epochs_result=False):
+        ihp = 0 if use_12epochs_result else 1
+        if seed is None: return (ihp, index, dataset) in self.key2seeds
+        else: return (ihp, index, dataset, seed) in self.key2entry
+
+    def get_seeds(self, index, dataset, use_12epochs_result=False):
+        ihp = 0 if use_12epochs_result else 1
+        return list(self.key2seeds.get((ihp, index, dataset), []))
+
+    def get_tensor(self, irecord):
+        dtype = self.dtypes[self.record_dtypes[irecord]]
+        shape = tuple(self.record_shapes[irecord, :self.record_ndims[irecord]])
+        offset = int(self.record_offsets[irecord])
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        array = self.data[offset:offset + nbytes].view(dtype).reshape(shape)
+        return torch.from_numpy(array)
+
+    # the same format as ArchResults.get_net_param, i.e., a dict of seed -> weights if seed is None
+    def get_net_param(self,
+                      index,
+                      dataset,
+                      seed=None,
+                      use_12epochs_result=False):
+        if seed is None:
+            return {
+                xseed: self.get_net_param(index, dataset, xseed,
+                                          use_12epochs_result)
+                for xseed in self.get_seeds(index, dataset,
+                                            use_12epochs_result)
+            }
+        ihp = 0 if use_12epochs_result else 1
+        ientry = self.key2entry[(ihp, index, dataset, seed)]
+        state_dict = OrderedDict()
+        for irecord in range(self.entry_starts[ientry],
+                             self.entry_starts[ientry + 1]):
+            state_dict[self.names[
+                self.record_names[irecord]]] = self.get_tensor(irecord)
+        return state_dict
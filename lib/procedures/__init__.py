@@ -2,6 +2,7 @@
 # Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
 ##################################################
 
+from .funcs_nasbench import evaluate_for_seed, pure_evaluate  # noqa: E401
 from .optimizers import get_optim_scheduler  # noqa: E401
 from .starts import get_machine_info  # noqa: E401
 from .starts import (copy_checkpoint, prepare_logger, prepare_seed,
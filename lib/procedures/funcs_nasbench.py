@@ -0,0 +1,160 @@
+##################################################
+# Copyright (c) Xuanyi Dong [GitHub D-X-Y], 2019 #
+##################################################
+# The training and evaluation procedures to generate NAS-Bench-201, which run on GPU or CPU (`device`).
+#
+import time
+
+import torch
+from config_utils import dict2config
+from log_utils import AverageMeter, convert_secs2time, time_string
+from models import get_cell_based_tiny_net
+from utils import get_model_infos, obtain_accuracy
+
+from .optimizers import get_optim_scheduler
+from .starts import prepare_seed
+
+
+def procedure(xloader, network, criterion, scheduler, optimizer, mode, device):
+    losses, top1, top5 = AverageMeter(), AverageMeter(), AverageMeter()
+    if mode == 'train': network.train()
+    elif mode == 'valid': network.eval()
+    else: raise ValueError('The mode is not right : {:}'.format(mode))
+
+    start_time = time.time()
+    for i, (inputs, targets) in enumerate(xloader):
+        if mode == 'train': scheduler.update(None, 1.0 * i / len(xloader))
+        inputs = inputs.to(device, non_blocking=True)
+        targets = targets.to(device, non_blocking=True)
+        if mode == 'train': optimizer.zero_grad()
+        # forward
+        _, logits = network(inputs)
+        loss = criterion(logits, targets)
+        # backward
+        if mode == 'train':
+            loss.backward()
+            optimizer.step()
+        # record loss and accuracy
+        prec1, prec5 = obtain_accuracy(logits.data, targets.data, topk=(1, 5))
+        losses.update(loss.item(), inputs.size(0))
+        top1.update(prec1.item(), inputs.size(0))
+        top5.update(prec5.item(), inputs.size(0))
+    return losses.avg, top1.avg, top5.avg, time.time() - start_time
+
+
+# evaluate the network and record the latency of each batch, the first batch and the smaller (last) batch are ignored
+def pure_evaluate(xloader,
+                  network,
+                  device,
+                  criterion=torch.nn.CrossEntropyLoss()):
+    losses, top1, top5 = AverageMeter(), AverageMeter(), AverageMeter()
+    latencies, batch = [], None
+    network.eval()
+    with torch.no_grad():
+        for i, (inputs, targets) in enumerate(xloader):
+            inputs = inputs.to(device, non_blocking=True)
+            targets = targets.to(device, non_blocking=True)
+            if device.type == 'cuda': torch.cuda.synchronize(device)
+            start_time = time.time()
+            _, logits = network(inputs)
+            if device.type == 'cuda': torch.cuda.synchronize(device)
+            if batch is None or batch == inputs.size(0):
+                batch = inputs.size(0)
+                latencies.append(time.time() - start_time)
+            loss = criterion(logits, targets)
+            prec1, prec5 = obtain_accuracy(logits.data,
+                                           targets.data,
+                                           topk=(1, 5))
+            losses.update(loss.item(), inputs.size(0))
+            top1.update(prec1.item(), inputs.size(0))
+            top5.update(prec5.item(), inputs.size(0))
+    if len(latencies) > 2: latencies = latencies[1:]
+    return losses.avg, top1.avg, top5.avg, latencies
+
+
+# train the `arch` with `seed` and evaluate it on every epoch, where valid_loaders is a dict of eval-set -> loader,
+# and return the results of this seed, which are merged into ResultsCount of NAS-Bench-201
+def evaluate_for_seed(arch_config, config, arch, train_loader, valid_loaders,
+                      seed, logger, device):
+    prepare_seed(seed)  # random seed
+    net = get_cell_based_tiny_net(
+        dict2config(
+            {
+                'name': 'infer.tiny',
+                'C': arch_config['channel'],
+                'N': arch_config['num_cells'],
+                'genotype': arch,
+                'num_classes': config.class_num
+            }, None))
+    flop, param = get_model_infos(net, config.xshape)
+    logger.log('Network : {:}'.format(net.get_message()), False)
+    logger.log(
+        '{:} Seed-------------------------- {:} --------------------------'.
+        format(time_string(), seed))
+    logger.log('FLOP = {:} MB, Param = {:} MB'.format(flop, param))
+    # train and valid
+    optimizer, scheduler, criterion = get_optim_scheduler(
+        net.parameters(), config)
+    if device.type == 'cuda' and device.index is None:  # use all visible GPUs
+        network = torch.nn.DataParallel(net).cuda()
+    else:
+        network = net.to(device)
+    criterion = criterion.to(device)
+    # start training
+    start_time, epoch_time, total_epoch = time.time(), AverageMeter(
+    ), config.epochs + config.warmup
+    train_losses, train_acc1es, train_acc5es, train_times = {}, {}, {}, {}
+    valid_losses, valid_acc1es, valid_acc5es, valid_times = {}, {}, {}, {}
+    for epoch in range(total_epoch):
+        scheduler.update(epoch, 0.0)
+        train_loss, train_acc1, train_acc5, train_tm = procedure(
+            train_loader, network, criterion, scheduler, optimizer, 'train',
+            device)
+        train_losses[epoch] = train_loss
+        train_acc1es[epoch] = train_acc1
+        train_acc5es[epoch] = train_acc5
+        train_times[epoch] = train_tm
+        with torch.no_grad():
+            for key, xloader in valid_loaders.items():
+                valid_loss, valid_acc1, valid_acc5, valid_tm = procedure(
+                    xloader, network, criterion, None, None, 'valid', device)
+                xkey = '{:}@{:}'.format(key, epoch)
+                valid_losses[xkey] = valid_loss
+                valid_acc1es[xkey] = valid_acc1
+                valid_acc5es[xkey] = valid_acc5
+                valid_times[xkey] = valid_tm
+        # measure elapsed time
+        epoch_time.update(time.time() - start_time)
+        start_time = time.time()
+        need_time = 'Time Left: {:}'.format(
+            convert_secs2time(epoch_time.avg * (total_epoch - epoch - 1),
+                              True))
+        logger.log(
+            '{:} {:} epoch={:03d}/{:03d} :: Train [loss={:.5f}, acc@1={:.2f}%, acc@5={:.2f}%] Valid [loss={:.5f}, acc@1={:.2f}%, acc@5={:.2f}%]'
+            .format(time_string(), need_time, epoch, total_epoch, train_loss,
+                    train_acc1, train_acc5, valid_loss, valid_acc1,
+                    valid_acc5))
+    # the latency is measured on the first eval-set (e.g., ori-test)
+    _, _, _, latencies = pure_evaluate(
+        list(valid_loaders.values())[0], network, device)
+    info_seed = {
+        'flop': float(flop),
+        'param': float(param),
+        'channel': arch_config['channel'],
+        'num_cells': arch_config['num_cells'],
+        'config': config._asdict(),
+        'total_epoch': total_epoch,
+        'train_losses': train_losses,
+        'train_acc1es': train_acc1es,
+        'train_acc5es': train_acc5es,
+        'train_times': train_times,
+        'valid_losses': valid_losses,
+        'valid_acc1es': valid_acc1es,
+        'valid_acc5es': valid_acc5es,
+        'valid_times': valid_times,
+        'latency': latencies,
+        'net_state_dict': net.state_dict(),
+        'net_string': '{:}'.format(net),
+        'finish-train': True
+    }
+    return info_seed
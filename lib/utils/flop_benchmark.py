@@ -5,9 +5,9 @@ import torch.nn as nn
 
 def count_parameters_in_MB(model):
     if isinstance(model, nn.Module):
-        return np.sum(np.prod(v.size()) for v in model.parameters()) / 1e6
+        return sum(np.prod(v.size()) for v in model.parameters()) / 1e6
     else:
-        return np.sum(np.prod(v.size()) for v in model) / 1e6
+        return sum(np.prod(v.size()) for v in model) / 1e6
 
 
 def get_model_infos(model, shape):
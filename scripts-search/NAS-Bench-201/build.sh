@@ -14,7 +14,7 @@ rm -rf ${save_dir}
 mkdir -p ${save_dir}
 
 #cp NAS-Bench-201.md ${save_dir}/README.md
-sed '125,187d' NAS-Bench-201.md > ${save_dir}/README.md
+sed '216,287d' NAS-Bench-201.md > ${save_dir}/README.md
 cp LICENSE.md ${save_dir}/LICENSE.md
 cp -r lib/nas_201_api ${save_dir}/
 rm -rf ${save_dir}/nas_201_api/__pycache__
@@ -0,0 +1,29 @@
+#!/bin/bash
+# bash ./scripts-search/algos/run-search.sh "R_EA reinforce RANDOM" 500 "12000"
+echo script name: $0
+echo $# arguments
+if [ "$#" -ne 3 ] ;then
+  echo "Input illegal number of parameters " $#
+  echo "Need 3 parameters for the algorithms, the number of seeds, and the time budgets"
+  exit 1
+fi
+if [ "$TORCH_HOME" = "" ]; then
+  echo "Must set TORCH_HOME envoriment variable for data dir saving"
+  exit 1
+else
+  echo "TORCH_HOME : $TORCH_HOME"
+fi
+
+algos=$1
+num_seeds=$2
+time_budgets=$3
+channel=16
+num_cells=5
+max_nodes=4
+
+save_dir=./output/search-cell-nas-bench-201/runs-C${channel}-N${num_cells}
+
+OMP_NUM_THREADS=1 python3 ./exps/algos/run_search.py \
+	--save_dir ${save_dir} --max_nodes ${max_nodes} --channel ${channel} --num_cells ${num_cells} \
+	--algos ${algos} --num_seeds ${num_seeds} --time_budgets ${time_budgets} \
+	--arch_nas_dataset ${TORCH_HOME}/NAS-Bench-201-v1_0-e61699.pth
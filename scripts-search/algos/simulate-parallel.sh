@@ -0,0 +1,28 @@
+#!/bin/bash
+# bash ./scripts-search/algos/simulate-parallel.sh "R_EA reinforce RANDOM" "1 8 16 32 64" 100
+echo script name: $0
+echo $# arguments
+if [ "$#" -ne 3 ] ;then
+  echo "Input illegal number of parameters " $#
+  echo "Need 3 parameters for the algorithms, the numbers of workers, and the number of seeds"
+  exit 1
+fi
+if [ "$TORCH_HOME" = "" ]; then
+  echo "Must set TORCH_HOME envoriment variable for data dir saving"
+  exit 1
+else
+  echo "TORCH_HOME : $TORCH_HOME"
+fi
+
+algos=$1
+num_workers=$2
+num_seeds=$3
+max_nodes=4
+
+save_dir=./output/search-cell-nas-bench-201/simulate-parallel
+
+OMP_NUM_THREADS=1 python3 ./exps/algos/simulate_parallel.py \
+	--save_dir ${save_dir} --max_nodes ${max_nodes} \
+	--algos ${algos} --num_workers ${num_workers} --num_seeds ${num_seeds} \
+	--time_budget 12000 --target_regret 1.0 \
+	--arch_nas_dataset ${TORCH_HOME}/NAS-Bench-201-v1_0-e61699.pth